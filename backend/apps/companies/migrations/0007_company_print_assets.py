@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_company_authorized_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='authorized_signature_print',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='company_signatures/print/'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='logo_print',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='company_logos/print/'),
+        ),
+    ]
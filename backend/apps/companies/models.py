@@ -16,6 +16,11 @@ class Company(models.Model):
     state_code = models.CharField(max_length=2, help_text="GST State Code", default="10")
     logo = models.ImageField(upload_to='company_logos/', blank=True, null=True)
     authorized_signature = models.ImageField(upload_to='company_signatures/', blank=True, null=True)
+    # Copies of logo and signature scaled to their size on invoice PDFs (see apps.invoices.pdf_assets)
+    logo_print = models.ImageField(upload_to='company_logos/print/', blank=True, null=True, editable=False)
+    authorized_signature_print = models.ImageField(
+        upload_to='company_signatures/print/', blank=True, null=True, editable=False
+    )
     website = models.URLField(blank=True, null=True)
     
     # Banking Details
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, Invoice, InvoiceItem
+from .models import Customer, Invoice, InvoiceItem, InvoiceSequence
 
 
 @admin.register(Customer)
@@ -30,4 +30,11 @@ class InvoiceItemAdmin(admin.ModelAdmin):
     list_display = ('invoice', 'item', 'quantity', 'unit_price', 'total_amount')
     list_filter = ('invoice__company', 'invoice__store', 'item')
     search_fields = ('invoice__invoice_number', 'item__name')
-    readonly_fields = ('subtotal', 'tax_amount', 'total_amount', 'cgst_amount', 'sgst_amount', 'igst_amount')
\ No newline at end of file
+    readonly_fields = ('subtotal', 'tax_amount', 'total_amount', 'cgst_amount', 'sgst_amount', 'igst_amount')
+
+
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ('store', 'prefix', 'period', 'last_number', 'updated_at')
+    list_filter = ('store', 'prefix')
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,155 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import override_settings
+from rest_framework import serializers
+
+from apps.accounts.models import User
+from apps.companies.models import Company
+from apps.invoices.models import InvoiceItem
+from apps.invoices.serializers import InvoiceCreateSerializer
+from apps.items.models import InventoryTransaction, Item, StoreInventory
+from apps.stores.models import Store
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent invoice checkouts against a few hot items and check that no stock is oversold. '
+        'Creates a throwaway company, store and items in the configured database and deletes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=50, help='Concurrent checkouts (default: 50)')
+        parser.add_argument('--checkouts', type=int, default=10, help='Checkouts per worker (default: 10)')
+        parser.add_argument('--items', type=int, default=3, help='Number of hot items (default: 3)')
+        parser.add_argument('--stock', type=int, default=100, help='Starting stock per item (default: 100)')
+        parser.add_argument('--max-quantity', type=int, default=3, help='Maximum units per invoice line (default: 3)')
+        parser.add_argument('--block-size', type=int, default=1,
+                            help="Store's invoice_number_block_size (default: 1, gapless numbering)")
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark data for inspection')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite serializes writers; run against PostgreSQL for real numbers'))
+
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            email=f'checkout-bench-{suffix}@example.com', username=f'checkout-bench-{suffix}',
+            password=uuid.uuid4().hex, role='admin'
+        )
+        company = Company.objects.create(
+            name=f'Checkout benchmark {suffix}', address='-', city='-', state='-', pincode='000000',
+            phone='0000000000', email=f'checkout-bench-{suffix}@example.com', owner=user
+        )
+        store = Store.objects.create(
+            name=f'Checkout benchmark {suffix}', address='-', city='-', state='-', pincode='000000',
+            phone='0000000000', company=company, invoice_number_block_size=options['block_size']
+        )
+        items = []
+        for index in range(options['items']):
+            item = Item.objects.create(
+                name=f'Hot item {index}', sku=f'BENCH-{suffix}-{index}', hsn_code='0000',
+                price=Decimal('10.00'), tax_rate=Decimal('18.00')
+            )
+            item.companies.add(company)
+            StoreInventory.objects.create(item=item, store=store, company=company, quantity=options['stock'])
+            items.append(item)
+
+        try:
+            # Measure checkout alone, not the PDF renders each new invoice schedules
+            with override_settings(INVOICE_PDF_BACKGROUND_RENDER=False):
+                results = self._run(user, company, store, items, options)
+            self._report(results, store, items, options)
+        finally:
+            if not options['keep']:
+                Item.objects.filter(id__in=[item.id for item in items]).delete()
+                company.delete()
+                user.delete()
+
+    def _run(self, user, company, store, items, options):
+        request = SimpleNamespace(user=user)
+        results = {'created': 0, 'insufficient': 0, 'errors': [], 'latencies': []}
+        lock = threading.Lock()
+        start_gate = threading.Barrier(options['workers'])
+
+        def checkout():
+            lines = [
+                {'item': item.id, 'quantity': random.randint(1, options['max_quantity']), 'unit_price': 10, 'tax_rate': 18}
+                for item in random.sample(items, random.randint(1, len(items)))
+            ]
+            serializer = InvoiceCreateSerializer(
+                data={'items': lines, 'company': company.id, 'store': store.id},
+                context={'request': request}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        def worker():
+            try:
+                start_gate.wait()
+                for _ in range(options['checkouts']):
+                    started = time.perf_counter()
+                    try:
+                        checkout()
+                        outcome = 'created'
+                    except serializers.ValidationError as e:
+                        outcome = 'insufficient' if 'insufficient_inventory' in str(e.detail) else e
+                    except Exception as e:
+                        outcome = e
+                    with lock:
+                        if isinstance(outcome, str):
+                            results[outcome] += 1
+                            results['latencies'].append(time.perf_counter() - started)
+                        else:
+                            results['errors'].append(outcome)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results['elapsed'] = time.perf_counter() - started
+        return results
+
+    def _report(self, results, store, items, options):
+        elapsed = results['elapsed']
+        latencies = sorted(results['latencies']) or [0]
+        self.stdout.write(
+            f"{results['created']} invoices, {results['insufficient']} rejected for stock, "
+            f"{len(results['errors'])} errors in {elapsed:.2f}s "
+            f"({results['created'] / elapsed:.1f} invoices/s, "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000:.0f} ms)"
+        )
+        for error in results['errors'][:5]:
+            self.stdout.write(self.style.WARNING(f'  {type(error).__name__}: {error}'))
+
+        oversold = []
+        for item in items:
+            inventory = StoreInventory.objects.get(item=item, store=store)
+            sold = InvoiceItem.objects.filter(
+                invoice__store=store, item=item
+            ).aggregate(total=Sum('quantity'))['total'] or Decimal('0')
+            ledger = InventoryTransaction.objects.filter(
+                inventory=inventory, transaction_type='sale'
+            ).aggregate(total=Sum('quantity'))['total'] or Decimal('0')
+            self.stdout.write(
+                f'  {item.sku}: sold {sold}, on hand {inventory.quantity} (started with {options["stock"]})'
+            )
+            if inventory.quantity < 0 or inventory.quantity != options['stock'] - sold or ledger != -sold:
+                oversold.append(item.sku)
+
+        if oversold:
+            raise CommandError(f"Stock and sales disagree for {', '.join(oversold)}")
+        self.stdout.write(self.style.SUCCESS('No oversells: on-hand stock matches invoices and ledger for every item'))
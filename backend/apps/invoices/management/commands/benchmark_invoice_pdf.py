@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.invoices.models import Invoice
+from apps.invoices.pdf_cache import INVOICE_RELATIONS
+from apps.invoices.pdf_templates import LAYOUTS, clear_pdf_templates, warm_pdf_templates
+from apps.invoices.utils import generate_invoice_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the CPU time of rendering one invoice PDF, with the layout templates rebuilt for every '
+        'render (as before they were compiled) and with the compiled templates. Reads the invoice only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoice', type=int, help='Invoice id to render (default: the latest invoice)')
+        parser.add_argument('--renders', type=int, default=50, help='Renders per layout and mode (default: 50)')
+        parser.add_argument('--layout', choices=LAYOUTS, help='Only benchmark this layout (default: both)')
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.select_related(*INVOICE_RELATIONS).prefetch_related('items__item')
+        invoice = invoices.filter(pk=options['invoice']).first() if options['invoice'] else invoices.order_by('-id').first()
+        if invoice is None:
+            raise CommandError('No invoice to render')
+
+        # Fetch the line items once, so only rendering is timed
+        list(invoice.items.all())
+        self.stdout.write(f"Invoice {invoice.invoice_number}: {len(invoice.items.all())} lines, "
+                          f"{options['renders']} renders per layout and mode")
+
+        for layout in [options['layout']] if options['layout'] else LAYOUTS:
+            cold, compiled = self._measure(invoice, layout, options['renders'])
+            saving = (cold - compiled) / cold * 100 if cold else 0
+            self.stdout.write(
+                f"  {layout}: {cold * 1000:.2f} ms CPU per PDF rebuilding templates, "
+                f"{compiled * 1000:.2f} ms with compiled templates ({saving:.1f}% saved)"
+            )
+
+        warm_pdf_templates()
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _measure(self, invoice, layout, renders):
+        """
+        Median process CPU seconds per render, rebuilding the templates and compiled.
+
+        The two modes alternate, so drift in machine load affects both alike.
+        """
+        warm_pdf_templates()
+        generate_invoice_pdf(invoice, layout=layout)  # Warm-up (fonts, imports)
+
+        cold, compiled = [], []
+        for _ in range(renders):
+            clear_pdf_templates()
+            started = time.process_time()
+            generate_invoice_pdf(invoice, layout=layout)
+            cold.append(time.process_time() - started)
+
+            started = time.process_time()
+            generate_invoice_pdf(invoice, layout=layout)
+            compiled.append(time.process_time() - started)
+        return statistics.median(cold), statistics.median(compiled)
@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.invoices.models import Invoice
+from apps.invoices.pdf_cache import INVOICE_RELATIONS
+from apps.invoices.pdf_canvas import render_traditional_invoice
+from apps.invoices.pdf_templates import warm_pdf_templates
+from apps.invoices.utils import generate_invoice_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the CPU time of rendering a traditional layout invoice PDF with the platypus renderer and the '
+        'canvas renderer, on copies of one invoice grown to 10, 100 and 1,000 lines in memory. Reads the invoice only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoice', type=int, help='Invoice id to render (default: the latest invoice)')
+        parser.add_argument('--lines', type=int, nargs='+', default=[10, 100, 1000],
+                            help='Line item counts to render (default: 10 100 1000)')
+        parser.add_argument('--renders', type=int, default=20, help='Renders per renderer and size (default: 20)')
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.select_related(*INVOICE_RELATIONS).prefetch_related('items__item')
+        invoice = invoices.filter(pk=options['invoice']).first() if options['invoice'] else invoices.order_by('-id').first()
+        if invoice is None:
+            raise CommandError('No invoice to render')
+        lines = list(invoice.items.all())
+        if not lines:
+            raise CommandError(f'Invoice {invoice.invoice_number} has no line items')
+
+        self.stdout.write(f"Invoice {invoice.invoice_number}, traditional layout, {options['renders']} renders "
+                          f"per renderer and size")
+        warm_pdf_templates()
+
+        for count in options['lines']:
+            # Repeat the invoice's lines in memory; nothing is written
+            invoice._prefetched_objects_cache['items'] = [lines[index % len(lines)] for index in range(count)]
+            platypus, platypus_size = self._measure(lambda: generate_invoice_pdf(invoice, layout='traditional'),
+                                                    options['renders'])
+            fast, fast_size = self._measure(lambda: render_traditional_invoice(invoice), options['renders'])
+            speedup = platypus / fast if fast else 0
+            self.stdout.write(
+                f"  {count} lines: platypus {platypus * 1000:.1f} ms CPU per PDF ({platypus_size // 1024} KB), "
+                f"canvas {fast * 1000:.1f} ms ({fast_size // 1024} KB), {speedup:.1f}x faster"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _measure(self, render, renders):
+        """Median process CPU seconds per render, and the PDF size in bytes"""
+        output = render()  # Warm-up (fonts, images)
+        size = output.seek(0, 2)
+        samples = []
+        for _ in range(renders):
+            started = time.process_time()
+            render()
+            samples.append(time.process_time() - started)
+        return statistics.median(samples), size
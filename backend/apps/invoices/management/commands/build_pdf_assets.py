@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.companies.models import Company
+from apps.invoices.pdf_assets import build_print_assets
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the pre-scaled PDF copies of company logos and signatures. New uploads get them automatically; '
+        'run this once for companies that uploaded before, or after changing INVOICE_PDF_IMAGE_DPI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', help='Only this company id (repeatable)')
+
+    def handle(self, *args, **options):
+        companies = Company.objects.exclude(
+            (Q(logo__isnull=True) | Q(logo='')) & (Q(authorized_signature__isnull=True) | Q(authorized_signature=''))
+        ).order_by('id')
+        if options['company']:
+            companies = companies.filter(id__in=options['company'])
+
+        updated = 0
+        for company in companies.iterator():
+            changes = build_print_assets(company)
+            if changes:
+                updated += 1
+                self.stdout.write(f"  {company.name}: {', '.join(sorted(changes))}")
+
+        self.stdout.write(self.style.SUCCESS(f'Updated print assets of {updated} companies'))
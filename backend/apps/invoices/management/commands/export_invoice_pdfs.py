@@ -0,0 +1,69 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.invoices.models import Invoice
+from apps.invoices.pdf_export import filter_export_invoices, iter_invoice_pdf_zip
+from apps.invoices.render_pool import new_render_pool
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the PDFs of the matching invoices to a ZIP file, rendering missing or stale PDFs in a process pool '
+        '(one per CPU by default) and reusing cached ones. Unlike the export download, it has no size limit.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='ZIP file to write')
+        parser.add_argument('--company', type=int, help='Only invoices of this company id')
+        parser.add_argument('--store', type=int, help='Only invoices of this store id')
+        parser.add_argument('--status', choices=[choice for choice, _ in Invoice.INVOICE_STATUS])
+        parser.add_argument('--from', dest='date_from', help='First invoice date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last invoice date (YYYY-MM-DD)')
+        parser.add_argument('--financial-year', help='Financial year, e.g. 2024-25')
+        parser.add_argument('--workers', type=int, help='Render processes (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.all()
+        if options['company']:
+            invoices = invoices.filter(company_id=options['company'])
+        try:
+            invoices = filter_export_invoices(
+                invoices,
+                store=options['store'],
+                status=options['status'],
+                date_from=self._date(options['date_from']),
+                date_to=self._date(options['date_to']),
+                financial_year=options['financial_year']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not invoices.exists():
+            raise CommandError('No invoices match')
+
+        workers = options['workers'] or os.cpu_count() or 1
+        with new_render_pool(workers) as pool, open(options['output'], 'wb') as output:
+            for chunk in iter_invoice_pdf_zip(invoices, progress=self._report, pool=pool, workers=workers):
+                output.write(chunk)
+
+        progress = self.progress
+        if progress['failed']:
+            self.stderr.write(f"{progress['failed']} invoices could not be rendered; see errors.txt in the archive")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {progress['done'] - progress['failed']} PDFs to {options['output']} "
+            f"({progress['cached']} cached, {progress['rendered']} rendered)"
+        ))
+
+    def _date(self, value):
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(f'{value} is not a YYYY-MM-DD date')
+        return parsed
+
+    def _report(self, progress):
+        self.progress = progress
+        if progress['state'] == 'running':
+            self.stdout.write(f"  {progress['done']}/{progress['total']} invoices")
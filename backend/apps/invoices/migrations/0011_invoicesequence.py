@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0007_store_invoice_number_block_size'),
+        ('invoices', '0010_remove_customer_customer_name_company_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10)),
+                ('period', models.CharField(blank=True, default='', max_length=16)),
+                ('last_number', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_sequences', to='stores.store')),
+            ],
+            options={
+                'db_table': 'invoice_sequences',
+                'unique_together': {('store', 'prefix', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0011_invoicesequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_cache_key',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
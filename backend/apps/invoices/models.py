@@ -116,6 +116,8 @@ class Invoice(models.Model):
     amount_in_words = models.CharField(max_length=500, blank=True, null=True)
     
     pdf_file = models.FileField(upload_to='invoices/', blank=True, null=True)
+    # Key of the rendering stored in pdf_file (see apps.invoices.pdf_cache)
+    pdf_cache_key = models.CharField(max_length=40, blank=True, default='')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -128,7 +130,7 @@ class Invoice(models.Model):
     def generate_invoice_number(self):
         import re
         from datetime import datetime
-        from django.db.models import Max
+        from .sequences import next_invoice_sequence
         from .utils import get_financial_year, get_fy_date_range
 
         # Get user settings for invoice numbering
@@ -159,55 +161,34 @@ class Invoice(models.Model):
             invoice_filter['invoice_date__year'] = invoice_date.year
             invoice_filter['invoice_date__month'] = invoice_date.month
 
-        # Build expected invoice number pattern for sequence extraction
-        pattern_parts = [re.escape(prefix), re.escape(store_code)]
-        if date_component:
-            pattern_parts.append(re.escape(date_component))
-        pattern_parts.append(r'(\d+)')  # Capture sequence number
-        pattern = re.escape(separator).join(pattern_parts) + '$'
-
-        # Get most recent invoice matching the pattern
-        max_sequence = 0
-        recent_invoices = Invoice.objects.filter(**invoice_filter).values_list('invoice_number', flat=True)[:100]
-
-        for invoice_number in recent_invoices:
-            match = re.match(pattern, invoice_number)
-            if match:
-                try:
-                    sequence = int(match.group(1))
-                    max_sequence = max(max_sequence, sequence)
-                except (ValueError, IndexError):
-                    continue
-
-        new_sequence = max_sequence + 1
-
-        # Build invoice number dynamically based on settings
-        max_attempts = 10
-        for attempt in range(max_attempts):
-            # Format sequence with dynamic padding
-            sequence_str = f"{new_sequence:0{padding}d}"
-
-            # Build invoice number parts
-            parts = [prefix, store_code]
+        def highest_existing_sequence():
+            """Highest sequence already issued in this period, so a new counter continues after it"""
+            pattern_parts = [re.escape(prefix), re.escape(store_code)]
             if date_component:
-                parts.append(date_component)
-            parts.append(sequence_str)
-
-            invoice_number = separator.join(parts)
-
-            # Check if this number already exists
-            if not Invoice.objects.filter(invoice_number=invoice_number).exists():
-                return invoice_number
-
-            # If it exists, increment and try again
-            new_sequence += 1
-
-        # Ultimate fallsafe - use timestamp
-        timestamp = int(datetime.now().timestamp())
+                pattern_parts.append(re.escape(date_component))
+            pattern_parts.append(r'(\d+)')  # Capture sequence number
+            pattern = re.compile(re.escape(separator).join(pattern_parts) + '$')
+
+            max_sequence = 0
+            numbers = Invoice.objects.filter(**invoice_filter).values_list('invoice_number', flat=True)
+            for invoice_number in numbers.iterator():
+                match = pattern.match(invoice_number)
+                if match:
+                    max_sequence = max(max_sequence, int(match.group(1)))
+            return max_sequence
+
+        # One counter update per number (or per block of numbers for busy stores)
+        sequence = next_invoice_sequence(
+            self.store, prefix, date_component or '',
+            seed=highest_existing_sequence,
+            block_size=self.store.invoice_number_block_size
+        )
+
+        # Build invoice number parts
         parts = [prefix, store_code]
         if date_component:
             parts.append(date_component)
-        parts.append(str(timestamp))
+        parts.append(f"{sequence:0{padding}d}")
         return separator.join(parts)
     
     def calculate_totals(self, items=None):
@@ -415,4 +396,28 @@ class InvoiceItem(models.Model):
         return f"{self.item.name} x {self.quantity}"
     
     class Meta:
-        db_table = 'invoice_items'
\ No newline at end of file
+        db_table = 'invoice_items'
+
+
+class InvoiceSequence(models.Model):
+    """
+    Last invoice number issued per store, prefix and numbering period (financial
+    year, YYYYMM, or '' when numbering never resets). Incremented by
+    apps.invoices.sequences in the transaction that saves the invoice.
+    """
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name='invoice_sequences'
+    )
+    prefix = models.CharField(max_length=10)
+    period = models.CharField(max_length=16, blank=True, default='')
+    last_number = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.prefix} {self.store_id} {self.period or '-'}: {self.last_number}"
+
+    class Meta:
+        db_table = 'invoice_sequences'
+        unique_together = ['store', 'prefix', 'period']
@@ -0,0 +1,205 @@
+"""
+Company logo and signature images prepared for invoice PDFs.
+
+Uploads can be multi-megabyte phone photos, while a PDF only shows them in a
+40 mm box. When a logo or signature is uploaded, a print copy is made:
+EXIF-rotated, flattened onto white, downscaled to its box at
+INVOICE_PDF_IMAGE_DPI and saved as JPEG, which ReportLab embeds as-is instead
+of re-compressing. It is stored in ``Company.logo_print`` /
+``Company.authorized_signature_print`` under a name carrying its content hash.
+
+Renders draw the print copy through a per-process ImageReader cache keyed by
+that name, so an image is read once per process, not once per PDF. A company without a print copy (an upload from before this pipeline,
+until ``build_pdf_assets`` runs, or an image that could not be read) is
+rendered from the original upload as before.
+"""
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image as PILImage, ImageOps
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image
+
+from apps.companies.models import Company
+from .pdf_templates import LOGO_SIZE, SIGNATURE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Upload field -> (print copy field, box it is drawn into, how it is fitted to the box)
+PRINT_ASSETS = {
+    'logo': ('logo_print', LOGO_SIZE, 'proportional'),
+    'authorized_signature': ('authorized_signature_print', SIGNATURE_SIZE, 'direct'),
+}
+
+JPEG_QUALITY = 90
+READER_CACHE_SIZE = 256
+
+_readers = OrderedDict()
+_readers_lock = threading.Lock()
+
+
+class PrintImageReader(ImageReader):
+    """
+    An ImageReader over JPEG bytes, shareable between threads.
+
+    ReportLab embeds a JPEG's stream as-is, read through ``jpeg_fh()``, so the
+    pixels are never decoded; only the size is read up front. Every
+    ``jpeg_fh()`` call gets its own stream over the same bytes, so concurrent
+    renders do not share a file position.
+    """
+
+    def __init__(self, data, name):
+        super().__init__(io.BytesIO(data), ident=name)
+        self._jpeg_bytes = data
+        self._dataA = None
+        self.getSize()
+
+    def getRGBData(self):
+        # canvas.drawImage only hashes this to name the image; the JPEG bytes identify it as well
+        return self._jpeg_bytes
+
+    def _jpeg_fh(self):
+        return io.BytesIO(self._jpeg_bytes)
+
+
+class PrintImage(Image):
+    """A platypus Image drawn from a (cached) PrintImageReader"""
+
+    def __init__(self, reader, width, height, kind='direct'):
+        self.hAlign = 'CENTER'
+        self._mask = 'auto'
+        self._drawing = None
+        self._file = None
+        self.filename = reader.identity()
+        self._img = reader
+        self._dpi = False
+        self._setup(width, height, kind, 0)
+
+
+def _pixel_size(size):
+    dpi = getattr(settings, 'INVOICE_PDF_IMAGE_DPI', 300)
+    return max(1, round(size[0] / inch * dpi)), max(1, round(size[1] / inch * dpi))
+
+
+def prepare_print_image(source, size, kind):
+    """
+    Downscale an uploaded image for a PDF box.
+
+    Args:
+        source: Readable binary file with the upload
+        size: (width, height) of the box in points
+        kind: 'proportional' (fit inside the box) or 'direct' (stretched to it)
+
+    Returns:
+        bytes: JPEG data, never larger than the box at INVOICE_PDF_IMAGE_DPI
+    """
+    max_width, max_height = _pixel_size(size)
+    with PILImage.open(source) as image:
+        # Let the JPEG decoder scale down while decoding (either orientation)
+        image.draft('RGB', (max(max_width, max_height),) * 2)
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            # PDFs show these on white; flattening keeps their look without an alpha mask
+            image = image.convert('RGBA')
+            background = PILImage.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        if kind == 'proportional':
+            image.thumbnail((max_width, max_height), PILImage.LANCZOS)
+        elif image.width > max_width or image.height > max_height:
+            # Drawn stretched to the box anyway, so each axis is capped on its own
+            image = image.resize((min(image.width, max_width), min(image.height, max_height)), PILImage.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def build_print_assets(company, fields=None):
+    """
+    (Re)build a company's print copies from its current uploads.
+
+    The print fields are updated without ``save()``; callers saving the
+    company (or the upload itself) have already moved ``updated_at``, which
+    invalidates the cached invoice PDFs.
+
+    Args:
+        company: Company instance
+        fields: Upload fields to process (default: logo and signature)
+
+    Returns:
+        dict: print field -> new file name ('' when cleared)
+    """
+    changes = {}
+    for field in fields or PRINT_ASSETS:
+        print_field, size, kind = PRINT_ASSETS[field]
+        upload = getattr(company, field)
+        current = getattr(company, print_field)
+        previous = current.name or ''
+
+        name = ''
+        if upload:
+            try:
+                with upload.storage.open(upload.name, 'rb') as source:
+                    data = prepare_print_image(source, size, kind)
+            except Exception:
+                logger.warning(f"Could not prepare {field} of company {company.pk} for PDFs", exc_info=True)
+            else:
+                digest = hashlib.sha1(data).hexdigest()[:16]
+                name = current.field.generate_filename(company, f"{company.pk}-{digest}.jpg")
+                if not current.storage.exists(name):
+                    name = current.storage.save(name, ContentFile(data))
+
+        if name != previous:
+            Company.objects.filter(pk=company.pk).update(**{print_field: name or None})
+            setattr(company, print_field, name or None)
+            if previous:
+                current.storage.delete(previous)
+            changes[print_field] = name
+    return changes
+
+
+def _reader(fieldfile):
+    name = fieldfile.name
+    with _readers_lock:
+        reader = _readers.get(name)
+        if reader is not None:
+            _readers.move_to_end(name)
+            return reader
+
+    with fieldfile.storage.open(name, 'rb') as f:
+        reader = PrintImageReader(f.read(), name)
+
+    with _readers_lock:
+        _readers[name] = reader
+        while len(_readers) > READER_CACHE_SIZE:
+            _readers.popitem(last=False)
+    return reader
+
+
+def print_image(company, field):
+    """
+    Flowable drawing a company's print copy of ``field`` in its PDF box.
+
+    Returns:
+        PrintImage, or None if the company has no print copy of it
+    """
+    print_field, size, kind = PRINT_ASSETS[field]
+    fieldfile = getattr(company, print_field)
+    if not fieldfile:
+        return None
+    try:
+        reader = _reader(fieldfile)
+    except FileNotFoundError:
+        return None
+    return PrintImage(reader, *size, kind=kind)
@@ -0,0 +1,162 @@
+"""
+Rendered invoice PDF cache.
+
+A rendered PDF is stored in ``Invoice.pdf_file`` together with the key it was
+rendered for (``pdf_cache_key``): a hash of the renderer version, the layout,
+the renderer and the ``updated_at`` of the invoice, its company (name,
+address, logo, signature, bank details) and its customer. Any edit to those,
+or a change of the layout or renderer preference, changes the key, so the
+stored file stops matching and the next download or background render
+replaces it.
+
+Invoices are rendered in the background after every save (on commit), in
+the render processes of render_pool, so downloads are usually served
+straight from storage. A download that finds no matching file renders it in
+the request and stores it.
+"""
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Invoice
+from .pdf_canvas import render_traditional_invoice
+from .render_pool import submit_render
+from .utils import generate_invoice_pdf
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF output changes, so stored files are re-rendered
+RENDERER_VERSION = 2
+
+INVOICE_RELATIONS = ('company', 'customer', 'store', 'created_by__created_by')
+
+_queued_lock = threading.Lock()
+_queued = {}  # Invoice id -> Future of its background render
+
+
+def invoice_layout(invoice):
+    """PDF layout for an invoice: the creating admin's preference (a store user's admin's)"""
+    creator = invoice.created_by
+    if not creator:
+        # Fallback (should never happen due to CASCADE)
+        return 'classic'
+    if creator.role == 'store_user' and creator.created_by:
+        return getattr(creator.created_by, 'invoice_layout_preference', 'classic')
+    return getattr(creator, 'invoice_layout_preference', 'classic')
+
+
+def invoice_renderer(invoice, layout):
+    """PDF renderer for an invoice: its store's choice, for the layouts the canvas renderer draws"""
+    if layout == 'traditional' and invoice.store.invoice_pdf_renderer == 'canvas':
+        return 'canvas'
+    return 'platypus'
+
+
+def render_invoice_pdf(invoice, layout):
+    """
+    Render an invoice's PDF with its store's renderer.
+
+    Returns:
+        SpooledTemporaryFile: The rendered PDF
+    """
+    if invoice_renderer(invoice, layout) == 'canvas':
+        return render_traditional_invoice(invoice)
+    return generate_invoice_pdf(invoice, layout=layout)
+
+
+def pdf_cache_key(invoice, layout):
+    parts = [
+        str(RENDERER_VERSION),
+        layout,
+        invoice_renderer(invoice, layout),
+        invoice.updated_at.isoformat(),
+        invoice.company.updated_at.isoformat(),
+        invoice.customer.updated_at.isoformat() if invoice.customer_id else '-',
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def cached_pdf(invoice, layout):
+    """The stored PDF opened for reading, or None if it is missing or stale"""
+    if not invoice.pdf_file or invoice.pdf_cache_key != pdf_cache_key(invoice, layout):
+        return None
+    try:
+        return invoice.pdf_file.storage.open(invoice.pdf_file.name, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+def render_and_store(invoice, layout):
+    """
+    Render an invoice's PDF and store it as its ``pdf_file``.
+
+    The row is updated without ``save()``, so ``updated_at`` (part of the key)
+    does not change, and only if no concurrent render replaced the file
+    first. The file it replaces is deleted, and so is the file it saved if a
+    concurrent render won. The PDF is copied to storage in
+    chunks from the (possibly disk-spooled) render output.
+
+    Returns:
+        SpooledTemporaryFile: The rendered PDF, positioned at the start
+    """
+    key = pdf_cache_key(invoice, layout)
+    buffer = render_invoice_pdf(invoice, layout)
+
+    name = f"invoices/{invoice.pk}/{layout}-{key[:16]}.pdf"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, File(buffer))
+
+    previous = invoice.pdf_file.name or None
+    unchanged = Q(pdf_file=previous) if previous else Q(pdf_file__isnull=True) | Q(pdf_file='')
+    if Invoice.objects.filter(unchanged, pk=invoice.pk).update(pdf_file=name, pdf_cache_key=key):
+        invoice.pdf_file.name, invoice.pdf_cache_key = name, key
+        if previous and previous != name:
+            default_storage.delete(previous)
+    elif not Invoice.objects.filter(pk=invoice.pk, pdf_file=name).exists():
+        default_storage.delete(name)
+
+    buffer.seek(0)
+    return buffer
+
+
+def _render_job(invoice_id):
+    """Render an invoice's PDF in a render process unless its stored file is current"""
+    try:
+        invoice = Invoice.objects.select_related(*INVOICE_RELATIONS).get(pk=invoice_id)
+        layout = invoice_layout(invoice)
+        if invoice.pdf_cache_key != pdf_cache_key(invoice, layout) or not invoice.pdf_file:
+            render_and_store(invoice, layout)
+    except Invoice.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception(f"Background PDF render failed for invoice {invoice_id}")
+    finally:
+        connection.close()
+
+
+def schedule_render(invoice_id):
+    """Render an invoice's PDF in the background once the current transaction commits"""
+    if not getattr(settings, 'INVOICE_PDF_BACKGROUND_RENDER', True):
+        return
+
+    def forget(future):
+        with _queued_lock:
+            if _queued.get(invoice_id) is future:
+                del _queued[invoice_id]
+
+    def submit():
+        with _queued_lock:
+            # A render not yet handed to a process will read this save; one already running may not
+            queued = _queued.get(invoice_id)
+            if queued is not None and not queued.running() and not queued.done():
+                return
+            future = _queued[invoice_id] = submit_render(_render_job, invoice_id)
+        future.add_done_callback(forget)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,666 @@
+"""
+Fast renderer for the traditional invoice layout.
+
+generate_invoice_pdf builds the invoice from platypus flowables (nested
+Tables, Paragraph markup, KeepTogether), whose layout passes dominate render
+time. This module draws the same traditional layout straight onto a canvas:
+every section is placed at coordinates computed here with platypus' own rules
+(frame padding, cell paddings, table leading, paragraph baselines), so the
+page looks the same, and line items are paginated here with the header row
+repeated on each page.
+
+Stores choose it with ``Store.invoice_pdf_renderer = 'canvas'``; invoices in
+the classic layout are always rendered by generate_invoice_pdf.
+"""
+import os
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Image
+
+from .pdf_assets import print_image
+from .pdf_templates import LOGO_SIZE, SIGNATURE_SIZE, get_pdf_template
+from .utils import format_indian_currency, invoice_item_rows, pdf_output
+
+REGULAR = 'Helvetica'
+BOLD = 'Helvetica-Bold'
+
+# Platypus geometry the layout depends on: tables and paragraphs use leading 12
+# (FONTSIZE never changes a table's leading) and frames are padded by 6pt.
+LEADING = 12
+FRAME_PADDING = 6
+FUZZ = 1e-6
+
+# Tax summary rows: leading + 2/2 padding; amount detail rows: leading + 3/2 padding
+TAX_SUMMARY_ROW = LEADING + 4
+AMOUNT_ROW = LEADING + 5
+
+# Table rules are drawn with round caps, as platypus does
+LINE_CAP = 1
+
+# Paragraph lets a line overrun its width by this share of its spaces' width, then narrows the spaces
+SPACE_SHRINKAGE = 0.05
+
+
+def _wrap(runs, width, size):
+    """
+    Break one paragraph line into lines for ``width``, as Paragraph does.
+
+    Args:
+        runs: List of (text, font name); whitespace is collapsed as in markup
+        width: Available width in points
+        size: Font size
+
+    Returns:
+        list: Lines as (list of (word, font name), natural width)
+    """
+    lines, line, line_width, spaces = [], [], 0, 0
+    for text, font in runs:
+        for word in str(text).split():
+            word_width = stringWidth(word, font, size)
+            space = stringWidth(' ', line[-1][1], size) if line else 0
+            if line and line_width + space + word_width > width + SPACE_SHRINKAGE * (spaces + space):
+                lines.append((line, line_width))
+                line, line_width, spaces, space = [], 0, 0, 0
+            line.append((word, font))
+            line_width += space + word_width
+            spaces += space
+    if line or not lines:
+        lines.append((line, line_width))
+    return lines
+
+
+def _paragraph(lines, width, size):
+    """Wrap explicit (``<br/>``-separated) lines of runs"""
+    wrapped = []
+    for runs in lines:
+        wrapped.extend(_wrap(runs, width, size))
+    return wrapped
+
+
+def _draw_paragraph(c, lines, x, top, width, size, align='left', color=colors.black):
+    """Draw wrapped lines with the first baseline ``size`` below ``top``; returns the height used"""
+    text = c.beginText()
+    text.setFillColor(color)
+    y = top - size
+    for words, line_width in lines:
+        offset = (width - line_width) / 2.0 if align == 'center' else 0
+        # An overrunning line is fitted by narrowing its spaces
+        word_space = (width - line_width) / (len(words) - 1) if line_width > width and len(words) > 1 else 0
+        if word_space:
+            offset = 0
+        text.setTextOrigin(x + offset, y)
+        text.setWordSpace(word_space)
+        font = None
+        for index, (word, word_font) in enumerate(words):
+            if word_font != font:
+                text.setFont(word_font, size, LEADING)
+                font = word_font
+            text.textOut(word if index == 0 else ' ' + word)
+        y -= LEADING
+    text.setWordSpace(0)
+    c.drawText(text)
+    return len(lines) * LEADING
+
+
+def _cell_text(c, text, left, width, baseline, align, left_padding, right_padding):
+    """One table string cell line, positioned as Table._drawCell does"""
+    if align == 'CENTER':
+        c.drawCentredString(left + (width + left_padding - right_padding) * 0.5, baseline, text)
+    elif align == 'RIGHT':
+        c.drawRightString(left + width - right_padding, baseline, text)
+    else:
+        c.drawString(left + left_padding, baseline, text)
+
+
+def _draw_cells(c, rows, anchors, aligns, font, size):
+    """
+    Draw rows of table string cells through a single text object.
+
+    drawString and friends open a text object per string, which is most of the
+    cost of a long items table; here each row sets the text origin once and
+    moves between its cells.
+
+    Args:
+        rows: (baseline, cell strings) per row
+        anchors: x each column's strings start, centre or end at, as in _cell_text
+        aligns: 'LEFT', 'CENTER' or 'RIGHT' per column
+    """
+    text = c.beginText()
+    text.setFont(font, size)
+    for baseline, cells in rows:
+        previous = None
+        for anchor, align, value in zip(anchors, aligns, cells):
+            x = anchor
+            if align == 'CENTER':
+                x -= stringWidth(value, font, size) * 0.5
+            elif align == 'RIGHT':
+                x -= stringWidth(value, font, size)
+            if previous is None:
+                text.setTextOrigin(x, baseline)
+            else:
+                text.moveCursor(x - previous, 0)
+            text.textOut(value)
+            previous = x
+    c.drawText(text)
+
+
+def _grid(c, left, top, widths, heights, line_width, color=colors.black):
+    xs = [left]
+    for width in widths:
+        xs.append(xs[-1] + width)
+    ys = [top]
+    for height in heights:
+        ys.append(ys[-1] - height)
+    c.saveState()
+    c.setLineCap(LINE_CAP)
+    c.setLineWidth(line_width)
+    c.setStrokeColor(color)
+    c.grid(xs, ys)
+    c.restoreState()
+
+
+class _Page:
+    """Vertical cursor over the frame of the current page"""
+
+    def __init__(self, c, template):
+        self.c = c
+        page_width, page_height = template.page_size
+        self.frame_x = template.margin + FRAME_PADDING
+        self.frame_width = page_width - 2 * (template.margin + FRAME_PADDING)
+        self.top = page_height - template.margin - FRAME_PADDING
+        self.bottom = template.margin + FRAME_PADDING
+        self.y = self.top
+        self.space_after = 0
+
+    @property
+    def at_top(self):
+        return self.y >= self.top
+
+    def fits(self, height):
+        return self.y - height >= self.bottom - FUZZ
+
+    def table_left(self, width):
+        """Left edge of a table of ``width``: tables are centred on the frame, even when wider"""
+        return self.frame_x + (self.frame_width - width) / 2.0
+
+    def new_page(self):
+        self.c.showPage()
+        self.y = self.top
+        self.space_after = 0
+
+    def place(self, height, space_after=0):
+        """
+        Reserve ``height`` for the next flowable, on a new page if it does not fit.
+
+        Returns:
+            float: Top y of the reserved space
+        """
+        gap = 0 if self.at_top else self.space_after
+        if not self.fits(gap + height) and not self.at_top:
+            self.new_page()
+            gap = 0
+        top = self.y - gap
+        self.y = top - height
+        self.space_after = space_after
+        return top
+
+    def place_rows(self, heights):
+        """
+        Reserve a table's rows, splitting it between rows across pages as platypus does.
+
+        Yields (top y, first row, row count) for each page the table is on; the
+        caller draws that part before the next is reserved on a new page.
+        """
+        start = 0
+        while start < len(heights):
+            available = self.y - (0 if self.at_top else self.space_after) - self.bottom + FUZZ
+            count, used = 0, 0
+            for height in heights[start:]:
+                if used + height > available:
+                    break
+                count, used = count + 1, used + height
+            if not count:
+                if not self.at_top:
+                    self.new_page()
+                    continue
+                count = 1
+            yield self.place(sum(heights[start:start + count])), start, count
+            start += count
+            if start < len(heights):
+                self.new_page()
+
+    def spacer(self, height):
+        # A Spacer absorbs the previous flowable's spaceAfter, like any flowable
+        self.place(height)
+
+
+class TraditionalCanvasRenderer:
+    """Renders one invoice in the traditional layout; see the module docstring"""
+
+    def __init__(self, invoice):
+        self.invoice = invoice
+        self.company = invoice.company
+        self.template = get_pdf_template('traditional')
+
+    def render(self):
+        buffer = pdf_output()
+        c = canvas.Canvas(buffer, pagesize=self.template.page_size)
+        page = _Page(c, self.template)
+
+        self._logo(page)
+        self._title(page)
+        self._supplier(page)
+        page.spacer(2*mm)
+        self._customer(page)
+        page.spacer(3*mm)
+        self._items(page)
+        page.spacer(3*mm)
+        self._totals(page)
+        self._details(page)
+        self._footer(page)
+
+        c.showPage()
+        c.save()
+        buffer.seek(0)
+        return buffer
+
+    # Header
+
+    def _logo(self, page):
+        company = self.company
+        if not company.logo:
+            return
+        try:
+            logo = print_image(company, 'logo')
+            if logo is None:
+                logo_path = os.path.join(settings.MEDIA_ROOT, str(company.logo))
+                if not os.path.exists(logo_path):
+                    return
+                logo = Image(logo_path, width=LOGO_SIZE[0], height=LOGO_SIZE[1], kind='proportional')
+            width, height = logo.drawWidth, logo.drawHeight
+            top = page.place(height)
+            logo.drawOn(page.c, page.frame_x + (page.frame_width - width) / 2.0, top - height)
+        except Exception:
+            # If logo fails to load, continue without it
+            return
+        page.spacer(3*mm)
+
+    def _title(self, page):
+        c, template = page.c, self.template
+        top = page.place(LEADING, space_after=3*mm)
+        c.setFillColor(template.header_color)
+        c.rect(page.frame_x, top - LEADING, page.frame_width, LEADING, stroke=0, fill=1)
+        _draw_paragraph(c, _paragraph([[('TAX INVOICE', BOLD)]], page.frame_width, 16), page.frame_x, top, page.frame_width, 16,
+                        align='center', color=colors.white)
+
+        top = page.place(2 * LEADING, space_after=3*mm)
+        subtitle = _paragraph([[('(Original for Recipient)', REGULAR)], [('As per GST Rules 2017', REGULAR)]],
+                              page.frame_width, 8)
+        _draw_paragraph(c, subtitle, page.frame_x, top, page.frame_width, 8, align='center')
+
+    def _supplier(self, page):
+        c, invoice, company = page.c, self.invoice, self.company
+        widths = [100*mm, 80*mm]
+        supplier = _paragraph([
+            [('Details of Supplier (Billed From):', BOLD)],
+            [(company.name, BOLD)],
+            [(company.address, REGULAR)],
+            [(f"{company.city}, {company.state} - {company.pincode}", REGULAR)],
+            [(f"Email: {company.email}", REGULAR)],
+            [(f"Phone: {company.phone}", REGULAR)],
+        ], widths[0] - 10, 8)
+
+        details = [
+            ('Invoice No.:', invoice.invoice_number),
+            ('Invoice Date:', invoice.invoice_date.strftime('%d/%m/%Y')),
+            ('Due Date:', invoice.due_date.strftime('%d/%m/%Y') if invoice.due_date else 'N/A'),
+            ('Place of Supply:', invoice.place_of_supply or company.state),
+            ('Reverse Charge:', invoice.reverse_charge),
+        ]
+        gst = [
+            ('GSTIN:', company.gstin),
+            ('PAN:', company.pan),
+            ('State:', company.state),
+            ('State Code:', getattr(company, 'state_code', '10')),
+        ]
+        # Nested tables: leading 12 plus 3/1 (details) and 1/1 (GST) top/bottom padding per row
+        details_row, gst_row = LEADING + 4, LEADING + 2
+        heights = [max(len(supplier) * LEADING, len(details) * details_row) + 10, len(gst) * gst_row + 10]
+
+        top = page.place(sum(heights))
+        left = page.table_left(sum(widths))
+        _draw_paragraph(c, supplier, left + 5, top - 5, widths[0] - 10, 8)
+
+        x = left + widths[0] + 5
+        y = top - 5
+        for label, value in details:
+            c.setFont(BOLD, 8)
+            c.drawString(x + 6, y - 3 - 8, label)
+            c.setFont(REGULAR, 8)
+            c.drawString(x + 30*mm + 6, y - 3 - 8, str(value))
+            y -= details_row
+
+        x = left + 5
+        y = top - heights[0] - 5
+        for label, value in gst:
+            c.setFont(BOLD, 8)
+            c.drawString(x + 2, y - 1 - 8, label)
+            c.setFont(REGULAR, 8)
+            c.drawString(x + 20*mm + 2, y - 1 - 8, str(value))
+            y -= gst_row
+        _grid(c, x, top - heights[0] - 5, [20*mm, 40*mm], [gst_row] * len(gst), 0.5)
+
+        _grid(c, left, top, widths, heights, 1)
+
+    def _customer(self, page):
+        c, invoice = page.c, self.invoice
+        customer = invoice.customer
+        billing_addr = invoice.billing_address if invoice.billing_address and invoice.billing_address.strip() else customer.address
+        billing_city = invoice.billing_city if invoice.billing_city and invoice.billing_city.strip() else customer.city
+        billing_state = invoice.billing_state if invoice.billing_state and invoice.billing_state.strip() else customer.state
+        billing_pincode = invoice.billing_pincode if invoice.billing_pincode and invoice.billing_pincode.strip() else customer.pincode
+
+        contact = [[('Phone:', BOLD), (f" {customer.phone}", REGULAR)]]
+        if customer.email:
+            contact.append([('Email:', BOLD), (f" {customer.email}", REGULAR)])
+        if customer.gstin:
+            contact.append([('GSTIN:', BOLD), (f" {customer.gstin}", REGULAR)])
+
+        widths = [130*mm, 50*mm]
+        info = _paragraph([
+            [('Details of Receiver (Billed To):', BOLD)],
+            [('Name:', BOLD), (f" {customer.name}", REGULAR)],
+            [('Address:', BOLD), (f" {billing_addr}", REGULAR)],
+            [(f"{billing_city}, {billing_state} - {billing_pincode}", REGULAR)],
+        ], widths[0] - 10, 8)
+        contact = _paragraph(contact, widths[1] - 10, 8)
+        height = max(len(info), len(contact)) * LEADING + 10
+
+        top = page.place(height)
+        left = page.table_left(sum(widths))
+        _draw_paragraph(c, info, left + 5, top - 5, widths[0] - 10, 8)
+        _draw_paragraph(c, contact, left + widths[0] + 5, top - 5, widths[1] - 10, 8)
+        _grid(c, left, top, widths, [height], 1)
+
+    # Line items
+
+    def _items(self, page):
+        """Items table, split across pages by row with the header repeated, like Table(repeatRows=1)"""
+        c, template = page.c, self.template
+        widths = template.items_widths
+        left = page.table_left(sum(widths))
+        lefts = [left]
+        for width in widths[:-1]:
+            lefts.append(lefts[-1] + width)
+        # Item names are left-aligned, everything else centred; cells have 2/2 padding
+        aligns = ['CENTER'] * len(widths)
+        aligns[1] = 'LEFT'
+        centred = [cell_left + width * 0.5 for cell_left, width in zip(lefts, widths)]
+        anchors = list(centred)
+        anchors[1] = lefts[1] + 2
+        # Strings are vertically centred: 7pt type on leading 12, 2/2 padding
+        row_height = template.items_row_height
+        baseline = (2 + row_height - 2 + LEADING) / 2.0 - 7
+
+        # Rows are read one page at a time, so memory does not grow with the invoice
+        rows = invoice_item_rows(self.invoice)
+        row = next(rows, None)
+        while True:
+            available = page.y - (0 if page.at_top else page.space_after) - page.bottom + FUZZ
+            capacity = int(available // row_height) - 1
+            if capacity < 1 and row is not None and not page.at_top:
+                page.new_page()
+                continue
+            chunk = []
+            while row is not None and len(chunk) < capacity:
+                chunk.append(row)
+                row = next(rows, None)
+            top = page.place(row_height * (len(chunk) + 1))
+
+            c.setFillColor(colors.lightgrey)
+            c.rect(left, top - row_height, sum(widths), row_height, stroke=0, fill=1)
+            c.setFillColor(colors.black)
+            _draw_cells(c, [(top - row_height + baseline, template.items_header)],
+                        centred, ['CENTER'] * len(widths), BOLD, 7)
+            _draw_cells(c, [(top - row_height * (index + 2) + baseline, cells) for index, cells in enumerate(chunk)],
+                        anchors, aligns, REGULAR, 7)
+
+            _grid(c, left, top, widths, [row_height] * (len(chunk) + 1), 0.5)
+            if row is None:
+                break
+            page.new_page()
+
+    # Totals
+
+    def _totals(self, page):
+        c, invoice, template = page.c, self.invoice, self.template
+        total_taxable = float(invoice.subtotal)
+        total_cgst = float(invoice.cgst_amount)
+        total_sgst = float(invoice.sgst_amount)
+        total_igst = float(invoice.igst_amount)
+
+        tax_rows = [template.tax_summary_header]
+        if total_cgst > 0 and total_sgst > 0:
+            # Intra-state
+            tax_rows.append((
+                "GST",
+                f"₹{format_indian_currency(total_taxable)}",
+                f"₹{format_indian_currency(total_cgst)}",
+                f"₹{format_indian_currency(total_sgst)}",
+                f"₹{format_indian_currency(total_cgst + total_sgst)}"
+            ))
+        elif total_igst > 0:
+            # Inter-state - show IGST in CGST column, 0 in SGST
+            tax_rows.append((
+                "GST",
+                f"₹{format_indian_currency(total_taxable)}",
+                f"₹{format_indian_currency(total_igst)}",
+                "₹0.00",
+                f"₹{format_indian_currency(total_igst)}"
+            ))
+
+        amounts = [('Sub Total:', f"₹{format_indian_currency(invoice.subtotal)}")]
+        if total_igst > 0:
+            amounts.append(('Total IGST:', f"₹{format_indian_currency(invoice.igst_amount)}"))
+        else:
+            amounts.append(('Total CGST:', f"₹{format_indian_currency(invoice.cgst_amount)}"))
+            amounts.append(('Total SGST:', f"₹{format_indian_currency(invoice.sgst_amount)}"))
+        amounts.extend([
+            ('Total Tax Amount:', f"₹{format_indian_currency(invoice.total_tax)}"),
+            ('Round Off:', f"₹{format_indian_currency(invoice.round_off)}"),
+        ])
+
+        widths = [110*mm, 70*mm]
+        heights = [LEADING + 10, max(len(tax_rows) * TAX_SUMMARY_ROW, len(amounts) * AMOUNT_ROW) + 10]
+        left = page.table_left(sum(widths))
+        for top, first, count in page.place_rows(heights):
+            # The table can split between its rows, so each part is drawn on its own page
+            row_top = top
+            for row in range(first, first + count):
+                if row == 0:
+                    self._totals_headings(c, left, row_top, widths)
+                else:
+                    self._totals_details(c, left, row_top, widths, tax_rows, amounts)
+                row_top -= heights[row]
+            _grid(c, left, top, widths, heights[first:first + count], 1)
+
+        page.spacer(3*mm)
+        full_width = template.full_width[0]
+
+        # Total Invoice Value - prominent box (bold 12, 6/6 padding, bottom-aligned)
+        top = page.place(LEADING + 12)
+        c.setFillColor(colors.black)
+        c.setFont(BOLD, 12)
+        _cell_text(c, f"Total Invoice Value: ₹{format_indian_currency(invoice.total_amount)}",
+                   left, full_width, top - (LEADING + 12) + 6 + LEADING - 12, 'CENTER', 6, 6)
+        _grid(c, left, top, [full_width], [LEADING + 12], 2)
+
+        page.spacer(2*mm)
+
+        # Amount in words: two string lines, 5/5 padding, bottom-aligned
+        amount_in_words = invoice.amount_in_words or invoice.number_to_words(int(invoice.total_amount))
+        height = 2 * LEADING + 10
+        top = page.place(height)
+        c.setFont(REGULAR, 8)
+        baseline = top - height + 5 + 2 * LEADING - 8
+        c.drawString(left + 5, baseline, 'Amount in Words:')
+        c.drawString(left + 5, baseline - LEADING, str(amount_in_words))
+        _grid(c, left, top, [full_width], [height], 1)
+
+        page.spacer(3*mm)
+
+    def _totals_headings(self, c, left, top, widths):
+        _draw_paragraph(c, _paragraph([[('Tax Summary', BOLD)]], widths[0] - 10, 9),
+                        left + 5, top - 5, widths[0] - 10, 9)
+        _draw_paragraph(c, _paragraph([[('Amount Details', BOLD)]], widths[1] - 10, 9),
+                        left + widths[0] + 5, top - 5, widths[1] - 10, 9)
+
+    def _totals_details(self, c, left, top, widths, tax_rows, amounts):
+        tax_row, amount_row = TAX_SUMMARY_ROW, AMOUNT_ROW
+        tax_widths = self.template.tax_summary_widths
+        x, y = left + 5, top - 5
+        c.setFillColor(colors.grey)
+        c.rect(x, y - tax_row, sum(tax_widths), tax_row, stroke=0, fill=1)
+        for index, row in enumerate(tax_rows):
+            size = 7 if index == 0 else 8
+            c.setFillColor(colors.whitesmoke if index == 0 else colors.black)
+            c.setFont(BOLD if index == 0 else REGULAR, size)
+            baseline = y - tax_row + (2 + tax_row - 2 + LEADING) / 2.0 - size
+            cell_left = x
+            for width, text in zip(tax_widths, row):
+                _cell_text(c, text, cell_left, width, baseline, 'CENTER', 6, 6)
+                cell_left += width
+            y -= tax_row
+        _grid(c, x, top - 5, tax_widths, [tax_row] * len(tax_rows), 0.5)
+
+        x, y = left + widths[0] + 5, top - 5
+        label_width, value_width = self.template.amount_details_widths
+        c.setFillColor(colors.black)
+        for label, value in amounts:
+            # Bottom-aligned: baseline = bottom padding + leading - font size above the row bottom
+            baseline = y - amount_row + 2 + LEADING - 8
+            c.setFont(BOLD, 8)
+            c.drawString(x + 6, baseline, label)
+            c.setFont(REGULAR, 8)
+            c.drawRightString(x + label_width + value_width - 6, baseline, value)
+            y -= amount_row
+
+    # Notes, bank and logistics details
+
+    def _box(self, page, lines):
+        c, width = page.c, self.template.full_width[0]
+        lines = _paragraph(lines, width - 10, 8)
+        height = len(lines) * LEADING + 10
+        top = page.place(height)
+        left = page.table_left(width)
+        _draw_paragraph(c, lines, left + 5, top - 5, width - 10, 8)
+        _grid(c, left, top, [width], [height], 1)
+        page.spacer(3*mm)
+
+    def _details(self, page):
+        invoice, company = self.invoice, self.company
+
+        if invoice.notes and invoice.notes.strip():
+            self._box(page, [[('Notes:', BOLD)], [(invoice.notes, REGULAR)]])
+
+        bank = [[('Bank Account Details:', BOLD)]]
+        if company.bank_name:
+            bank.append([(f"Bank Name: {company.bank_name}", REGULAR)])
+        if company.bank_account_number:
+            bank.append([(f"Account Number: {company.bank_account_number}", REGULAR)])
+        if company.bank_ifsc:
+            bank.append([(f"IFSC Code: {company.bank_ifsc}", REGULAR)])
+        if company.bank_branch:
+            bank.append([(f"Branch: {company.bank_branch}", REGULAR)])
+        if len(bank) > 1:
+            self._box(page, bank)
+
+        if invoice.include_logistics:
+            logistics = [[('Logistics Details:', BOLD)]]
+            if invoice.driver_name:
+                logistics.append([(f"Driver Name: {invoice.driver_name}", REGULAR)])
+            if invoice.driver_phone:
+                logistics.append([(f"Driver Phone: {invoice.driver_phone}", REGULAR)])
+            if invoice.vehicle_number:
+                logistics.append([(f"Vehicle Number: {invoice.vehicle_number}", REGULAR)])
+            if invoice.transport_company:
+                logistics.append([(f"Transport Company: {invoice.transport_company}", REGULAR)])
+            if invoice.lr_number:
+                logistics.append([(f"LR Number: {invoice.lr_number}", REGULAR)])
+            if invoice.dispatch_date:
+                logistics.append([(f"Dispatch Date: {invoice.dispatch_date.strftime('%d/%m/%Y')}", REGULAR)])
+            if len(logistics) > 1:
+                self._box(page, logistics)
+
+    # Footer
+
+    def _signature(self):
+        """The signature flowable and the gap above it, or (None, gap without one)"""
+        company = self.company
+        if not company.authorized_signature:
+            return None, 15*mm
+        try:
+            signature = print_image(company, 'authorized_signature')
+            if signature is None:
+                signature_path = company.authorized_signature.path
+                if not os.path.exists(signature_path):
+                    return None, 0
+                signature = Image(signature_path, width=SIGNATURE_SIZE[0], height=SIGNATURE_SIZE[1])
+            return signature, 2*mm
+        except Exception:
+            # If signature image fails to load, just show text
+            return None, 15*mm
+
+    def _footer(self, page):
+        """Terms, signature and disclaimer, kept together on one page"""
+        c, invoice, company = page.c, self.invoice, self.company
+        widths = [110*mm, 70*mm]
+        terms = _paragraph([[('Terms & Conditions:', BOLD)], [(invoice.terms_and_conditions, REGULAR)]],
+                           widths[0] - 10, 8)
+        signed_for = _paragraph([[(f"For {company.name}", BOLD)]], widths[1] - 10, 8)
+        signature, gap = self._signature()
+        signature_height = signature.drawHeight if signature is not None else 0
+        signatory = _paragraph([[('Authorized Signatory', REGULAR)]], widths[1] - 10, 8)
+
+        right_height = (len(signed_for) + len(signatory)) * LEADING + gap + signature_height
+        # 5pt top and 30pt bottom padding
+        row_height = max(len(terms) * LEADING, right_height) + 35
+        disclaimer = _paragraph([
+            [("This is a computer generated invoice and does not require physical signature.", REGULAR)],
+            [("Generated as per GST Act 2017 | Invoice Template Compliant with CBIC Guidelines", REGULAR)],
+        ], page.frame_width, 7)
+        disclaimer_height = len(disclaimer) * LEADING
+        total = row_height + 3*mm + disclaimer_height
+        if not page.fits((0 if page.at_top else page.space_after) + total) and not page.at_top:
+            page.new_page()
+
+        top = page.place(row_height)
+        left = page.table_left(sum(widths))
+        _draw_paragraph(c, terms, left + 5, top - 5, widths[0] - 10, 8)
+
+        x, y = left + widths[0] + 5, top - 5
+        y -= _draw_paragraph(c, signed_for, x, y, widths[1] - 10, 8)
+        y -= gap
+        if signature is not None:
+            y -= signature_height
+            signature.drawOn(c, x, y)
+        _draw_paragraph(c, signatory, x, y, widths[1] - 10, 8)
+        _grid(c, left, top, widths, [row_height], 1)
+
+        page.spacer(3*mm)
+        top = page.place(disclaimer_height)
+        _draw_paragraph(c, disclaimer, page.frame_x, top, page.frame_width, 7, align='center', color=colors.grey)
+
+
+def render_traditional_invoice(invoice):
+    """
+    Render an invoice in the traditional layout with the canvas renderer.
+
+    Returns:
+        SpooledTemporaryFile: The PDF, positioned at the start
+    """
+    return TraditionalCanvasRenderer(invoice).render()
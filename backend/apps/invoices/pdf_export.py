@@ -0,0 +1,222 @@
+"""
+Bulk export of invoice PDFs as a ZIP archive.
+
+Invoices whose cached PDF (see pdf_cache) is current are copied into the
+archive straight from storage. The rest are rendered in the shared render
+processes of render_pool, which store what they render, so exporting the same
+invoices again is served from the cache.
+
+A download is served by one web worker and must finish within its timeout
+(gunicorn ``--timeout 120`` in the Procfile). INVOICE_PDF_EXPORT_MAX_INVOICES
+(default 1000) is sized for that: uncached invoices render at roughly 10-20
+per second with the default two render processes, cached ones are copied in
+milliseconds. Raise the limit only together with the timeout; larger exports
+belong to the export_invoice_pdfs command.
+
+The archive is produced as a stream of chunks: entries are written as soon
+as their PDF is ready, uncompressed (PDFs are compressed already), so neither
+a download nor the management command ever holds the whole archive. Invoices
+that fail to render are listed in an ``errors.txt`` entry instead of failing
+the export.
+
+Progress is reported to a callback after every entry; the export view keeps
+it in the cache (``export_progress``) for clients polling a long download.
+
+Render processes import this module before Django is set up, so models are
+imported inside the functions.
+"""
+import logging
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import date
+
+from django.core.cache import cache
+
+from .render_pool import pool_size, submit_render
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY = 'invoice-pdf-export:{}'
+PROGRESS_TTL = 3600
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def filter_export_invoices(queryset, store=None, status=None, date_from=None, date_to=None, financial_year=None):
+    """
+    Narrow an invoice queryset to the invoices of an export.
+
+    Args:
+        queryset: Invoices the user may export
+        store: Store id
+        status: Invoice status ('draft', 'sent', 'paid' or 'cancelled')
+        date_from, date_to: Inclusive invoice date range (dates)
+        financial_year: Financial year as "YYYY-YY" (e.g. "2024-25")
+
+    Returns:
+        QuerySet: The invoices, by invoice date
+
+    Raises:
+        ValueError: If the financial year is malformed
+    """
+    from .utils import get_fy_date_range
+
+    if store:
+        queryset = queryset.filter(store_id=store)
+    if status:
+        queryset = queryset.filter(status=status)
+    if date_from:
+        queryset = queryset.filter(invoice_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(invoice_date__lte=date_to)
+    if financial_year:
+        match = re.fullmatch(r'(\d{4})-(\d{2})', financial_year)
+        if not match or (int(match.group(1)) + 1) % 100 != int(match.group(2)):
+            raise ValueError('financial_year must look like 2024-25')
+        fy_start, fy_end = get_fy_date_range(date(int(match.group(1)), 4, 1))
+        queryset = queryset.filter(invoice_date__gte=fy_start, invoice_date__lte=fy_end)
+    return queryset.order_by('invoice_date', 'id')
+
+
+def entry_name(invoice):
+    """File name of an invoice in the archive (invoice numbers contain slashes)"""
+    return f"invoice_{invoice.invoice_number.replace('/', '-')}.pdf"
+
+
+def export_progress(export_id):
+    """Progress of an export started by the export view, or None if unknown or expired"""
+    return cache.get(PROGRESS_KEY.format(export_id))
+
+
+def store_progress(export_id, user_id):
+    """A progress callback keeping an export's progress in the cache for ``export_progress``"""
+    def report(progress):
+        cache.set(PROGRESS_KEY.format(export_id), {**progress, 'user_id': user_id}, PROGRESS_TTL)
+    return report
+
+
+def _render_in_worker(invoice_id):
+    """Render (and cache) one invoice's PDF in a render process; returns its bytes"""
+    from django.db import connection
+
+    from .models import Invoice
+    from .pdf_cache import INVOICE_RELATIONS, invoice_layout, render_and_store
+
+    try:
+        invoice = Invoice.objects.select_related(*INVOICE_RELATIONS).get(pk=invoice_id)
+        with render_and_store(invoice, invoice_layout(invoice)) as pdf:
+            return pdf.read()
+    finally:
+        connection.close()
+
+
+class _ZipSink:
+    """Write-only, unseekable stream collecting the archive bytes between yields"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_invoice_pdf_zip(invoices, progress=None, total=None, pool=None, workers=None):
+    """
+    Stream a ZIP archive of invoice PDFs.
+
+    Args:
+        invoices: Invoice queryset (see filter_export_invoices)
+        progress: Optional callable given a dict (total, done, cached, rendered,
+            failed, state) after every entry and when the archive is complete
+        total: The number of invoices, if the caller counted them already
+        pool: Executor to render in (default: the shared render pool)
+        workers: The processes of ``pool`` (default: INVOICE_PDF_RENDER_WORKERS)
+
+    Yields:
+        bytes: Consecutive chunks of the archive
+    """
+    from .pdf_cache import INVOICE_RELATIONS, cached_pdf, invoice_layout
+
+    submit = pool.submit if pool is not None else submit_render
+    workers = workers or pool_size()
+    state = {'total': invoices.count() if total is None else total, 'done': 0, 'cached': 0, 'rendered': 0, 'failed': 0, 'state': 'running'}
+    reported_at = 0
+
+    def report(force=False):
+        nonlocal reported_at
+        if progress and (force or time.monotonic() - reported_at >= 1):
+            progress(dict(state))
+            reported_at = time.monotonic()
+
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED, allowZip64=True)
+    pending = {}  # Future -> (invoice number, entry info)
+    failures = []
+
+    def entry(invoice):
+        return zipfile.ZipInfo(entry_name(invoice), date_time=invoice.invoice_date.timetuple()[:6])
+
+    def finish(future):
+        invoice_number, info = pending.pop(future)
+        try:
+            archive.writestr(info, future.result())
+            state['rendered'] += 1
+        except Exception as e:
+            logger.exception(f"PDF export could not render invoice {invoice_number}")
+            failures.append(f"{invoice_number}: {e}")
+            state['failed'] += 1
+        state['done'] += 1
+        report()
+
+    try:
+        report(force=True)
+        for invoice in invoices.select_related(*INVOICE_RELATIONS).iterator(chunk_size=200):
+            pdf = cached_pdf(invoice, invoice_layout(invoice))
+            if pdf is not None:
+                with pdf, archive.open(entry(invoice), 'w') as target:
+                    for chunk in iter(lambda: pdf.read(COPY_CHUNK_SIZE), b''):
+                        target.write(chunk)
+                        yield sink.drain()
+                state['cached'] += 1
+                state['done'] += 1
+                report()
+            else:
+                pending[submit(_render_in_worker, invoice.pk)] = (invoice.invoice_number, entry(invoice))
+                # Keep a couple of renders queued per worker, not the whole export
+                if len(pending) >= 2 * workers:
+                    wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in [future for future in pending if future.done()]:
+                finish(future)
+                yield sink.drain()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(future)
+                yield sink.drain()
+
+        if failures:
+            archive.writestr('errors.txt', 'These invoices could not be rendered:\n' + '\n'.join(failures) + '\n')
+        archive.close()
+        state['state'] = 'complete'
+        report(force=True)
+        yield sink.drain()
+    finally:
+        # Also reached when the client disconnects mid-download: drop this export's queued renders,
+        # leaving the shared pool to other exports and background renders
+        for future in pending:
+            future.cancel()
+        if state['state'] != 'complete':
+            state['state'] = 'aborted'
+            report(force=True)
@@ -0,0 +1,315 @@
+"""
+Compiled invoice PDF layouts.
+
+Everything in an invoice PDF that does not depend on the invoice - the
+sample stylesheet, the paragraph styles, the colour scheme, every table style
+and column width - is built once per process and layout into an
+InvoicePDFTemplate, so rendering an invoice only binds its data to it.
+
+Templates are built when each web worker starts (``warm_pdf_templates`` from
+the ``post_worker_init`` hook in gunicorn.conf.py), instead of on the first
+download; other processes (management commands, tests, render processes)
+build them on first use. They are read-only after construction and shared by
+every thread: flowables (Paragraph, Table) keep layout state and are still
+created per render, only their styles are shared.
+"""
+import io
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+LAYOUTS = ('classic', 'traditional')
+
+ITEMS_HEADER = (
+    'S.No',
+    'Description of Goods/Services',
+    'HSN/SAC',
+    'Qty',
+    'Unit',
+    'Rate (₹)',
+    'Taxable Value (₹)',
+    'Tax Rate',
+    'CGST (₹)',
+    'SGST (₹)',
+    'Total (₹)'
+)
+
+TAX_SUMMARY_HEADER = ('Tax Rate', 'Taxable Amount (₹)', 'CGST (₹)', 'SGST (₹)', 'Total Tax (₹)')
+
+# Boxes the company images are drawn into: the logo keeps its aspect ratio, the signature is stretched
+LOGO_SIZE = (40*mm, 15*mm)
+SIGNATURE_SIZE = (40*mm, 20*mm)
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _boxed_text_style(extra=()):
+    """Single-cell bordered boxes (amount in words, notes, bank and logistics details)"""
+    return TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('TOPPADDING', (0, 0), (-1, -1), 5),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+        ('LEFTPADDING', (0, 0), (-1, -1), 5),
+        *extra,
+    ])
+
+
+class InvoicePDFTemplate:
+    """
+    The data-independent part of one invoice PDF layout.
+
+    Attributes are ReportLab styles and column widths named after the part of
+    the invoice they format; see generate_invoice_pdf for how they are bound.
+    """
+
+    page_size = A4
+    margin = 15*mm
+
+    def __init__(self, layout):
+        self.layout = layout
+        styles = getSampleStyleSheet()
+
+        # Layout-specific color schemes
+        if layout == 'classic':
+            # Classic: Grey professional theme
+            self.header_color = colors.HexColor('#4A4A4A')  # Dark grey
+            self.accent_color = colors.HexColor('#757575')  # Medium grey
+            self.subtitle = "(Original for Recipient)"
+        else:
+            # Traditional: Blue GST-compliant theme
+            self.header_color = colors.HexColor('#2E86C1')  # Blue
+            self.accent_color = colors.HexColor('#3498DB')  # Light blue
+            self.subtitle = "(Original for Recipient)<br/>As per GST Rules 2017"
+
+        # Custom styles to match GST invoice
+        self.title_style = ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Normal'],
+            fontSize=16,
+            fontName='Helvetica-Bold',
+            alignment=TA_CENTER,
+            textColor=colors.white,
+            backColor=self.header_color,
+            spaceAfter=3*mm,
+            leftIndent=0,
+            rightIndent=0,
+            topPadding=6*mm,
+            bottomPadding=6*mm,
+        )
+        self.subtitle_style = ParagraphStyle(
+            'SubtitleStyle',
+            parent=styles['Normal'],
+            fontSize=8,
+            fontName='Helvetica',
+            alignment=TA_CENTER,
+            spaceAfter=3*mm,
+        )
+        self.header_style = ParagraphStyle(
+            'HeaderStyle',
+            parent=styles['Normal'],
+            fontSize=9,
+            fontName='Helvetica-Bold',
+            alignment=TA_LEFT,
+        )
+        self.normal_style = ParagraphStyle(
+            'NormalStyle',
+            parent=styles['Normal'],
+            fontSize=8,
+            fontName='Helvetica',
+            alignment=TA_LEFT,
+        )
+        self.disclaimer_style = ParagraphStyle(
+            'DisclaimerStyle',
+            parent=styles['Normal'],
+            fontSize=7,
+            fontName='Helvetica',
+            alignment=TA_CENTER,
+            textColor=colors.grey,
+        )
+
+        # Header: supplier / invoice details / GST details, then the receiver
+        self.invoice_details_widths = [30*mm, 40*mm]
+        self.invoice_details_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ])
+        self.gst_details_widths = [20*mm, 40*mm]
+        self.gst_details_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+        ])
+        self.top_widths = [100*mm, 80*mm]
+        self.customer_widths = [130*mm, 50*mm]
+        self.boxed_section_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+        ])
+
+        # Items table
+        self.items_header = ITEMS_HEADER
+        self.items_widths = [
+            12*mm,  # S.No
+            45*mm,  # Description
+            18*mm,  # HSN/SAC
+            12*mm,  # Qty
+            12*mm,  # Unit
+            18*mm,  # Rate
+            22*mm,  # Taxable Value
+            15*mm,  # Tax Rate
+            18*mm,  # CGST
+            18*mm,  # SGST
+            20*mm,  # Total
+        ]
+        # A single-line row: leading 12 plus 2/2 padding
+        self.items_row_height = 16
+        if layout == 'classic':
+            # Classic: Simple grey header
+            items_header_background = colors.HexColor('#E0E0E0')  # Light grey
+            items_grid_color = colors.grey
+        else:
+            # Traditional: Original lightgrey header
+            items_header_background = colors.lightgrey
+            items_grid_color = colors.black
+        self.items_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), items_header_background),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 7),
+            ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('ALIGN', (2, 1), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0.5, items_grid_color),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+
+        # Tax summary and amount details, side by side
+        self.tax_summary_header = TAX_SUMMARY_HEADER
+        self.tax_summary_widths = [20*mm, 25*mm, 20*mm, 20*mm, 25*mm]
+        self.tax_summary_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        self.amount_details_widths = [25*mm, 25*mm]
+        self.amount_details_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        self.bottom_widths = [110*mm, 70*mm]
+        self.bottom_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+
+        # Total, amount in words, notes, bank and logistics details
+        self.full_width = [180*mm]
+        self.total_box_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 2, colors.black),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.words_style = _boxed_text_style()
+        self.details_box_style = _boxed_text_style([('VALIGN', (0, 0), (-1, -1), 'TOP')])
+
+        # Footer: terms and signature
+        self.footer_widths = [110*mm, 70*mm]
+        self.footer_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 30),
+        ])
+
+
+def get_pdf_template(layout):
+    """
+    The compiled template for a layout, built on first use.
+
+    Any layout other than 'classic' renders as 'traditional', as it always has.
+    """
+    layout = 'classic' if layout == 'classic' else 'traditional'
+    template = _templates.get(layout)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(layout)
+            if template is None:
+                template = _templates[layout] = InvoicePDFTemplate(layout)
+    return template
+
+
+def warm_pdf_templates():
+    """
+    Compile every layout ahead of the first render (called at worker start).
+
+    Each layout also renders a small throwaway document, which loads the font
+    metrics and ReportLab's other lazily built state once, here rather than
+    in the first download.
+    """
+    for layout in LAYOUTS:
+        template = get_pdf_template(layout)
+        table = Table([list(template.items_header), ['1'] * len(template.items_header)],
+                      colWidths=template.items_widths)
+        table.setStyle(template.items_style)
+        SimpleDocTemplate(io.BytesIO(), pagesize=template.page_size).build([
+            Paragraph("<b>TAX INVOICE</b>", template.title_style),
+            Paragraph(template.subtitle, template.normal_style),
+            table,
+        ])
+
+
+def clear_pdf_templates():
+    """Drop the compiled layouts, so the next render rebuilds them (used by the benchmark)"""
+    with _templates_lock:
+        _templates.clear()
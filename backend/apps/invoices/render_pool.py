@@ -0,0 +1,61 @@
+"""
+Process-wide pool of invoice PDF render processes.
+
+Rendering is CPU-bound, so PDFs are rendered in separate (spawned)
+interpreters rather than in threads of the web worker, where they would hold
+the GIL while requests wait. Each web worker creates its pool on first use
+and keeps it, with INVOICE_PDF_RENDER_WORKERS processes (default 2); every
+background render and bulk export of that worker shares it.
+
+Render processes import this module before Django is set up, so it must not
+import models.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_process():
+    django.setup()
+
+
+def pool_size():
+    """Render processes of the shared pool"""
+    return max(getattr(settings, 'INVOICE_PDF_RENDER_WORKERS', 2), 1)
+
+
+def new_render_pool(workers):
+    """A pool of ``workers`` render processes, for callers that manage its lifetime themselves"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_process
+    )
+
+
+def submit_render(fn, *args):
+    """
+    Run ``fn(*args)`` in the shared render pool.
+
+    The pool is created on first use, and replaced if one of its processes
+    died (which breaks the whole pool).
+
+    Returns:
+        Future: The result of the call
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            try:
+                return _pool.submit(fn, *args)
+            except BrokenProcessPool:
+                _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = new_render_pool(pool_size())
+        return _pool.submit(fn, *args)
@@ -0,0 +1,112 @@
+"""
+Invoice number counters.
+
+Each (store, prefix, period) has one InvoiceSequence row. Taking a number is a
+single indexed ``UPDATE ... SET last_number = last_number + 1`` in the
+transaction that saves the invoice, so numbers are gapless and concurrent
+invoices queue on the row lock instead of colliding. A counter row is created
+on first use, starting after the highest number already issued in its period.
+
+Stores with ``invoice_number_block_size`` above 1 reserve that many numbers
+per update and hand out the rest from a per-process cache once the reserving
+transaction commits. The counter row is then touched once per block, at the
+cost of gaps (numbers of rolled back invoices and of blocks left over when a
+process exits) and of numbers not following creation order across processes.
+"""
+import threading
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InvoiceSequence
+
+# (store_id, prefix, period) -> list of [next number, last number] ranges committed to this process
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def _increment_postgres(key, count, now):
+    table = connection.ops.quote_name(InvoiceSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} SET last_number = last_number + %s, updated_at = %s
+            WHERE store_id = %s AND prefix = %s AND period = %s
+            RETURNING last_number
+            """,
+            [count, now, *key]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _increment_generic(key, count, now):
+    store_id, prefix, period = key
+    with transaction.atomic():
+        counter = InvoiceSequence.objects.filter(store_id=store_id, prefix=prefix, period=period)
+        if not counter.update(last_number=F('last_number') + count, updated_at=now):
+            return None
+        return counter.values_list('last_number', flat=True).get()
+
+
+def _increment(key, count, seed):
+    """Advance a counter by ``count`` and return its new value, creating it from ``seed()`` first if missing"""
+    increment = _increment_postgres if connection.vendor == 'postgresql' else _increment_generic
+    last_number = increment(key, count, timezone.now())
+    if last_number is None:
+        store_id, prefix, period = key
+        InvoiceSequence.objects.bulk_create(
+            [InvoiceSequence(store_id=store_id, prefix=prefix, period=period, last_number=seed())],
+            ignore_conflicts=True,
+        )
+        last_number = increment(key, count, timezone.now())
+    return last_number
+
+
+def _publish_block(key, first, last):
+    with _blocks_lock:
+        _blocks.setdefault(key, []).append([first, last])
+
+
+def _take_cached(key):
+    with _blocks_lock:
+        ranges = _blocks.get(key)
+        if not ranges:
+            return None
+        block = ranges[0]
+        number = block[0]
+        block[0] += 1
+        if block[0] > block[1]:
+            ranges.pop(0)
+        return number
+
+
+def next_invoice_sequence(store, prefix, period, seed, block_size=1):
+    """
+    Next invoice sequence number for a store's prefix and numbering period.
+
+    Args:
+        store: Store issuing the invoice
+        prefix: Invoice number prefix
+        period: Numbering period ('' when numbering never resets)
+        seed: Callable returning the highest sequence already used in the
+            period; only called when the counter row does not exist yet
+        block_size: Numbers to reserve per counter update (1 = gapless)
+
+    Returns:
+        int: The sequence number to format into the invoice number
+    """
+    key = (store.pk, prefix, period)
+    if block_size <= 1:
+        return _increment(key, 1, seed)
+
+    number = _take_cached(key)
+    if number is not None:
+        return number
+
+    last = _increment(key, block_size, seed)
+    first = last - block_size + 1
+    # Only a committed reservation may be shared; a rolled back one is reissued by the database
+    transaction.on_commit(lambda: _publish_block(key, first + 1, last))
+    return first
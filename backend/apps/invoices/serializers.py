@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.utils import timezone
 from .models import Customer, Invoice, InvoiceItem
 from apps.companies.models import Company
 from apps.stores.models import Store
@@ -197,6 +198,9 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
     lr_number = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     dispatch_date = serializers.DateField(required=False, allow_null=True)
 
+    # Cart whose stock holds this invoice consumes (see POST inventory/store/<id>/holds/)
+    hold_reference = serializers.CharField(write_only=True, required=False, allow_blank=True, max_length=64)
+
     class Meta:
         model = Invoice
         fields = (
@@ -208,20 +212,44 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
             'billing_address', 'billing_city', 'billing_state', 'billing_pincode',
             # Logistics fields
             'include_logistics', 'driver_name', 'driver_phone', 'vehicle_number',
-            'transport_company', 'lr_number', 'dispatch_date'
+            'transport_company', 'lr_number', 'dispatch_date',
+            'hold_reference'
         )
     
     def validate(self, data):
         return data
     
     def create(self, validated_data):
+        from django.db import IntegrityError
+        from apps.items.services import is_lock_conflict, retry_on_conflict
+
+        def is_retryable(error):
+            # Lock conflicts, and another invoice taking the same number first
+            return is_lock_conflict(error) or (
+                isinstance(error, IntegrityError) and 'invoice_number' in str(error)
+            )
+
+        # Every attempt starts from a fresh copy: creation pops and rewrites the line dicts
+        try:
+            return retry_on_conflict(
+                lambda: self._create_invoice({
+                    **validated_data,
+                    'items': [dict(item_data) for item_data in validated_data.get('items', [])],
+                }),
+                retry_if=is_retryable
+            )
+        except IntegrityError as e:
+            raise serializers.ValidationError(f"Invoice creation failed: {str(e)}")
+
+    def _create_invoice(self, validated_data):
         from datetime import date
-        from django.db import transaction
+        from django.db import IntegrityError, OperationalError, transaction
         
         # Use database transaction for atomicity
         with transaction.atomic():
             # Extract items data safely
             items_data = validated_data.pop('items', [])
+            hold_reference = validated_data.pop('hold_reference', '')
         
             # Set defaults for missing fields
             if 'invoice_date' not in validated_data or not validated_data['invoice_date']:
@@ -270,13 +298,17 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
                 'company': company_obj
             }
 
-            # Create or get customer
+            # Create or get customer. Concurrent checkouts for a new name (e.g. the walk-in
+            # default) may each create one, so take the oldest instead of failing on duplicates
             try:
-                customer, created = Customer.objects.get_or_create(
+                customer = Customer.objects.filter(
                     name=customer_data['name'],
-                    company=customer_data['company'],
-                    defaults=customer_data
-                )
+                    company=customer_data['company']
+                ).order_by('id').first()
+                if customer is None:
+                    customer = Customer.objects.create(**customer_data)
+            except OperationalError:
+                raise
             except Exception as e:
                 raise serializers.ValidationError(f"Customer creation failed: {str(e)}")
 
@@ -300,6 +332,8 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
 
             try:
                 invoice = Invoice.objects.create(**validated_data)
+            except (IntegrityError, OperationalError):
+                raise
             except Exception as e:
                 raise serializers.ValidationError(f"Invoice creation failed: {str(e)}")
 
@@ -317,14 +351,28 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
 
             # Bulk fetch all store inventory in a single query
             store_id = validated_data['store'].pk if hasattr(validated_data['store'], 'pk') else validated_data['store']
-            store_inventory_qs = StoreInventory.objects.filter(
-                item__pk__in=item_ids,
-                store_id=store_id
-            ).select_related('item')
+
+            # Lock the rows this invoice sells from, and those its cart holds stock on, in id
+            # order: concurrent invoices on the same items queue here instead of overselling
+            from django.db.models import Q
+            from apps.items.models import StockHold
+            from apps.items.services import lock_inventory_rows, release_expired_holds, release_holds
+            rows_to_lock = Q(item__pk__in=item_ids, store_id=store_id)
+            if hold_reference:
+                rows_to_lock |= Q(pk__in=StockHold.objects.filter(
+                    reference=hold_reference, inventory__store_id=store_id
+                ).values('inventory_id'))
+            store_inventory_qs = lock_inventory_rows(
+                StoreInventory.objects.filter(rows_to_lock).select_related('item')
+            )
+
+            # The cart's holds turn into this sale
+            released = release_holds(hold_reference, store_id=store_id) if hold_reference else {}
 
             # Create inventory lookup dict for O(1) access
             inventory_dict = {}
             for inv in store_inventory_qs:
+                inv.reserved_quantity -= released.get(inv.pk, 0)
                 company_id = inv.company_id
                 key = (inv.item.pk, company_id)
                 inventory_dict[key] = inv
@@ -377,19 +425,28 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
                             f"Item '{item.name}' is not available in store '{validated_data['store'].name}'"
                         )
 
-                    # Check if sufficient quantity is available
-                    if store_inventory.quantity < item_data['quantity']:
+                    # Check if sufficient quantity is available, net of other carts' holds;
+                    # expired holds still counted on the row are released first
+                    if (store_inventory.available_quantity < item_data['quantity']
+                            and store_inventory.reserved_quantity > 0
+                            and release_expired_holds(inventory_ids=[store_inventory.pk])):
+                        store_inventory.reserved_quantity = StoreInventory.objects.filter(
+                            pk=store_inventory.pk
+                        ).values_list('reserved_quantity', flat=True).get()
+
+                    available_quantity = store_inventory.available_quantity
+                    if available_quantity < item_data['quantity']:
                         # Improved error handling: Return structured error data for better UX
                         raise serializers.ValidationError({
                             'type': 'insufficient_inventory',
                             'item_name': item.name,
                             'item_id': item.id,
-                            'available_quantity': float(store_inventory.quantity),
+                            'available_quantity': float(available_quantity),
                             'requested_quantity': float(item_data['quantity']),
-                            'shortage': float(item_data['quantity'] - store_inventory.quantity),
-                            'message': f"Not enough stock available for {item.name}. You need {float(item_data['quantity'] - store_inventory.quantity)} more units.",
+                            'shortage': float(item_data['quantity'] - available_quantity),
+                            'message': f"Not enough stock available for {item.name}. You need {float(item_data['quantity'] - available_quantity)} more units.",
                             'user_message': f"Insufficient stock for {item.name}",
-                            'suggestion': f"Only {float(store_inventory.quantity)} units available. Please reduce quantity or restock inventory."
+                            'suggestion': f"Only {float(available_quantity)} units available. Please reduce quantity or restock inventory."
                         })
 
                     # Deduct quantity from inventory (will be saved in bulk later)
@@ -415,6 +472,8 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
                     invoice_item = InvoiceItem(invoice=invoice, **item_data)
                     invoice_items.append(invoice_item)
 
+                except OperationalError:
+                    raise
                 except Exception as e:
                     raise serializers.ValidationError(f"Invoice item {i+1} creation failed: {str(e)}")
 
@@ -423,8 +482,12 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
                 invoice_items = InvoiceItem.objects.bulk_create(invoice_items)
 
             # PERFORMANCE OPTIMIZATION: Bulk update all inventory quantities in a single query
+            # (safe: the rows are locked until this transaction commits)
             if inventories_to_update:
-                StoreInventory.objects.bulk_update(inventories_to_update, ['quantity'])
+                now = timezone.now()
+                for store_inventory in inventories_to_update:
+                    store_inventory.last_updated = now
+                StoreInventory.objects.bulk_update(inventories_to_update, ['quantity', 'last_updated'])
 
             # PERFORMANCE OPTIMIZATION: Bulk create all transactions in a single query
             if transactions_to_create:
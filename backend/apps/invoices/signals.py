@@ -0,0 +1,56 @@
+"""
+Keep the rendered PDF cache (apps.invoices.pdf_cache) in step with invoices:
+re-render after every save and remove the file with the invoice.
+
+Rebuild a company's PDF print copies of its logo and signature
+(apps.invoices.pdf_assets) whenever either upload changes.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.companies.models import Company
+from .models import Invoice
+from .pdf_assets import PRINT_ASSETS, build_print_assets
+from .pdf_cache import schedule_render
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_render(instance.pk)
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_deleted(sender, instance, **kwargs):
+    if instance.pdf_file:
+        instance.pdf_file.delete(save=False)
+
+
+@receiver(pre_save, sender=Company)
+def company_uploads_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note which uploads this save replaces, for company_saved"""
+    fields = [field for field in PRINT_ASSETS if update_fields is None or field in update_fields]
+    if raw or not fields:
+        instance._changed_print_uploads = []
+        return
+    previous = Company.objects.filter(pk=instance.pk).values(*fields).first() if instance.pk else None
+    instance._changed_print_uploads = [
+        field for field in fields
+        if previous is None or (previous[field] or '') != (getattr(instance, field).name or '')
+    ]
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, raw=False, **kwargs):
+    changed = getattr(instance, '_changed_print_uploads', None)
+    if changed:
+        build_print_assets(instance, changed)
+    instance._changed_print_uploads = []
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted(sender, instance, **kwargs):
+    for print_field, _, _ in PRINT_ASSETS.values():
+        fieldfile = getattr(instance, print_field)
+        if fieldfile:
+            fieldfile.delete(save=False)
@@ -0,0 +1,706 @@
+"""
+Tests for invoice creation, numbering, the PDF cache and bulk PDF export
+
+To run these tests:
+    python manage.py test apps.invoices
+"""
+import base64
+import io
+import re
+import shutil
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from threading import Thread
+from unittest import mock, skipUnless
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.companies.models import Company
+from apps.items.models import InventoryTransaction, Item, StoreInventory
+from apps.stores.models import Store, StoreUser
+from . import pdf_assets, pdf_cache, pdf_export, sequences
+from .models import Customer, Invoice, InvoiceItem, InvoiceSequence
+from .pdf_templates import ITEMS_HEADER, TAX_SUMMARY_HEADER
+from .utils import generate_invoice_pdf, get_financial_year
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class InvoiceFixtures:
+    """An admin with one company and store, a store user on it, and one stocked item"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role='admin'
+        )
+        self.company = self._company(self.admin, 'Acme')
+        self.store = self._store(self.company, 'Main')
+        self.store_user = User.objects.create_user(
+            email='counter@example.com', username='counter', password='pass', role='store_user',
+            created_by=self.admin
+        )
+        StoreUser.objects.create(user=self.store_user, store=self.store)
+
+        self.item = Item.objects.create(
+            name='Widget', sku='SKU1', hsn_code='1234', price=Decimal('10'), tax_rate=Decimal('18')
+        )
+        self.item.companies.add(self.company)
+        self.inventory = StoreInventory.objects.create(
+            item=self.item, store=self.store, company=self.company, quantity=Decimal('10')
+        )
+        self.customer = Customer.objects.create(
+            name='Ravi', phone='9999999999', address='2 Lane', city='Patna', state='Bihar', pincode='800001',
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _company(self, owner, name, gstin='10AAAAA0000A1Z5'):
+        return Company.objects.create(
+            name=name, address='1 Road', city='Patna', state='Bihar', pincode='800001', phone='1234567890',
+            email=f'{name.lower()}@example.com', gstin=gstin, pan='AAAAA0000A', owner=owner
+        )
+
+    def _store(self, company, name):
+        return Store.objects.create(
+            name=name, address='1 Road', city='Patna', state='Bihar', pincode='800001', phone='1234567890',
+            company=company
+        )
+
+    def _invoice(self, store=None, **fields):
+        """An invoice saved directly, numbered like any other"""
+        store = store or self.store
+        return Invoice.objects.create(
+            customer=self.customer, company=store.company, store=store, created_by=self.admin,
+            invoice_date=fields.pop('invoice_date', None) or date.today(), **fields
+        )
+
+    def _post_invoice(self, *quantities, **extra):
+        return self.client.post('/api/invoices/', {
+            'store': self.store.pk, 'company': self.company.pk,
+            'items': [{'item': self.item.pk, 'quantity': quantity, 'unit_price': 10, 'tax_rate': 18}
+                      for quantity in quantities],
+            **extra
+        }, format='json')
+
+    def _quantity(self):
+        return StoreInventory.objects.get(pk=self.inventory.pk).quantity
+
+    def _add_lines(self, invoice, count):
+        """Add ``count`` line items named "Line item 001", ... to an invoice and total it"""
+        items = Item.objects.bulk_create([
+            Item(name=f'Line item {index:03d}', sku=f'LINE{index}', price=Decimal('5'), tax_rate=Decimal('18'))
+            for index in range(1, count + 1)
+        ])
+        lines = []
+        for item in items:
+            line = InvoiceItem(
+                invoice=invoice, item=item, quantity=Decimal('2'), unit_price=Decimal('5'), tax_rate=Decimal('18')
+            )
+            line.calculate_taxes()
+            lines.append(line)
+        InvoiceItem.objects.bulk_create(lines)
+        invoice.calculate_totals(lines)
+
+    def _upload_images(self, company=None):
+        """Give a company a large transparent logo and a signature (which builds their print copies)"""
+        company = company or self.company
+        for field, size in (('logo', (3000, 1200)), ('authorized_signature', (1600, 900))):
+            data = io.BytesIO()
+            PILImage.new('RGBA', size, (200, 30, 30, 128)).save(data, 'PNG')
+            setattr(company, field, SimpleUploadedFile(f'{field}.png', data.getvalue()))
+        company.save()
+        return company
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class InvoiceCreationTests(InvoiceFixtures, TestCase):
+    """Invoices deduct stock under row locks and roll back as a whole"""
+
+    def test_invoice_deducts_stock(self):
+        response = self._post_invoice(4)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self._quantity(), Decimal('6'))
+
+        invoice = Invoice.objects.get()
+        sale = InventoryTransaction.objects.get(inventory=self.inventory)
+        self.assertEqual((sale.transaction_type, sale.quantity), ('sale', Decimal('-4')))
+        self.assertEqual(sale.notes, f'Sale via Invoice #{invoice.invoice_number}')
+
+    def test_short_line_rolls_back_the_invoice(self):
+        response = self._post_invoice(4, 7, customer_name='New customer')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._quantity(), Decimal('10'))
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(InventoryTransaction.objects.exists())
+        self.assertFalse(Customer.objects.filter(name='New customer').exists())
+
+    def test_item_not_stocked_in_store_is_refused(self):
+        other_item = Item.objects.create(
+            name='Gadget', sku='SKU2', hsn_code='1234', price=Decimal('5'), tax_rate=Decimal('18')
+        )
+        response = self.client.post('/api/invoices/', {
+            'store': self.store.pk, 'company': self.company.pk,
+            'items': [{'item': other_item.pk, 'quantity': 1, 'unit_price': 5, 'tax_rate': 18}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Invoice.objects.exists())
+
+    def test_walk_in_customer_is_reused_when_duplicated(self):
+        for _ in range(2):
+            Customer.objects.create(
+                name='Walk-in Customer', phone='0000000000', address='N/A', city='Unknown', state='Bihar',
+                pincode='000000', company=self.company
+            )
+        response = self._post_invoice(1)
+        self.assertEqual(response.status_code, 201, response.data)
+        first = Customer.objects.filter(name='Walk-in Customer').order_by('id').first()
+        self.assertEqual(Invoice.objects.get().customer, first)
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class InvoiceSequenceTests(InvoiceFixtures, TestCase):
+    """Invoice numbers come from a gapless counter per store, prefix and period"""
+
+    def setUp(self):
+        super().setUp()
+        sequences._blocks.clear()
+        self.addCleanup(sequences._blocks.clear)
+        self.financial_year = get_financial_year(date.today())
+
+    def _number(self, sequence, store=None, period=None):
+        store = store or self.store
+        return f'INV/S{store.pk:02d}/{period or self.financial_year}/{sequence:04d}'
+
+    def test_numbers_are_consecutive_per_store(self):
+        other_store = self._store(self.company, 'Branch')
+        numbers = [self._invoice().invoice_number for _ in range(2)] + [self._invoice(other_store).invoice_number]
+        self.assertEqual(numbers, [self._number(1), self._number(2), self._number(1, other_store)])
+        self.assertEqual(InvoiceSequence.objects.get(store=self.store).last_number, 2)
+
+    def test_numbering_restarts_each_period(self):
+        self._invoice()
+        self.assertEqual(self._invoice(invoice_date=date(2023, 5, 1)).invoice_number, self._number(1, period='2023-24'))
+
+        self.admin.invoice_reset_frequency = 'monthly'
+        self.admin.save()
+        self.assertEqual(self._invoice(invoice_date=date(2024, 1, 31)).invoice_number, self._number(1, period='202401'))
+        self.assertEqual(self._invoice(invoice_date=date(2024, 1, 2)).invoice_number, self._number(2, period='202401'))
+
+        self.admin.invoice_reset_frequency = 'never'
+        self.admin.save()
+        self.assertEqual(self._invoice().invoice_number, f'INV/S{self.store.pk:02d}/0001')
+
+    def test_new_counter_continues_after_issued_numbers(self):
+        self._invoice(invoice_number=self._number(41))
+        self._invoice(invoice_number=self._number(90, period='2023-24'), invoice_date=date(2023, 5, 1))
+        self._invoice(invoice_number='LEGACY-0099')
+        self.assertFalse(InvoiceSequence.objects.exists())
+
+        self.assertEqual(self._invoice().invoice_number, self._number(42))
+
+    def test_rolled_back_invoice_leaves_no_gap(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self._invoice()
+            raise RuntimeError
+        self.assertEqual(self._invoice().invoice_number, self._number(1))
+
+    def test_block_reservation(self):
+        self.store.invoice_number_block_size = 3
+        self.store.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._invoice()
+        counter = InvoiceSequence.objects.get(store=self.store)
+        self.assertEqual((first.invoice_number, counter.last_number), (self._number(1), 3))
+
+        # The rest of the committed block is handed out without touching the counter
+        numbers = [self._invoice().invoice_number for _ in range(2)]
+        self.assertEqual(numbers, [self._number(2), self._number(3)])
+        counter.refresh_from_db()
+        self.assertEqual(counter.last_number, 3)
+
+        self.assertEqual(self._invoice().invoice_number, self._number(4))
+        counter.refresh_from_db()
+        self.assertEqual(counter.last_number, 6)
+
+    def test_rolled_back_block_is_not_shared(self):
+        self.store.invoice_number_block_size = 3
+        self.store.save()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self._invoice()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(sequences._blocks, {})
+        self.assertEqual(self._invoice().invoice_number, self._number(1))
+
+
+class MediaRootMixin:
+    """Stores files under a temporary MEDIA_ROOT for the duration of each test"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+def _pdf_pages(data):
+    """Decoded content streams of a ReportLab PDF, one per page in page order"""
+    streams = re.findall(
+        rb'/Filter \[ /ASCII85Decode /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)endstream', data, re.S
+    )
+    pages = [zlib.decompress(base64.a85decode(stream.strip()[:-2])) for stream in streams]
+    assert f'/Count {len(pages)} '.encode() in data, 'content streams do not match the page count'
+    return pages
+
+
+def _shown(page, text):
+    """How often ``text`` is drawn as one string on a page"""
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return page.count(f'({escaped}) Tj'.encode())
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class PdfCacheTests(MediaRootMixin, InvoiceFixtures, TestCase):
+    """A stored PDF is served only while everything it was rendered from is unchanged"""
+
+    def setUp(self):
+        super().setUp()
+        self.invoice = self._invoice()
+
+    def _fresh(self):
+        return Invoice.objects.select_related(*pdf_cache.INVOICE_RELATIONS).get(pk=self.invoice.pk)
+
+    def test_key_tracks_everything_rendered(self):
+        key = pdf_cache.pdf_cache_key(self._fresh(), 'classic')
+        self.assertNotEqual(pdf_cache.pdf_cache_key(self._fresh(), 'traditional'), key)
+        with mock.patch.object(pdf_cache, 'RENDERER_VERSION', pdf_cache.RENDERER_VERSION + 1):
+            self.assertNotEqual(pdf_cache.pdf_cache_key(self._fresh(), 'classic'), key)
+
+        for instance in (self.invoice, self.company, self.customer):
+            instance.save()
+            new_key = pdf_cache.pdf_cache_key(self._fresh(), 'classic')
+            self.assertNotEqual(new_key, key, type(instance).__name__)
+            key = new_key
+
+    def test_key_tracks_traditional_renderer(self):
+        classic, traditional = (pdf_cache.pdf_cache_key(self._fresh(), layout) for layout in ('classic', 'traditional'))
+        self.store.invoice_pdf_renderer = 'canvas'
+        self.store.save()
+        self.assertEqual(pdf_cache.pdf_cache_key(self._fresh(), 'classic'), classic)
+        self.assertNotEqual(pdf_cache.pdf_cache_key(self._fresh(), 'traditional'), traditional)
+
+    def test_cached_until_stale(self):
+        invoice = self._fresh()
+        self.assertIsNone(pdf_cache.cached_pdf(invoice, 'classic'))
+
+        updated_at = invoice.updated_at
+        pdf_cache.render_and_store(invoice, 'classic')
+        invoice = self._fresh()
+        self.assertEqual(invoice.updated_at, updated_at)
+        with pdf_cache.cached_pdf(invoice, 'classic') as pdf:
+            self.assertTrue(pdf.read().startswith(b'%PDF'))
+        self.assertIsNone(pdf_cache.cached_pdf(invoice, 'traditional'))
+
+        self.customer.save()
+        self.assertIsNone(pdf_cache.cached_pdf(self._fresh(), 'classic'))
+
+    def test_missing_file_is_not_served(self):
+        pdf_cache.render_and_store(self._fresh(), 'classic')
+        invoice = self._fresh()
+        default_storage.delete(invoice.pdf_file.name)
+        self.assertIsNone(pdf_cache.cached_pdf(invoice, 'classic'))
+
+    def test_render_replaces_stored_file(self):
+        pdf_cache.render_and_store(self._fresh(), 'classic')
+        previous = self._fresh().pdf_file.name
+        self.assertTrue(default_storage.exists(previous))
+
+        self._fresh().save()
+        pdf_cache.render_and_store(self._fresh(), 'classic')
+        current = self._fresh().pdf_file.name
+        self.assertNotEqual(current, previous)
+        self.assertTrue(default_storage.exists(current))
+        self.assertFalse(default_storage.exists(previous))
+
+    def test_render_does_not_replace_a_newer_file(self):
+        first, second = self._fresh(), self._fresh()
+        pdf_cache.render_and_store(first, 'classic')
+        with mock.patch.object(default_storage, 'delete', wraps=default_storage.delete) as delete:
+            pdf_cache.render_and_store(second, 'traditional')
+        self.assertEqual(self._fresh().pdf_file.name, first.pdf_file.name)
+        self.assertTrue(default_storage.exists(first.pdf_file.name))
+        # The losing render's file is removed rather than orphaned
+        orphan, = delete.call_args.args
+        self.assertTrue(orphan.startswith(f'invoices/{self.invoice.pk}/traditional-'))
+        self.assertFalse(default_storage.exists(orphan))
+
+    def test_deleting_invoice_removes_file(self):
+        pdf_cache.render_and_store(self._fresh(), 'classic')
+        invoice = self._fresh()
+        name = invoice.pdf_file.name
+        invoice.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_download_is_served_from_cache(self):
+        url = f'/api/invoices/{self.invoice.pk}/pdf/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertTrue(self._fresh().pdf_file)
+
+        with mock.patch.object(pdf_cache, 'render_invoice_pdf') as render:
+            with mock.patch('apps.invoices.views.render_and_store') as view_render:
+                response = self.client.get(url)
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        render.assert_not_called()
+        view_render.assert_not_called()
+
+    @override_settings(INVOICE_PDF_BACKGROUND_RENDER=True)
+    def test_saves_queue_one_background_render(self):
+        self.addCleanup(pdf_cache._queued.clear)
+        queued = Future()
+        with mock.patch.object(pdf_cache, 'submit_render', return_value=queued) as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.invoice.save()
+                self.invoice.save()
+            submit.assert_called_once_with(pdf_cache._render_job, self.invoice.pk)
+
+            # Once the render has started, a later save needs a render of its own
+            queued.set_running_or_notify_cancel()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.invoice.save()
+            self.assertEqual(submit.call_count, 2)
+
+        queued.set_result(None)
+        self.assertNotIn(self.invoice.pk, pdf_cache._queued)
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class PdfAssetTests(MediaRootMixin, InvoiceFixtures, TestCase):
+    """Logos and signatures are downscaled once and embedded in PDFs as stored"""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(pdf_assets._readers.clear)
+        self._upload_images()
+        self.invoice = self._invoice()
+
+    def _print_copy(self, field):
+        print_field = pdf_assets.PRINT_ASSETS[field][0]
+        fieldfile = getattr(Company.objects.get(pk=self.company.pk), print_field)
+        with fieldfile.storage.open(fieldfile.name, 'rb') as f, PILImage.open(f) as image:
+            return fieldfile.name, image.format, image.size
+
+    def test_print_copies_fit_their_boxes(self):
+        for field, (_, box, _) in pdf_assets.PRINT_ASSETS.items():
+            name, image_format, size = self._print_copy(field)
+            width, height = pdf_assets._pixel_size(box)
+            self.assertEqual(image_format, 'JPEG', field)
+            self.assertTrue(size[0] <= width and size[1] <= height, (field, size))
+
+    def test_images_are_embedded_without_decoding(self):
+        self.store.invoice_pdf_renderer = 'canvas'
+        self.store.save()
+        invoice = Invoice.objects.select_related(*pdf_cache.INVOICE_RELATIONS).get(pk=self.invoice.pk)
+        copies = [self._print_copy(field) for field in pdf_assets.PRINT_ASSETS]
+
+        # Both renderers draw PrintImage, which sets up ReportLab's Image state itself
+        for layout in ('classic', 'traditional'):
+            with pdf_cache.render_invoice_pdf(invoice, layout) as pdf:
+                data = pdf.read()
+            self.assertEqual(data.count(b'/DCTDecode'), 2, layout)
+            for name, _, (width, height) in copies:
+                self.assertIn(f'/Height {height}'.encode(), data, (layout, name))
+                self.assertIn(f'/Width {width}'.encode(), data, (layout, name))
+
+        for name, _, _ in copies:
+            self.assertIsNone(pdf_assets._readers[name]._data, name)
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class CanvasRendererTests(MediaRootMixin, InvoiceFixtures, TestCase):
+    """The canvas renderer paginates line items with the header on every page"""
+
+    def setUp(self):
+        super().setUp()
+        self.store.invoice_pdf_renderer = 'canvas'
+        self.store.save()
+        self.invoice = self._invoice()
+
+    def _render(self):
+        invoice = Invoice.objects.select_related(*pdf_cache.INVOICE_RELATIONS).get(pk=self.invoice.pk)
+        self.assertEqual(pdf_cache.invoice_renderer(invoice, 'traditional'), 'canvas')
+        with pdf_cache.render_invoice_pdf(invoice, 'traditional') as pdf:
+            data = pdf.read()
+        return data, _pdf_pages(data)
+
+    def test_short_invoice_is_one_page(self):
+        self._add_lines(self.invoice, 3)
+        _, pages = self._render()
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(_shown(pages[0], ITEMS_HEADER[1]), 1)
+        self.assertEqual([_shown(pages[0], f'Line item {index:03d}') for index in (1, 2, 3)], [1, 1, 1])
+
+    def test_long_invoice_repeats_header_on_every_page(self):
+        self._add_lines(self.invoice, 120)
+        _, pages = self._render()
+        self.assertGreaterEqual(len(pages), 3)
+
+        # Headings with a rupee sign are drawn encoded; the tax summary repeats some of the others
+        headings = [heading for heading in ITEMS_HEADER if heading.isascii() and heading not in TAX_SUMMARY_HEADER]
+        for number, page in enumerate(pages, 1):
+            self.assertEqual([_shown(page, heading) for heading in headings], [1] * len(headings), number)
+        # Every row exactly once across the pages
+        for index in range(1, 121):
+            self.assertEqual(sum(_shown(page, f'Line item {index:03d}') for page in pages), 1, index)
+        self.assertEqual(_shown(pages[0], 'Line item 001'), 1)
+        self.assertEqual(_shown(pages[-1], 'Line item 120'), 1)
+        # Totals and footer close the last page only
+        self.assertEqual([_shown(page, 'Sub Total:') for page in pages], [0] * (len(pages) - 1) + [1])
+
+    def test_inter_state_invoice_with_logo_and_signature(self):
+        self.addCleanup(pdf_assets._readers.clear)
+        self._upload_images()
+        self.customer.state = 'Karnataka'
+        self.customer.save()
+        self._add_lines(self.invoice, 3)
+
+        data, pages = self._render()
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(_shown(pages[0], 'Total IGST:'), 1)
+        self.assertEqual(_shown(pages[0], 'Total CGST:'), 0)
+        self.assertEqual(data.count(b'/DCTDecode'), 2)
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class ItemsTableTests(InvoiceFixtures, TestCase):
+    """The platypus items table splits across pages without dropping or repeating rows"""
+
+    def test_every_row_once_across_pages(self):
+        invoice = self._invoice()
+        self._add_lines(invoice, 150)
+        invoice = Invoice.objects.select_related(*pdf_cache.INVOICE_RELATIONS).get(pk=invoice.pk)
+        headings = [heading for heading in ITEMS_HEADER if heading.isascii() and heading not in TAX_SUMMARY_HEADER]
+
+        for layout in ('classic', 'traditional'):
+            with self.subTest(layout=layout):
+                with generate_invoice_pdf(invoice, layout=layout) as pdf:
+                    pages = _pdf_pages(pdf.read())
+                shown = [[_shown(page, f'Line item {index:03d}') for page in pages] for index in range(1, 151)]
+                self.assertEqual([sum(counts) for counts in shown], [1] * 150)
+                # Rows stay in order: each page continues where the previous one stopped
+                on_page = [counts.index(1) for counts in shown]
+                self.assertEqual(on_page, sorted(on_page))
+
+                # The header is repeated on every page the table is on
+                table_pages = sorted(set(on_page))
+                self.assertGreaterEqual(len(table_pages), 3)
+                self.assertEqual(table_pages, list(range(len(table_pages))))
+                for number in table_pages:
+                    self.assertEqual(
+                        [_shown(pages[number], heading) for heading in headings], [1] * len(headings), number
+                    )
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False, CACHES=LOCMEM_CACHES)
+class InvoiceExportTests(MediaRootMixin, InvoiceFixtures, TestCase):
+    """Exports contain exactly the invoices the user may see and the filters select"""
+
+    def setUp(self):
+        super().setUp()
+        self.branch = self._store(self.company, 'Branch')
+        self.other_admin = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role='admin'
+        )
+        other_store = self._store(self._company(self.other_admin, 'Other', gstin='10BBBBB0000B1Z5'), 'Elsewhere')
+
+        self.paid = self._invoice(status='paid', invoice_date=date(2024, 3, 31))
+        self.draft = self._invoice(status='draft', invoice_date=date(2024, 4, 1))
+        self.branch_invoice = self._invoice(self.branch, status='paid', invoice_date=date(2024, 4, 2))
+        self.foreign = self._invoice(other_store, status='paid', invoice_date=date(2024, 4, 2))
+        # Served from the PDF cache, so no render processes are started
+        for invoice in Invoice.objects.select_related(*pdf_cache.INVOICE_RELATIONS):
+            pdf_cache.render_and_store(invoice, pdf_cache.invoice_layout(invoice))
+
+    def _export(self, user=None, **params):
+        client = self.client
+        if user:
+            client = APIClient()
+            client.force_authenticate(user)
+        return client.get('/api/invoices/export/pdf/', params)
+
+    def _archive(self, response):
+        self.assertEqual(response.status_code, 200)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def _entries(self, *invoices):
+        return sorted(pdf_export.entry_name(invoice) for invoice in invoices)
+
+    def test_admin_exports_own_companies(self):
+        archive = self._archive(self._export())
+        self.assertEqual(sorted(archive.namelist()), self._entries(self.paid, self.draft, self.branch_invoice))
+        self.assertTrue(archive.read(pdf_export.entry_name(self.paid)).startswith(b'%PDF'))
+
+        self.assertEqual(self._export(self.other_admin, store=self.store.pk).status_code, 404)
+
+    def test_store_user_exports_assigned_stores(self):
+        archive = self._archive(self._export(self.store_user))
+        self.assertEqual(sorted(archive.namelist()), self._entries(self.paid, self.draft))
+        self.assertEqual(self._export(self.store_user, store=self.branch.pk).status_code, 404)
+
+    def test_filters(self):
+        archive = self._archive(self._export(status='paid', financial_year='2024-25'))
+        self.assertEqual(archive.namelist(), self._entries(self.branch_invoice))
+        archive = self._archive(self._export(date_from='2024-03-31', date_to='2024-04-01'))
+        self.assertEqual(sorted(archive.namelist()), self._entries(self.paid, self.draft))
+
+        self.assertEqual(self._export(financial_year='2024-26').status_code, 400)
+        self.assertEqual(self._export(date_from='last week').status_code, 400)
+
+    @override_settings(INVOICE_PDF_EXPORT_MAX_INVOICES=2)
+    def test_export_size_is_capped(self):
+        self.assertEqual(self._export().status_code, 400)
+
+    def test_counted_total_is_reused(self):
+        invoices = Invoice.objects.filter(company=self.company)
+        chunks = pdf_export.iter_invoice_pdf_zip(invoices, total=3)
+        with self.assertNumQueries(1):
+            next(chunks)
+        chunks.close()
+
+    def test_filter_by_financial_year(self):
+        invoices = pdf_export.filter_export_invoices(Invoice.objects.all(), financial_year='2023-24')
+        self.assertEqual(list(invoices), [self.paid])
+        with self.assertRaises(ValueError):
+            pdf_export.filter_export_invoices(Invoice.objects.all(), financial_year='2023-25')
+
+    def test_progress_is_visible_to_its_user_only(self):
+        response = self._export()
+        b''.join(response.streaming_content)
+        url = f"/api/invoices/export/{response['X-Export-Id']}/progress/"
+
+        progress = self.client.get(url)
+        self.assertEqual(progress.status_code, 200)
+        self.assertEqual(
+            {key: progress.data[key] for key in ('total', 'done', 'cached', 'rendered', 'failed', 'state')},
+            {'total': 3, 'done': 3, 'cached': 3, 'rendered': 0, 'failed': 0, 'state': 'complete'}
+        )
+        self.assertEqual(self._export(self.store_user).status_code, 200)
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        self.assertEqual(client.get(url).status_code, 404)
+
+    def test_uncached_invoices_are_rendered_and_failures_listed(self):
+        Invoice.objects.filter(pk__in=[self.paid.pk, self.draft.pk]).update(pdf_cache_key='')
+
+        def render(invoice_id):
+            if invoice_id == self.draft.pk:
+                raise RuntimeError('renderer crashed')
+            return b'%PDF-rendered'
+
+        progress = []
+        # Threads stand in for the render processes, which cannot see the test transaction
+        with ThreadPoolExecutor(1) as pool, \
+                mock.patch.object(pdf_export, 'submit_render', pool.submit), \
+                mock.patch.object(pdf_export, '_render_in_worker', side_effect=render), \
+                self.assertLogs(pdf_export.logger, 'ERROR'):
+            chunks = pdf_export.iter_invoice_pdf_zip(
+                Invoice.objects.filter(company=self.company).order_by('id'), progress=progress.append
+            )
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+        self.assertEqual(archive.read(pdf_export.entry_name(self.paid)), b'%PDF-rendered')
+        self.assertNotIn(pdf_export.entry_name(self.draft), archive.namelist())
+        self.assertIn(f'{self.draft.invoice_number}: renderer crashed', archive.read('errors.txt').decode())
+        self.assertEqual(
+            {key: progress[-1][key] for key in ('cached', 'rendered', 'failed', 'state')},
+            {'cached': 1, 'rendered': 1, 'failed': 1, 'state': 'complete'}
+        )
+
+    def test_abandoned_download_is_reported(self):
+        progress = []
+        chunks = pdf_export.iter_invoice_pdf_zip(Invoice.objects.filter(company=self.company), progress=progress.append)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(progress[-1]['state'], 'aborted')
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class InvoiceCreationRetryTests(InvoiceFixtures, TransactionTestCase):
+    """A duplicate invoice number rolls back the attempt and retries it with a new number"""
+
+    def test_duplicate_number_is_retried(self):
+        taken = self._invoice(invoice_number='TAKEN/0001')
+        real_number = Invoice.generate_invoice_number
+        attempts = []
+
+        def colliding_number(invoice):
+            attempts.append(1)
+            return taken.invoice_number if len(attempts) == 1 else real_number(invoice)
+
+        with mock.patch.object(Invoice, 'generate_invoice_number', autospec=True, side_effect=colliding_number):
+            response = self._post_invoice(4)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(attempts), 2)
+        # The failed attempt's deduction and ledger row were rolled back
+        self.assertEqual(self._quantity(), Decimal('6'))
+        self.assertEqual(InventoryTransaction.objects.count(), 1)
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_gives_up_after_repeated_duplicates(self):
+        taken = self._invoice(invoice_number='TAKEN/0001')
+        with mock.patch.object(Invoice, 'generate_invoice_number', return_value=taken.invoice_number):
+            response = self._post_invoice(4)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._quantity(), Decimal('10'))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs concurrent database connections')
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class ConcurrentCheckoutTests(InvoiceFixtures, TransactionTestCase):
+    """Racing checkouts on one item sell exactly the stock there is, under gapless numbers"""
+
+    def test_concurrent_checkouts_never_oversell(self):
+        statuses = []
+
+        def checkout():
+            client = APIClient()
+            client.force_authenticate(self.admin)
+            try:
+                statuses.append(client.post('/api/invoices/', {
+                    'store': self.store.pk, 'company': self.company.pk,
+                    'items': [{'item': self.item.pk, 'quantity': 3, 'unit_price': 10, 'tax_rate': 18}],
+                }, format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=checkout) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201] * 3 + [400] * 5)
+        self.assertEqual(self._quantity(), Decimal('1'))
+        numbers = sorted(Invoice.objects.values_list('invoice_number', flat=True))
+        self.assertEqual([number[-4:] for number in numbers], ['0001', '0002', '0003'])
+
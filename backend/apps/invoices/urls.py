@@ -8,4 +8,6 @@ urlpatterns = [
     path('<int:pk>/', views.InvoiceDetailView.as_view(), name='invoice-detail'),
     path('<int:invoice_id>/pdf/', views.generate_pdf_view, name='invoice-pdf'),
     path('stats/', views.invoice_stats_view, name='invoice-stats'),
+    path('export/pdf/', views.export_pdfs_view, name='invoice-pdf-export'),
+    path('export/<str:export_id>/progress/', views.export_progress_view, name='invoice-pdf-export-progress'),
 ]
\ No newline at end of file
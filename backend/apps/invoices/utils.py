@@ -1,14 +1,17 @@
-import io
 import os
+import tempfile
 from datetime import datetime, date
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, mm
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image, KeepTogether
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Image, KeepTogether
+from reportlab.platypus.flowables import Flowable
 from django.conf import settings
 
+from .pdf_assets import print_image
+from .pdf_templates import LOGO_SIZE, SIGNATURE_SIZE, get_pdf_template
+
+# Line items are read from the database this many at a time while rendering
+ITEMS_CHUNK_SIZE = 500
+
 
 def format_indian_currency(amount):
     """
@@ -133,88 +136,141 @@ def get_fy_date_range(input_date=None):
     return fy_start, fy_end
 
 
+def iter_invoice_items(invoice):
+    """
+    An invoice's line items with their Item, in order, read in chunks.
+
+    Items prefetched with ``prefetch_related('items__item')`` are used as they
+    are; otherwise they are streamed from the database, so rendering a
+    wholesale invoice never holds all of its rows.
+    """
+    if 'items' in getattr(invoice, '_prefetched_objects_cache', {}):
+        return iter(invoice.items.all())
+    return invoice.items.select_related('item').order_by('id').iterator(chunk_size=ITEMS_CHUNK_SIZE)
+
+
+def invoice_item_rows(invoice):
+    """Items table rows (formatted cells) of an invoice, one line item at a time"""
+    for idx, item in enumerate(iter_invoice_items(invoice), 1):
+        tax_rate_display = f"{item.tax_rate:.1f}%" if item.tax_rate > 0 else "0.00%"
+
+        # Show CGST/SGST for intra-state, IGST for inter-state in CGST column
+        cgst_display = f"{item.cgst_amount:.2f}" if item.cgst_amount > 0 else f"{item.igst_amount:.2f}"
+        sgst_display = f"{item.sgst_amount:.2f}" if item.sgst_amount > 0 else "0.00"
+
+        yield [
+            str(idx),
+            item.item.name,
+            item.item.hsn_code or '',
+            f"{item.quantity:.0f}",
+            item.item.unit.upper(),
+            f"₹{format_indian_currency(item.unit_price)}",
+            f"₹{format_indian_currency(item.subtotal)}",
+            tax_rate_display,
+            f"₹{format_indian_currency(float(cgst_display))}",
+            f"₹{format_indian_currency(float(sgst_display))}",
+            f"₹{format_indian_currency(item.total_amount)}",
+        ]
+
+
+def pdf_output():
+    """File a PDF is rendered into: kept in memory, moved to a temp file past INVOICE_PDF_SPOOL_MAX_SIZE"""
+    return tempfile.SpooledTemporaryFile(max_size=getattr(settings, 'INVOICE_PDF_SPOOL_MAX_SIZE', 1024 * 1024))
+
+
+class ItemsTable(Flowable):
+    """
+    The line items table, laid out one page at a time.
+
+    Draws exactly like ``Table([header] + rows, repeatRows=1, splitByRow=True)``,
+    but reads the ``rows`` iterator only as far as the page being laid out:
+    each split builds a Table of the rows that fit and passes the rest of the
+    iterator on. A single Table keeps cell styles for every row and copies
+    the remaining rows at each page break, so its memory grows with the
+    invoice and its layout time with the square of it.
+    """
+
+    def __init__(self, header, rows, template, pending=None):
+        super().__init__()
+        self.header = header
+        self.rows = rows
+        self.template = template
+        self.pending = pending or []  # Rows read from the iterator but not laid out yet
+        self.table = None
+
+    def _fill(self, count):
+        while len(self.pending) < count:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.pending.append(row)
+
+    def _table(self, available_height):
+        # One row more than could fit, so a table that fits holds all remaining rows
+        self._fill(int(available_height // self.template.items_row_height) + 1)
+        table = Table([self.header] + self.pending, colWidths=self.template.items_widths,
+                      repeatRows=1, splitByRow=True)
+        table.setStyle(self.template.items_style)
+        return table
+
+    def wrap(self, availWidth, availHeight):
+        self.table = self._table(availHeight)
+        return self.table.wrapOn(self.canv, availWidth, availHeight)
+
+    def split(self, availWidth, availHeight):
+        parts = self._table(availHeight).splitOn(self.canv, availWidth, availHeight)
+        if not parts:
+            return []
+        # The rest is a new flowable, as platypus tracks postponement per flowable
+        rest = ItemsTable(self.header, self.rows, self.template, self.pending[len(parts[0]._cellvalues) - 1:])
+        rest._fill(1)
+        return [parts[0], rest] if rest.pending else [parts[0]]
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self.table.drawOn(canvas, x, y, _sW)
+
+
 def generate_invoice_pdf(invoice, layout='traditional'):
     """
     Generate invoice PDF with support for different layouts.
 
+    Styles, colours and table styles come from the layout's compiled
+    template (see pdf_templates); only the invoice data is bound here.
+
     Args:
         invoice: Invoice model instance
         layout: 'classic' or 'traditional' (default: 'traditional')
             - classic: Compact layout with simplified header and grey theme
             - traditional: Full GST-compliant layout with blue theme (default)
+
+    Returns:
+        SpooledTemporaryFile: The PDF, positioned at the start
     """
-    buffer = io.BytesIO()
+    template = get_pdf_template(layout)
+    normal_style = template.normal_style
+    buffer = pdf_output()
 
     doc = SimpleDocTemplate(
         buffer,
-        pagesize=A4,
-        topMargin=15*mm,
-        bottomMargin=15*mm,
-        leftMargin=15*mm,
-        rightMargin=15*mm
+        pagesize=template.page_size,
+        topMargin=template.margin,
+        bottomMargin=template.margin,
+        leftMargin=template.margin,
+        rightMargin=template.margin
     )
 
-    styles = getSampleStyleSheet()
-
-    # Layout-specific color schemes
-    if layout == 'classic':
-        # Classic: Grey professional theme
-        header_color = colors.HexColor('#4A4A4A')  # Dark grey
-        accent_color = colors.HexColor('#757575')  # Medium grey
-    else:
-        # Traditional: Blue GST-compliant theme
-        header_color = colors.HexColor('#2E86C1')  # Blue
-        accent_color = colors.HexColor('#3498DB')  # Light blue
-
-    # Custom styles to match GST invoice
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Normal'],
-        fontSize=16,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        textColor=colors.white,
-        backColor=header_color,
-        spaceAfter=3*mm,
-        leftIndent=0,
-        rightIndent=0,
-        topPadding=6*mm,
-        bottomPadding=6*mm,
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'SubtitleStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        fontName='Helvetica',
-        alignment=TA_CENTER,
-        spaceAfter=3*mm,
-    )
-    
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT,
-    )
-    
-    normal_style = ParagraphStyle(
-        'NormalStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        fontName='Helvetica',
-        alignment=TA_LEFT,
-    )
-    
     elements = []
 
     # Add company logo if available
     if invoice.company.logo:
         try:
-            logo_path = os.path.join(settings.MEDIA_ROOT, str(invoice.company.logo))
-            if os.path.exists(logo_path):
-                logo = Image(logo_path, width=40*mm, height=15*mm, kind='proportional')
+            # Pre-scaled print copy; the original upload if it has none yet
+            logo = print_image(invoice.company, 'logo')
+            if logo is None:
+                logo_path = os.path.join(settings.MEDIA_ROOT, str(invoice.company.logo))
+                if os.path.exists(logo_path):
+                    logo = Image(logo_path, width=LOGO_SIZE[0], height=LOGO_SIZE[1], kind='proportional')
+            if logo is not None:
                 logo.hAlign = 'CENTER'
                 elements.append(logo)
                 elements.append(Spacer(1, 3*mm))
@@ -222,18 +278,9 @@ def generate_invoice_pdf(invoice, layout='traditional'):
             # If logo fails to load, continue without it
             pass
 
-    # Title Section - layout-specific
-    title = Paragraph("TAX INVOICE", title_style)
-    elements.append(title)
-
-    # Only show subtitle in traditional layout
-    if layout == 'traditional':
-        subtitle = Paragraph("(Original for Recipient)<br/>As per GST Rules 2017", subtitle_style)
-        elements.append(subtitle)
-    else:
-        # Classic layout: simpler subtitle
-        subtitle = Paragraph("(Original for Recipient)", subtitle_style)
-        elements.append(subtitle)
+    # Title Section - layout-specific subtitle
+    elements.append(Paragraph("TAX INVOICE", template.title_style))
+    elements.append(Paragraph(template.subtitle, template.subtitle_style))
     
     # Top section with supplier details and invoice info
     supplier_details = f"""
@@ -254,15 +301,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ['Reverse Charge:', invoice.reverse_charge],
     ]
     
-    invoice_details_table = Table(invoice_details_data, colWidths=[30*mm, 40*mm])
-    invoice_details_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-    ]))
+    invoice_details_table = Table(invoice_details_data, colWidths=template.invoice_details_widths)
+    invoice_details_table.setStyle(template.invoice_details_style)
     
     # GST details table
     gst_details_data = [
@@ -272,19 +312,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ['State Code:', getattr(invoice.company, 'state_code', '10')],
     ]
     
-    gst_details_table = Table(gst_details_data, colWidths=[20*mm, 40*mm])
-    gst_details_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-        ('TOPPADDING', (0, 0), (-1, -1), 1),
-        ('LEFTPADDING', (0, 0), (-1, -1), 2),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-    ]))
+    gst_details_table = Table(gst_details_data, colWidths=template.gst_details_widths)
+    gst_details_table.setStyle(template.gst_details_style)
     
     # Top section table combining supplier and invoice details
     top_section_data = [
@@ -298,15 +327,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ]
     ]
     
-    top_table = Table(top_section_data, colWidths=[100*mm, 80*mm])
-    top_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    top_table = Table(top_section_data, colWidths=template.top_widths)
+    top_table.setStyle(template.boxed_section_style)
     
     elements.append(top_table)
     elements.append(Spacer(1, 2*mm))
@@ -339,122 +361,21 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ]
     ]
 
-    customer_table = Table(customer_data, colWidths=[130*mm, 50*mm])
-    customer_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    customer_table = Table(customer_data, colWidths=template.customer_widths)
+    customer_table.setStyle(template.boxed_section_style)
     
     elements.append(customer_table)
     elements.append(Spacer(1, 3*mm))
     
-    # Items table - exactly like GST invoice
-    items_header = [
-        'S.No',
-        'Description of Goods/Services',
-        'HSN/SAC',
-        'Qty',
-        'Unit',
-        'Rate (₹)',
-        'Taxable Value (₹)',
-        'Tax Rate',
-        'CGST (₹)',
-        'SGST (₹)',
-        'Total (₹)'
-    ]
-    
-    items_data = [items_header]
-    
-    # Add invoice items
-    for idx, item in enumerate(invoice.items.all(), 1):
-        tax_rate_display = f"{item.tax_rate:.1f}%" if item.tax_rate > 0 else "0.00%"
-        
-        # Show CGST/SGST for intra-state, IGST for inter-state in CGST column
-        cgst_display = f"{item.cgst_amount:.2f}" if item.cgst_amount > 0 else f"{item.igst_amount:.2f}"
-        sgst_display = f"{item.sgst_amount:.2f}" if item.sgst_amount > 0 else "0.00"
-        
-        items_data.append([
-            str(idx),
-            item.item.name,
-            item.item.hsn_code or '',
-            f"{item.quantity:.0f}",
-            item.item.unit.upper(),
-            f"₹{format_indian_currency(item.unit_price)}",
-            f"₹{format_indian_currency(item.subtotal)}",
-            tax_rate_display,
-            f"₹{format_indian_currency(float(cgst_display))}",
-            f"₹{format_indian_currency(float(sgst_display))}",
-            f"₹{format_indian_currency(item.total_amount)}",
-        ])
-    
-    # Items table styling - with repeatRows for multi-page support
-    items_table = Table(items_data, colWidths=[
-        12*mm,  # S.No
-        45*mm,  # Description
-        18*mm,  # HSN/SAC
-        12*mm,  # Qty
-        12*mm,  # Unit
-        18*mm,  # Rate
-        22*mm,  # Taxable Value
-        15*mm,  # Tax Rate
-        18*mm,  # CGST
-        18*mm,  # SGST
-        20*mm,  # Total
-    ], repeatRows=1, splitByRow=True)
-    
-    # Layout-specific table styling
-    if layout == 'classic':
-        # Classic: Simple grey header
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),  # Light grey
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 7),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 7),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('ALIGN', (2, 1), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ])
-    else:
-        # Traditional: Original lightgrey header
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 7),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 7),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('ALIGN', (2, 1), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ])
-
-    items_table.setStyle(table_style)
+    # Items table - exactly like GST invoice, repeating its header on every page
+    items_table = ItemsTable(list(template.items_header), invoice_item_rows(invoice), template)
     
     elements.append(items_table)
     elements.append(Spacer(1, 3*mm))
     
     # Tax Summary and Amount Details - side by side like GST invoice
     # Left side - Tax Summary
-    tax_summary_header = ['Tax Rate', 'Taxable Amount (₹)', 'CGST (₹)', 'SGST (₹)', 'Total Tax (₹)']
-    tax_summary_data = [tax_summary_header]
+    tax_summary_data = [list(template.tax_summary_header)]
     
     # Calculate totals for tax summary
     total_taxable = float(invoice.subtotal)
@@ -482,20 +403,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
             f"₹{format_indian_currency(total_igst)}"
         ])
     
-    tax_summary_table = Table(tax_summary_data, colWidths=[20*mm, 25*mm, 20*mm, 20*mm, 25*mm])
-    tax_summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 7),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-    ]))
+    tax_summary_table = Table(tax_summary_data, colWidths=template.tax_summary_widths)
+    tax_summary_table.setStyle(template.tax_summary_style)
     
     # Right side - Amount Details (conditional based on inter-state vs intra-state)
     amount_details_data = [['Sub Total:', f"₹{format_indian_currency(invoice.subtotal)}"]]
@@ -514,21 +423,14 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ['Round Off:', f"₹{format_indian_currency(invoice.round_off)}"],
     ])
     
-    amount_details_table = Table(amount_details_data, colWidths=[25*mm, 25*mm])
-    amount_details_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-    ]))
+    amount_details_table = Table(amount_details_data, colWidths=template.amount_details_widths)
+    amount_details_table.setStyle(template.amount_details_style)
     
     # Combine tax summary and amount details
     bottom_section_data = [
         [
-            Paragraph("<b>Tax Summary</b>", header_style),
-            Paragraph("<b>Amount Details</b>", header_style)
+            Paragraph("<b>Tax Summary</b>", template.header_style),
+            Paragraph("<b>Amount Details</b>", template.header_style)
         ],
         [
             tax_summary_table,
@@ -536,15 +438,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ]
     ]
     
-    bottom_table = Table(bottom_section_data, colWidths=[110*mm, 70*mm])
-    bottom_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
+    bottom_table = Table(bottom_section_data, colWidths=template.bottom_widths)
+    bottom_table.setStyle(template.bottom_style)
     
     elements.append(bottom_table)
     elements.append(Spacer(1, 3*mm))
@@ -553,15 +448,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
     total_box_data = [
         [f"Total Invoice Value: ₹{format_indian_currency(invoice.total_amount)}"]
     ]
-    total_box_table = Table(total_box_data, colWidths=[180*mm])
-    total_box_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 2, colors.black),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
+    total_box_table = Table(total_box_data, colWidths=template.full_width)
+    total_box_table.setStyle(template.total_box_style)
     
     elements.append(total_box_table)
     elements.append(Spacer(1, 2*mm))
@@ -571,16 +459,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
     words_data = [
         [f"Amount in Words:\n{amount_in_words}"]
     ]
-    words_table = Table(words_data, colWidths=[180*mm])
-    words_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    words_table = Table(words_data, colWidths=template.full_width)
+    words_table.setStyle(template.words_style)
     
     elements.append(words_table)
     elements.append(Spacer(1, 3*mm))
@@ -590,17 +470,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         notes_data = [
             [Paragraph(f"<b>Notes:</b><br/>{invoice.notes}", normal_style)]
         ]
-        notes_table = Table(notes_data, colWidths=[180*mm])
-        notes_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        notes_table = Table(notes_data, colWidths=template.full_width)
+        notes_table.setStyle(template.details_box_style)
         elements.append(notes_table)
         elements.append(Spacer(1, 3*mm))
 
@@ -627,17 +498,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         bank_data = [
             [Paragraph(bank_details_text, normal_style)]
         ]
-        bank_table = Table(bank_data, colWidths=[180*mm])
-        bank_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        bank_table = Table(bank_data, colWidths=template.full_width)
+        bank_table.setStyle(template.details_box_style)
         elements.append(bank_table)
         elements.append(Spacer(1, 3*mm))
 
@@ -670,17 +532,8 @@ def generate_invoice_pdf(invoice, layout='traditional'):
             logistics_data = [
                 [Paragraph(logistics_details_text, normal_style)]
             ]
-            logistics_table = Table(logistics_data, colWidths=[180*mm])
-            logistics_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('TOPPADDING', (0, 0), (-1, -1), 5),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-                ('LEFTPADDING', (0, 0), (-1, -1), 5),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
+            logistics_table = Table(logistics_data, colWidths=template.full_width)
+            logistics_table.setStyle(template.details_box_style)
             elements.append(logistics_table)
             elements.append(Spacer(1, 3*mm))
 
@@ -694,9 +547,13 @@ def generate_invoice_pdf(invoice, layout='traditional'):
     # Add signature image if available
     if invoice.company.authorized_signature:
         try:
-            signature_path = invoice.company.authorized_signature.path
-            if os.path.exists(signature_path):
-                signature_img = Image(signature_path, width=40*mm, height=20*mm)
+            # Pre-scaled print copy; the original upload if it has none yet
+            signature_img = print_image(invoice.company, 'authorized_signature')
+            if signature_img is None:
+                signature_path = invoice.company.authorized_signature.path
+                if os.path.exists(signature_path):
+                    signature_img = Image(signature_path, width=SIGNATURE_SIZE[0], height=SIGNATURE_SIZE[1])
+            if signature_img is not None:
                 signature_content.append(Spacer(1, 2*mm))
                 signature_content.append(signature_img)
         except Exception as e:
@@ -715,28 +572,14 @@ def generate_invoice_pdf(invoice, layout='traditional'):
         ]
     ]
 
-    footer_table = Table(footer_data, colWidths=[110*mm, 70*mm])
-    footer_table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 30),
-    ]))
+    footer_table = Table(footer_data, colWidths=template.footer_widths)
+    footer_table.setStyle(template.footer_style)
 
     # Computer generated disclaimer
     disclaimer = Paragraph(
         "This is a computer generated invoice and does not require physical signature.<br/>"
         "Generated as per GST Act 2017 | Invoice Template Compliant with CBIC Guidelines",
-        ParagraphStyle(
-            'DisclaimerStyle',
-            parent=styles['Normal'],
-            fontSize=7,
-            fontName='Helvetica',
-            alignment=TA_CENTER,
-            textColor=colors.grey,
-        )
+        template.disclaimer_style
     )
 
     # Keep footer together for both layouts
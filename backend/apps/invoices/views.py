@@ -1,22 +1,27 @@
+import uuid
+
 from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.db import models
 from apps.accounts.permissions import IsStoreUser, CanAccessStore
+from inventory_system.pagination import OptionalCursorPagination
 from .models import Customer, Invoice, InvoiceItem
 from .serializers import (
     CustomerSerializer, InvoiceSerializer, InvoiceListSerializer, InvoiceDetailSerializer,
     InvoiceCreateSerializer, InvoiceItemSerializer
 )
-from .utils import generate_invoice_pdf
+from .pdf_cache import INVOICE_RELATIONS, cached_pdf, invoice_layout, render_and_store
+from .pdf_export import export_progress, filter_export_invoices, iter_invoice_pdf_zip, store_progress
 
 
-class InvoicePagination(PageNumberPagination):
+class InvoicePagination(OptionalCursorPagination):
     """Custom pagination class for invoice list - 100 invoices per page for better UX"""
     page_size = 100
     page_size_query_param = 'page_size'
@@ -26,6 +31,7 @@ class InvoicePagination(PageNumberPagination):
 class CustomerListCreateView(generics.ListCreateAPIView):
     serializer_class = CustomerSerializer
     permission_classes = [IsStoreUser]
+    pagination_class = OptionalCursorPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['company', 'state']
     search_fields = ['name', 'email', 'phone', 'gstin']
@@ -176,33 +182,29 @@ class InvoiceDetailView(generics.RetrieveUpdateDestroyAPIView):
 @api_view(['GET'])
 @permission_classes([IsStoreUser])
 def generate_pdf_view(request, invoice_id):
+    """
+    Download an invoice PDF.
+
+    Served from the rendered-PDF cache (``Invoice.pdf_file``, filled in the
+    background after each save); rendered and stored here when the cached
+    file is missing or stale.
+    """
     user = request.user
     
     try:
         if user.role == 'admin':
             # Use the same logic as the invoice list view
-            invoice = Invoice.objects.select_related('company', 'customer', 'store', 'created_by').get(id=invoice_id)
+            invoice = Invoice.objects.select_related(*INVOICE_RELATIONS).get(id=invoice_id)
         else:
             user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
-            invoice = Invoice.objects.select_related('company', 'customer', 'store', 'created_by').get(id=invoice_id, store__id__in=user_stores)
-
-        # Safely determine layout preference (admin's preference for all their users)
-        if invoice.created_by:
-            creator = invoice.created_by
-            if creator.role == 'store_user' and creator.created_by:
-                # Store user - use their admin's preference
-                layout = getattr(creator.created_by, 'invoice_layout_preference', 'classic')
-            else:
-                # Admin or orphan user - use their own preference
-                layout = getattr(creator, 'invoice_layout_preference', 'classic')
-        else:
-            # Fallback (should never happen due to CASCADE)
-            layout = 'classic'
-        pdf_buffer = generate_invoice_pdf(invoice, layout=layout)
-        
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
+            invoice = Invoice.objects.select_related(*INVOICE_RELATIONS).get(id=invoice_id, store__id__in=user_stores)
+
+        # Layout follows the admin's preference for all their users
+        layout = invoice_layout(invoice)
+        pdf = cached_pdf(invoice, layout) or render_and_store(invoice, layout)
+
+        response = FileResponse(pdf, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="invoice_{invoice.invoice_number}.pdf"'
-        
         return response
         
     except Invoice.DoesNotExist:
@@ -211,6 +213,71 @@ def generate_pdf_view(request, invoice_id):
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsStoreUser])
+def export_pdfs_view(request):
+    """
+    Download the PDFs of many invoices as one ZIP archive.
+
+    Query params: store, status, date_from, date_to (ISO dates) and
+    financial_year ("2024-25"). The archive is streamed while the PDFs are
+    rendered; its progress can be polled at ``export/<X-Export-Id>/progress/``.
+    """
+    user = request.user
+    params = request.query_params
+
+    if user.role == 'admin':
+        invoices = Invoice.objects.filter(company__owner=user)
+    else:
+        user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
+        invoices = Invoice.objects.filter(store__id__in=user_stores)
+
+    try:
+        date_from, date_to = (parse_date(params[key]) if params.get(key) else None for key in ('date_from', 'date_to'))
+        if (params.get('date_from') and date_from is None) or (params.get('date_to') and date_to is None):
+            raise ValueError('date_from and date_to must be ISO dates')
+        invoices = filter_export_invoices(
+            invoices,
+            store=params.get('store'),
+            status=params.get('status'),
+            date_from=date_from,
+            date_to=date_to,
+            financial_year=params.get('financial_year')
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    count = invoices.count()
+    if not count:
+        return Response({'error': 'No invoices match the export'}, status=status.HTTP_404_NOT_FOUND)
+    # Sized so an uncached export finishes within the web worker timeout (see pdf_export)
+    max_invoices = getattr(settings, 'INVOICE_PDF_EXPORT_MAX_INVOICES', 1000)
+    if count > max_invoices:
+        return Response(
+            {'error': f'{count} invoices match; narrow the export to at most {max_invoices}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    export_id = uuid.uuid4().hex
+    response = StreamingHttpResponse(
+        iter_invoice_pdf_zip(invoices, progress=store_progress(export_id, user.id), total=count),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="invoices_{export_id[:8]}.zip"'
+    response['X-Export-Id'] = export_id
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsStoreUser])
+def export_progress_view(request, export_id):
+    """Progress of a bulk PDF export (total, done, cached, rendered, failed, state)"""
+    progress = export_progress(export_id)
+    if progress is None or progress['user_id'] != request.user.id:
+        return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({key: value for key, value in progress.items() if key != 'user_id'})
+
+
 @api_view(['GET'])
 @permission_classes([IsStoreUser])
 def invoice_stats_view(request):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Item, StoreInventory, InventoryTransaction
+from .models import Item, StoreInventory, InventoryTransaction, InventoryCheckpoint
 
 
 @admin.register(Item)
@@ -29,4 +29,11 @@ class InventoryTransactionAdmin(admin.ModelAdmin):
     list_display = ('inventory', 'transaction_type', 'quantity', 'created_at')
     list_filter = ('transaction_type', 'created_at', 'inventory__store__company')
     search_fields = ('inventory__item__name', 'notes')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+
+@admin.register(InventoryCheckpoint)
+class InventoryCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('inventory', 'quantity', 'last_transaction_id', 'taken_at')
+    list_filter = ('taken_at', 'inventory__store')
+    readonly_fields = ('inventory', 'quantity', 'last_transaction_id', 'taken_at')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.items.services import PartitioningError, ensure_partitions
+from apps.items.services.partitioning import DEFAULT_MONTHS_AHEAD
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly inventory_transactions partitions ahead of time (run monthly, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=DEFAULT_MONTHS_AHEAD,
+            help=f'Months after the current one to create partitions for (default: {DEFAULT_MONTHS_AHEAD})'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            created = ensure_partitions(months_ahead=options['months_ahead'])
+        except PartitioningError as e:
+            raise CommandError(str(e))
+
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        self.stdout.write(
+            self.style.SUCCESS(f'{len(created)} ledger partition(s) created')
+        )
@@ -0,0 +1,90 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from apps.accounts.models import User
+from apps.items.services import ImportFileError, detect_format, import_catalog, iter_records
+from apps.items.services.catalog_import import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Bulk import (upsert by SKU) an item catalog from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            required=True,
+            help='Path to the CSV or JSONL file'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='File format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--company',
+            type=int,
+            action='append',
+            default=[],
+            help='Company id to link rows without a companies column to (repeatable)'
+        )
+        parser.add_argument(
+            '--owner',
+            type=str,
+            help='Email of the admin whose companies and items the file may touch (default: no restriction)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per database transaction (default: {DEFAULT_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        path = options['file']
+        if not os.path.exists(path):
+            raise CommandError(f'File {path} not found')
+
+        owner = None
+        if options['owner']:
+            try:
+                owner = User.objects.get(email=options['owner'], role='admin')
+            except User.DoesNotExist:
+                raise CommandError(f"Admin user {options['owner']} not found")
+
+        def progress(report):
+            self.stdout.write(
+                f"Processed {report['processed']} rows "
+                f"({report['created']} created, {report['updated']} updated, {report['error_count']} errors)..."
+            )
+
+        self.stdout.write(f'Importing catalog from {path}...')
+
+        try:
+            fmt = detect_format(path, options['format'])
+            with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+                report = import_catalog(
+                    iter_records(file, fmt),
+                    owner=owner,
+                    default_companies=options['company'],
+                    batch_size=options['batch_size'],
+                    progress=progress
+                )
+        except ImportFileError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stdout.write(
+                self.style.WARNING(f"Row {error['row']} ({error['sku'] or '-'}): {error['error']}")
+            )
+        if report['error_count'] > len(report['errors']):
+            self.stdout.write(
+                self.style.WARNING(f"... and {report['error_count'] - len(report['errors'])} more errors")
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Import completed! Rows: {report['processed']}, Created: {report['created']}, "
+                f"Updated: {report['updated']}, Company links: {report['links_created']}, "
+                f"Errors: {report['error_count']}"
+            )
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.items.services import PartitioningError, convert_to_partitioned
+from apps.items.services.partitioning import BACKUP_TABLE, DEFAULT_MONTHS_AHEAD, drop_backup_table
+
+
+class Command(BaseCommand):
+    help = 'Convert inventory_transactions into a monthly range-partitioned table (PostgreSQL, one-time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=DEFAULT_MONTHS_AHEAD,
+            help=f'Future monthly partitions to create (default: {DEFAULT_MONTHS_AHEAD})'
+        )
+        parser.add_argument(
+            '--drop-backup',
+            action='store_true',
+            help=f'Only drop {BACKUP_TABLE} left by a previous conversion'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['drop_backup']:
+                drop_backup_table()
+                self.stdout.write(self.style.SUCCESS(f'Dropped {BACKUP_TABLE}'))
+                return
+
+            self.stdout.write('Partitioning inventory_transactions (stock writes wait until this finishes)...')
+            result = convert_to_partitioned(months_ahead=options['months_ahead'])
+        except PartitioningError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ledger partitioned! Rows: {result['rows']}, Partitions: {result['partitions']}. "
+                f"The old table is kept as {BACKUP_TABLE}; drop it with --drop-backup once verified."
+            )
+        )
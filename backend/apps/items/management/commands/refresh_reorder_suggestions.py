@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from apps.items.services import refresh_reorder_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached sales-velocity reorder suggestions per store (run nightly, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--store',
+            type=int,
+            action='append',
+            help='Only refresh this store id (repeatable; default: every store with inventory)'
+        )
+        parser.add_argument(
+            '--lead-time-days',
+            type=int,
+            help='Supplier lead time in days (default: REORDER_LEAD_TIME_DAYS)'
+        )
+        parser.add_argument(
+            '--review-days',
+            type=int,
+            help='Days between orders (default: REORDER_REVIEW_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Computing reorder suggestions...')
+
+        refreshed = refresh_reorder_suggestions(
+            options['store'],
+            lead_time_days=options['lead_time_days'],
+            review_days=options['review_days']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed reorder suggestions for {refreshed} store(s)')
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.items.services import release_expired_holds
+from apps.items.services.reservations import DEFAULT_SWEEP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Release expired stock holds so their quantity is available again (run every minute, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_SWEEP_BATCH_SIZE,
+            help=f'Holds released per transaction (default: {DEFAULT_SWEEP_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Released {released} expired stock hold(s)')
+        )
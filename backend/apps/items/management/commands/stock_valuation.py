@@ -0,0 +1,99 @@
+import csv
+import sys
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from apps.items.models import StoreInventory
+from apps.items.services import iter_valuation
+from apps.items.services.valuation import METHODS, DEFAULT_CHUNK_ROWS
+
+
+class Command(BaseCommand):
+    help = 'Value stock per store and company (weighted average or FIFO) as of a date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--method',
+            choices=METHODS,
+            default='weighted_average',
+            help='Valuation method (default: weighted_average)'
+        )
+        parser.add_argument(
+            '--at',
+            type=str,
+            help='Valuation date or datetime (default: now; a date means end of that day)'
+        )
+        parser.add_argument('--store', type=int, help='Only value this store id')
+        parser.add_argument('--company', type=int, help='Only value this company id')
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write per-row valuation CSV to this path ("-" for stdout)'
+        )
+        parser.add_argument(
+            '--chunk-rows',
+            type=int,
+            default=DEFAULT_CHUNK_ROWS,
+            help=f'Ledger rows loaded per chunk; bounds memory use (default: {DEFAULT_CHUNK_ROWS})'
+        )
+
+    def handle(self, *args, **options):
+        at = timezone.now()
+        if options['at']:
+            at = parse_datetime(options['at'])
+            if at is None:
+                day = parse_date(options['at'])
+                if day is None:
+                    raise CommandError('--at must be an ISO date or datetime')
+                at = datetime.combine(day, time.max)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+
+        queryset = StoreInventory.objects.all()
+        if options['store']:
+            queryset = queryset.filter(store_id=options['store'])
+        if options['company']:
+            queryset = queryset.filter(company_id=options['company'])
+
+        output = None
+        writer = None
+        if options['output']:
+            output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', newline='')
+            writer = csv.writer(output)
+            writer.writerow(['store', 'company', 'sku', 'item', 'quantity', 'uncosted_quantity', 'unit_cost', 'value'])
+
+        # (store, company) -> [value, rows, uncosted quantity]
+        totals = defaultdict(lambda: [Decimal('0.00'), 0, Decimal('0.00')])
+        try:
+            for inventory, valuation in iter_valuation(
+                queryset, at, method=options['method'], chunk_rows=options['chunk_rows']
+            ):
+                total = totals[(inventory.store.name, inventory.company.name)]
+                total[0] += valuation['value']
+                total[1] += 1
+                total[2] += valuation['uncosted_quantity']
+                if writer:
+                    writer.writerow([
+                        inventory.store.name, inventory.company.name, inventory.item.sku, inventory.item.name,
+                        valuation['quantity'], valuation['uncosted_quantity'], valuation['unit_cost'],
+                        valuation['value']
+                    ])
+        finally:
+            if output and output is not sys.stdout:
+                output.close()
+
+        for (store_name, company_name), (value, rows, uncosted) in sorted(totals.items()):
+            line = f'{store_name} / {company_name}: {rows} items, value {value}'
+            if uncosted:
+                line += f' ({uncosted} units without a recorded cost)'
+            self.stdout.write(line)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Valuation ({options['method']}) as of {at.isoformat()}: "
+                f"{sum(t[0] for t in totals.values())} across {sum(t[1] for t in totals.values())} inventory rows"
+            )
+        )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from apps.items.models import StoreInventory
+from apps.items.services import take_checkpoints
+from apps.items.services.ledger import DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Snapshot inventory quantities into ledger checkpoints (run daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-transactions',
+            type=int,
+            default=1,
+            help='Only checkpoint rows with at least this many ledger rows since their last checkpoint (default: 1)'
+        )
+        parser.add_argument(
+            '--store',
+            type=int,
+            help='Only checkpoint inventory of this store id'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Inventory rows per transaction (default: {DEFAULT_CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        queryset = StoreInventory.objects.all()
+        if options['store']:
+            queryset = queryset.filter(store_id=options['store'])
+
+        written = take_checkpoints(
+            queryset,
+            min_transactions=options['min_transactions'],
+            chunk_size=options['chunk_size']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {written} inventory checkpoint(s)')
+        )
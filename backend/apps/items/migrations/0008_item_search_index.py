@@ -0,0 +1,82 @@
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+# Must match SearchVector(*SEARCH_FIELDS, config='simple') in apps/items/services/search.py
+POSTGRES_CREATE_INDEX = """
+    CREATE INDEX IF NOT EXISTS items_search_vector_idx ON items USING gin (
+        to_tsvector('simple'::regconfig,
+            COALESCE(name, '') || ' ' || COALESCE(sku, '') || ' ' || COALESCE(hsn_code, ''))
+    )
+"""
+POSTGRES_DROP_INDEX = "DROP INDEX IF EXISTS items_search_vector_idx"
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_search
+    USING fts5(name, sku, hsn_code, content='items', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_search_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_search(rowid, name, sku, hsn_code)
+        VALUES (new.id, new.name, new.sku, new.hsn_code);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_search_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_search(items_search, rowid, name, sku, hsn_code)
+        VALUES ('delete', old.id, old.name, old.sku, old.hsn_code);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_search_au AFTER UPDATE ON items BEGIN
+        INSERT INTO items_search(items_search, rowid, name, sku, hsn_code)
+        VALUES ('delete', old.id, old.name, old.sku, old.hsn_code);
+        INSERT INTO items_search(rowid, name, sku, hsn_code)
+        VALUES (new.id, new.name, new.sku, new.hsn_code);
+    END
+    """,
+    "INSERT INTO items_search(items_search) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS items_search_ai",
+    "DROP TRIGGER IF EXISTS items_search_ad",
+    "DROP TRIGGER IF EXISTS items_search_au",
+    "DROP TABLE IF EXISTS items_search",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE_INDEX)
+    elif vendor == 'sqlite':
+        try:
+            for statement in SQLITE_CREATE:
+                schema_editor.execute(statement)
+        except Exception as e:
+            # SQLite built without FTS5 - search falls back to icontains
+            logger.warning(f"Skipping FTS5 item search index: {e}")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP_INDEX)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0007_transferbatch_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
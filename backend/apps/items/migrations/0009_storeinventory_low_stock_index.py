@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0008_item_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='storeinventory',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('min_stock_level'))), fields=['store', 'id'], name='inventory_low_stock_idx'),
+        ),
+    ]
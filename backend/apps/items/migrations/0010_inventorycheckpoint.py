@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0009_storeinventory_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('last_transaction_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField()),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='items.storeinventory')),
+            ],
+            options={
+                'db_table': 'inventory_checkpoints',
+                'indexes': [models.Index(fields=['inventory', 'taken_at'], name='checkpoint_inv_taken_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0010_inventorycheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorytransaction',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Purchase cost per unit for stock receipts (used for valuation)', max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0011_inventorytransaction_unit_cost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorytransfer',
+            index=models.Index(condition=models.Q(('batch__isnull', True)), fields=['-created_at', '-id'], name='transfer_standalone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferbatch',
+            index=models.Index(fields=['-created_at', '-id'], name='transfer_batch_created_idx'),
+        ),
+    ]
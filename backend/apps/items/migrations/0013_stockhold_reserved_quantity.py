@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('items', '0012_transfer_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeinventory',
+            name='reserved_quantity',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='StockHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(max_length=64)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_holds', to=settings.AUTH_USER_MODEL)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='items.storeinventory')),
+            ],
+            options={
+                'db_table': 'stock_holds',
+                'indexes': [models.Index(fields=['reference'], name='stock_hold_reference_idx'), models.Index(fields=['expires_at'], name='stock_hold_expiry_idx')],
+            },
+        ),
+    ]
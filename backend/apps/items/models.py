@@ -74,6 +74,8 @@ class StoreInventory(models.Model):
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     min_stock_level = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     max_stock_level = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Sum of the StockHold quantities on this row, maintained by services.reservations
+    reserved_quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     last_updated = models.DateTimeField(auto_now=True)
 
@@ -84,6 +86,11 @@ class StoreInventory(models.Model):
     def is_low_stock(self):
         return self.quantity <= self.min_stock_level
 
+    @property
+    def available_quantity(self):
+        """Available-to-promise: on-hand quantity not held for open carts / drafts"""
+        return self.quantity - self.reserved_quantity
+
     def clean(self):
         """Validate that company is in item's companies"""
         from django.core.exceptions import ValidationError
@@ -93,6 +100,15 @@ class StoreInventory(models.Model):
     class Meta:
         db_table = 'store_inventories'
         unique_together = ['item', 'store', 'company']
+        indexes = [
+            # Partial index holding only low-stock rows; the database keeps it current
+            # for every quantity / min_stock_level write
+            models.Index(
+                fields=['store', 'id'],
+                condition=models.Q(quantity__lte=models.F('min_stock_level')),
+                name='inventory_low_stock_idx',
+            ),
+        ]
 
 
 class InventoryTransaction(models.Model):
@@ -112,6 +128,13 @@ class InventoryTransaction(models.Model):
     
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_cost = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text='Purchase cost per unit for stock receipts (used for valuation)'
+    )
     notes = models.TextField(blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -123,6 +146,66 @@ class InventoryTransaction(models.Model):
         db_table = 'inventory_transactions'
 
 
+class InventoryCheckpoint(models.Model):
+    """
+    Snapshot of a StoreInventory quantity, used to answer point-in-time stock
+    queries without replaying the whole ledger. ``last_transaction_id`` is the
+    newest InventoryTransaction already reflected in ``quantity``.
+    """
+    inventory = models.ForeignKey(
+        StoreInventory,
+        on_delete=models.CASCADE,
+        related_name='checkpoints'
+    )
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    last_transaction_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Checkpoint {self.inventory_id} @ {self.taken_at}: {self.quantity}"
+
+    class Meta:
+        db_table = 'inventory_checkpoints'
+        indexes = [
+            models.Index(fields=['inventory', 'taken_at'], name='checkpoint_inv_taken_idx'),
+        ]
+
+
+class StockHold(models.Model):
+    """
+    Temporary reservation of stock on a StoreInventory row for an open cart or
+    draft invoice. Holds sharing a ``reference`` belong to the same cart and are
+    consumed together when its invoice is created; unconsumed holds expire at
+    ``expires_at`` and are deleted by the release_expired_holds command.
+    """
+    inventory = models.ForeignKey(
+        StoreInventory,
+        on_delete=models.CASCADE,
+        related_name='holds'
+    )
+    reference = models.CharField(max_length=64)
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_holds'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Hold {self.reference}: {self.quantity} of inventory {self.inventory_id} until {self.expires_at}"
+
+    class Meta:
+        db_table = 'stock_holds'
+        indexes = [
+            models.Index(fields=['reference'], name='stock_hold_reference_idx'),
+            models.Index(fields=['expires_at'], name='stock_hold_expiry_idx'),
+        ]
+
+
 class TransferBatch(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -161,6 +244,10 @@ class TransferBatch(models.Model):
     class Meta:
         db_table = 'transfer_batches'
         ordering = ['-created_at']
+        indexes = [
+            # Newest-first walk of the transfer timeline
+            models.Index(fields=['-created_at', '-id'], name='transfer_batch_created_idx'),
+        ]
 
 
 class InventoryTransfer(models.Model):
@@ -223,4 +310,12 @@ class InventoryTransfer(models.Model):
     
     class Meta:
         db_table = 'inventory_transfers'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Standalone transfers (not in a batch) for the transfer timeline
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(batch__isnull=True),
+                name='transfer_standalone_idx',
+            ),
+        ]
\ No newline at end of file
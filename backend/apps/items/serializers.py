@@ -59,16 +59,17 @@ class StoreInventorySerializer(serializers.ModelSerializer):
     item_price = serializers.DecimalField(source='item.price', max_digits=10, decimal_places=2, read_only=True)
     store_name = serializers.CharField(source='store.name', read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
+    available_quantity = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = StoreInventory
         fields = (
             'id', 'item', 'item_name', 'item_sku', 'item_unit', 'item_price',
             'store', 'store_name', 'company', 'company_name',
-            'quantity', 'min_stock_level', 'max_stock_level',
+            'quantity', 'reserved_quantity', 'available_quantity', 'min_stock_level', 'max_stock_level',
             'is_low_stock', 'last_updated'
         )
-        read_only_fields = ('id', 'is_low_stock', 'last_updated')
+        read_only_fields = ('id', 'reserved_quantity', 'available_quantity', 'is_low_stock', 'last_updated')
 
     def validate(self, data):
         """Validate company is in item's companies"""
@@ -96,7 +97,7 @@ class InventoryTransactionSerializer(serializers.ModelSerializer):
         model = InventoryTransaction
         fields = (
             'id', 'inventory', 'item_name', 'store_name', 'transaction_type',
-            'quantity', 'notes', 'created_at'
+            'quantity', 'unit_cost', 'notes', 'created_at'
         )
         read_only_fields = ('id', 'created_at')
 
@@ -189,7 +190,12 @@ class TransferBatchSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'batch_id', 'initiated_by', 'created_at', 'completed_at')
 
     def get_transfer_count(self, obj):
+        # The transfer timeline annotates both aggregates in SQL
+        if hasattr(obj, 'transfer_count'):
+            return obj.transfer_count
         return obj.transfers.count()
 
     def get_total_items(self, obj):
+        if hasattr(obj, 'total_items'):
+            return float(obj.total_items or 0)
         return sum(float(transfer.quantity) for transfer in obj.transfers.all())
\ No newline at end of file
@@ -0,0 +1,72 @@
+from .stock import (
+    InsufficientStockError,
+    StockConflictError,
+    apply_stock_delta,
+    is_lock_conflict,
+    latest_unit_costs,
+    lock_inventory_rows,
+    parse_unit_cost,
+    retry_on_conflict,
+    set_stock_level,
+    transfer_stock,
+)
+from .search import search_inventory, search_items
+from .transfers import TransferValidationError, execute_transfers
+from .import_files import ImportFileError, detect_format, iter_records, iter_uploaded_records
+from .stock_import import import_stock
+from .catalog_import import import_catalog
+from .ledger import stock_as_of, take_checkpoints
+from .valuation import ValuationError, iter_valuation, value_inventories
+from .partitioning import PartitioningError, convert_to_partitioned, ensure_partitions
+from .timeline import TimelineCursorError, transfer_timeline
+from .matrix import availability_matrix
+from .reorder import compute_reorder_suggestions, get_reorder_suggestions, refresh_reorder_suggestions
+from .reservations import (
+    HoldValidationError,
+    extend_holds,
+    place_holds,
+    release_expired_holds,
+    release_holds,
+)
+
+__all__ = [
+    'InsufficientStockError',
+    'StockConflictError',
+    'apply_stock_delta',
+    'is_lock_conflict',
+    'latest_unit_costs',
+    'lock_inventory_rows',
+    'parse_unit_cost',
+    'retry_on_conflict',
+    'set_stock_level',
+    'transfer_stock',
+    'search_inventory',
+    'search_items',
+    'TransferValidationError',
+    'execute_transfers',
+    'ImportFileError',
+    'detect_format',
+    'iter_records',
+    'iter_uploaded_records',
+    'import_stock',
+    'import_catalog',
+    'stock_as_of',
+    'take_checkpoints',
+    'ValuationError',
+    'iter_valuation',
+    'value_inventories',
+    'PartitioningError',
+    'convert_to_partitioned',
+    'ensure_partitions',
+    'TimelineCursorError',
+    'transfer_timeline',
+    'availability_matrix',
+    'compute_reorder_suggestions',
+    'get_reorder_suggestions',
+    'refresh_reorder_suggestions',
+    'HoldValidationError',
+    'extend_holds',
+    'place_holds',
+    'release_expired_holds',
+    'release_holds',
+]
@@ -0,0 +1,269 @@
+"""
+Bulk item catalog import from CSV or JSONL.
+
+Each record describes one item: ``sku, name, price`` plus optional
+``description, hsn_code, unit, tax_rate, is_active`` and ``companies``
+(ids, ``|``-separated in CSV or a list in JSONL; a default company can be
+given for the whole file). Per chunk the importer:
+
+1. Locks the existing SKUs and resolves the admin's access to them in
+   batched queries
+2. Upserts every item with one INSERT ... ON CONFLICT (sku) DO UPDATE; for an
+   admin-scoped import only the existing SKUs it may update are upserted, new
+   ones are inserted with ON CONFLICT DO NOTHING so a SKU another admin
+   creates meanwhile is never overwritten
+3. Bulk-inserts the items_companies through-table rows, ignoring existing links
+
+All three steps run in the chunk's transaction.
+
+Company links are additive: an import never unlinks an item from a company.
+"""
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from apps.items.models import Item
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+UPDATE_FIELDS = ['name', 'description', 'hsn_code', 'unit', 'price', 'tax_rate', 'is_active', 'updated_at']
+UNITS = {choice for choice, _ in Item.UNIT_CHOICES}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f'}
+
+
+def _decimal(value, field, max_digits, default=None):
+    if value in (None, ''):
+        if default is None:
+            raise ValueError(f'{field} is required')
+        return default
+    try:
+        value = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'Invalid {field} value: {value}')
+    if not value.is_finite() or value < 0:
+        raise ValueError(f'{field} must be zero or greater (got {value})')
+    value = value.quantize(Decimal('0.01'))
+    if len(value.as_tuple().digits) > max_digits:
+        raise ValueError(f'{field} is too large (got {value})')
+    return value
+
+
+def _company_ids(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).replace(';', '|').split('|')
+    try:
+        return [int(part) for part in parts if str(part).strip()]
+    except (TypeError, ValueError):
+        raise ValueError('companies must be company ids')
+
+
+def _parse_record(record, default_companies):
+    """Validate one raw record; returns (Item, company ids)"""
+    sku = str(record.get('sku') or '').strip()
+    name = str(record.get('name') or '').strip()
+    if not sku or not name:
+        raise ValueError('sku and name are required')
+    if len(sku) > 100 or len(name) > 255:
+        raise ValueError('sku or name is too long')
+
+    unit = str(record.get('unit') or 'piece').strip().lower()
+    if unit not in UNITS:
+        raise ValueError(f'Invalid unit: {unit}')
+
+    hsn_code = str(record.get('hsn_code') or '').strip() or None
+    if hsn_code and len(hsn_code) > 20:
+        raise ValueError('hsn_code is too long')
+
+    is_active = record.get('is_active', True)
+    if not isinstance(is_active, bool):
+        text = str(is_active).strip().lower()
+        if text in TRUE_VALUES or text == '':
+            is_active = True
+        elif text in FALSE_VALUES:
+            is_active = False
+        else:
+            raise ValueError(f'Invalid is_active value: {is_active}')
+
+    companies = _company_ids(record.get('companies', record.get('company'))) or default_companies
+    if not companies:
+        raise ValueError('At least one company must be given')
+
+    item = Item(
+        sku=sku,
+        name=name,
+        description=str(record.get('description') or '').strip() or None,
+        hsn_code=hsn_code,
+        unit=unit,
+        price=_decimal(record.get('price'), 'price', 10),
+        tax_rate=_decimal(record.get('tax_rate'), 'tax_rate', 5, default=Decimal('0.00')),
+        is_active=is_active,
+    )
+    return item, companies
+
+
+class CatalogImporter:
+    """
+    Upserts catalog records in chunks and accumulates a per-row report.
+
+    Args:
+        owner: Restrict companies (and updates of existing SKUs) to this admin (None = no restriction)
+        default_companies: Company ids used for rows without a companies column
+        batch_size: Records per chunk / transaction
+        progress: Optional callable invoked with the report after every chunk
+    """
+
+    def __init__(self, owner=None, default_companies=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        self.owner = owner
+        self.default_companies = list(default_companies or [])
+        self.batch_size = batch_size
+        self.progress = progress
+        self.company_ids = {}
+        self.report = {
+            'processed': 0,
+            'created': 0,
+            'updated': 0,
+            'links_created': 0,
+            'error_count': 0,
+            'errors': [],
+        }
+
+    def _error(self, line_number, sku, message):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'row': line_number, 'sku': sku, 'error': message})
+
+    def _allowed_companies(self, ids):
+        """Resolve which company ids the owner may link to, caching across chunks"""
+        from apps.companies.models import Company
+
+        unknown = [i for i in ids if i not in self.company_ids]
+        if unknown:
+            queryset = Company.objects.filter(id__in=unknown)
+            if self.owner is not None:
+                queryset = queryset.filter(owner=self.owner)
+            found = set(queryset.values_list('id', flat=True))
+            for i in unknown:
+                self.company_ids[i] = i in found
+        return {i for i in ids if self.company_ids[i]}
+
+    def run(self, records):
+        """Apply an iterable of (line_number, record) pairs; returns the report dict"""
+        chunk = []
+        for line_number, record in records:
+            self.report['processed'] += 1
+            if isinstance(record, str):
+                self._error(line_number, None, record)
+                continue
+            try:
+                chunk.append((line_number, *_parse_record(record, self.default_companies)))
+            except ValueError as e:
+                self._error(line_number, record.get('sku'), str(e))
+                continue
+            if len(chunk) >= self.batch_size:
+                self._apply_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._apply_chunk(chunk)
+        self.report['errors'].sort(key=lambda error: error['row'])
+
+        logger.info(
+            f"Catalog import: {self.report['created']} created, {self.report['updated']} updated, "
+            f"{self.report['error_count']} errors"
+        )
+        return self.report
+
+    def _apply_chunk(self, chunk):
+        companies = self._allowed_companies({c for row in chunk for c in row[2]})
+
+        # Last row wins when a SKU repeats within the chunk
+        rows = {}
+        for line_number, item, company_ids in chunk:
+            if not set(company_ids) <= companies:
+                self._error(line_number, item.sku, 'Company not found or access denied')
+                continue
+            rows[item.sku] = (line_number, item, company_ids)
+
+        if rows:
+            with transaction.atomic():
+                self._write_rows(rows)
+
+        if self.progress:
+            self.progress(self.report)
+
+    def _write_rows(self, rows):
+        """Upsert one chunk's valid rows and link their companies (inside the chunk's transaction)"""
+        Link = Item.companies.through
+
+        # Locked until commit, so the ownership checked here is the one the upsert relies on
+        existing = dict(
+            Item.objects.select_for_update().filter(sku__in=rows.keys()).order_by('sku').values_list('sku', 'id')
+        )
+        if self.owner is None:
+            Item.objects.bulk_create(
+                [item for _, item, _ in rows.values()],
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=UPDATE_FIELDS,
+            )
+        else:
+            # Existing SKUs may only be updated by an admin whose companies already carry them
+            owned = set(Link.objects.filter(
+                item_id__in=existing.values(), company__owner=self.owner
+            ).values_list('item_id', flat=True))
+            for sku in [sku for sku, item_id in existing.items() if item_id not in owned]:
+                line_number, item, _ = rows.pop(sku)
+                self._error(line_number, sku, 'SKU belongs to another catalog')
+                del existing[sku]
+
+            # New SKUs are only inserted: one another admin creates meanwhile is left alone
+            new_skus = [sku for sku in rows if sku not in existing]
+            Item.objects.bulk_create([rows[sku][1] for sku in new_skus], ignore_conflicts=True)
+            if existing:
+                Item.objects.bulk_create(
+                    [rows[sku][1] for sku in existing],
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=UPDATE_FIELDS,
+                )
+            # Items inserted above have no links yet; a conflicting one committed by another import has
+            taken = set(Link.objects.filter(item__sku__in=new_skus).values_list('item__sku', flat=True))
+            for sku in taken:
+                line_number, item, _ = rows.pop(sku)
+                self._error(line_number, sku, 'SKU was created by another import meanwhile')
+
+        if not rows:
+            return
+        item_ids = dict(Item.objects.filter(sku__in=rows.keys()).values_list('sku', 'id'))
+        links = [
+            Link(item_id=item_ids[sku], company_id=company_id)
+            for sku, (_, _, company_ids) in rows.items()
+            for company_id in set(company_ids)
+        ]
+        existing_links = Link.objects.filter(item_id__in=existing.values()).count() if existing else 0
+        Link.objects.bulk_create(links, ignore_conflicts=True)
+        links_after = Link.objects.filter(item_id__in=item_ids.values()).count()
+
+        self.report['created'] += len(rows) - len(existing)
+        self.report['updated'] += len(existing)
+        self.report['links_created'] += links_after - existing_links
+
+
+def import_catalog(records, owner=None, default_companies=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Import catalog records; see CatalogImporter.
+
+    Returns:
+        dict: processed / created / updated / links_created counts, error_count
+        and up to MAX_REPORTED_ERRORS ``{'row', 'sku', 'error'}`` entries
+    """
+    return CatalogImporter(
+        owner=owner, default_companies=default_companies, batch_size=batch_size, progress=progress
+    ).run(records)
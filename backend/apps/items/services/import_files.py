@@ -0,0 +1,58 @@
+"""
+Streaming readers for CSV / JSONL import files.
+
+Records are produced lazily as ``(line_number, record)`` pairs so importers
+can work through files of any size in fixed-size chunks.
+"""
+import codecs
+import csv
+import json
+
+
+class ImportFileError(Exception):
+    """Raised when an import file cannot be read at all (unknown format, bad header)"""
+    pass
+
+
+def detect_format(filename, declared=None):
+    """Return 'csv' or 'jsonl' from an explicit format or the file extension"""
+    fmt = (declared or '').lower() or (filename or '').rsplit('.', 1)[-1].lower()
+    if fmt in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    if fmt == 'csv':
+        return 'csv'
+    raise ImportFileError(f"Unsupported import format: {fmt or 'unknown'} (use csv or jsonl)")
+
+
+def iter_records(lines, fmt):
+    """
+    Lazily parse decoded text lines into ``(line_number, record)`` pairs.
+
+    ``record`` is a dict, or an error string when the line cannot be parsed.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or 'sku' not in [f.strip().lower() for f in reader.fieldnames]:
+            raise ImportFileError('CSV header must include a sku column')
+        for record in reader:
+            yield reader.line_num, {(k or '').strip().lower(): v for k, v in record.items()}
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, 'Each JSONL line must be an object'
+            continue
+        yield line_number, record
+
+
+def iter_uploaded_records(upload, fmt):
+    """Stream records from a Django UploadedFile (or any binary file) without loading it whole"""
+    return iter_records(codecs.iterdecode(upload, 'utf-8-sig'), fmt)
@@ -0,0 +1,167 @@
+"""
+Point-in-time stock from ledger checkpoints.
+
+InventoryCheckpoint rows snapshot StoreInventory.quantity together with the
+newest ledger id they include. The stock of a row as of time T is then:
+
+- forward: the latest checkpoint taken at or before T plus the ledger rows
+  after it up to T, or
+- backward: when no such checkpoint exists, the next checkpoint after T (or
+  the live row) minus the ledger rows between T and it
+
+Only the ledger tail between T and the nearest checkpoint is read, with one
+aggregate query per direction for any number of inventory rows.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Abs, Coalesce
+from django.utils import timezone
+
+from apps.items.models import StoreInventory, InventoryTransaction, InventoryCheckpoint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+DECIMAL = DecimalField(max_digits=12, decimal_places=2)
+
+
+def signed_quantity():
+    """
+    Ledger quantity as the signed change it applied to stock.
+
+    'remove'/'sale' rows always decrease stock (writers have recorded either
+    sign for them); 'add', 'transfer' and 'adjustment' rows store the applied
+    change with its sign.
+    """
+    return Case(
+        When(transaction_type__in=['remove', 'sale'], then=-Abs('quantity')),
+        default=F('quantity'),
+        output_field=DECIMAL,
+    )
+
+
+def take_checkpoints(queryset=None, min_transactions=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Snapshot inventory rows that have ledger activity since their last checkpoint.
+
+    Each chunk's rows are locked (in id order, like every stock writer) while the
+    quantity and the newest ledger id are read, so no in-flight write can be half
+    counted.
+
+    Args:
+        queryset: StoreInventory rows to consider (default: all)
+        min_transactions: Only checkpoint rows with at least this many new ledger rows;
+            rows that never had a checkpoint are always snapshotted
+        chunk_size: Rows per transaction
+
+    Returns:
+        int: Number of checkpoints written
+    """
+    if queryset is None:
+        queryset = StoreInventory.objects.all()
+
+    last_checkpoint = InventoryCheckpoint.objects.filter(
+        inventory_id=OuterRef('pk')
+    ).order_by('-taken_at', '-id').values('last_transaction_id')[:1]
+
+    written = 0
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        with transaction.atomic():
+            list(StoreInventory.objects.filter(id__in=ids).order_by('id').select_for_update().values_list('id'))
+            now = timezone.now()
+            rows = StoreInventory.objects.filter(id__in=ids).annotate(
+                checkpoint_last=Subquery(last_checkpoint),
+            ).annotate(
+                ledger_last=Max('transactions__id'),
+                new_transactions=Count(
+                    'transactions',
+                    filter=Q(transactions__id__gt=Coalesce(F('checkpoint_last'), 0))
+                ),
+            ).values_list('id', 'quantity', 'checkpoint_last', 'ledger_last', 'new_transactions')
+
+            checkpoints = [
+                InventoryCheckpoint(
+                    inventory_id=inventory_id,
+                    quantity=quantity,
+                    last_transaction_id=ledger_last or 0,
+                    taken_at=now,
+                )
+                for inventory_id, quantity, checkpoint_last, ledger_last, new_transactions in rows
+                if checkpoint_last is None or new_transactions >= max(min_transactions, 1)
+            ]
+            InventoryCheckpoint.objects.bulk_create(checkpoints)
+            written += len(checkpoints)
+
+    logger.info(f"Wrote {written} inventory checkpoints")
+    return written
+
+
+def stock_as_of(inventory_ids, at):
+    """
+    Reconstruct stock quantities at a point in time.
+
+    Args:
+        inventory_ids: StoreInventory ids (or a queryset of them)
+        at: Aware datetime; ledger rows created at or before it are included
+
+    Returns:
+        dict: inventory id -> Decimal quantity as of ``at``
+    """
+    before = InventoryCheckpoint.objects.filter(
+        inventory_id=OuterRef('pk'), taken_at__lte=at
+    ).order_by('-taken_at', '-id')
+    after = InventoryCheckpoint.objects.filter(
+        inventory_id=OuterRef('pk'), taken_at__gt=at
+    ).order_by('taken_at', 'id')
+
+    rows = StoreInventory.objects.filter(id__in=inventory_ids).annotate(
+        before_quantity=Subquery(before.values('quantity')[:1]),
+        after_quantity=Subquery(after.values('quantity')[:1]),
+    ).values_list('id', 'quantity', 'before_quantity', 'after_quantity')
+
+    result = {}
+    forward, from_checkpoint, from_live = [], [], []
+    for inventory_id, live_quantity, before_quantity, after_quantity in rows:
+        if before_quantity is not None:
+            result[inventory_id] = before_quantity
+            forward.append(inventory_id)
+        elif after_quantity is not None:
+            result[inventory_id] = after_quantity
+            from_checkpoint.append(inventory_id)
+        else:
+            result[inventory_id] = live_quantity
+            from_live.append(inventory_id)
+
+    def tail_changes(ids, **filters):
+        return InventoryTransaction.objects.filter(inventory_id__in=ids, **filters).values(
+            'inventory_id'
+        ).annotate(change=Sum(signed_quantity())).order_by().values_list('inventory_id', 'change')
+
+    if forward:
+        before_last = InventoryCheckpoint.objects.filter(
+            inventory_id=OuterRef('inventory_id'), taken_at__lte=at
+        ).order_by('-taken_at', '-id').values('last_transaction_id')[:1]
+        for inventory_id, change in tail_changes(forward, created_at__lte=at, id__gt=Subquery(before_last)):
+            result[inventory_id] += change
+
+    if from_checkpoint:
+        after_last = InventoryCheckpoint.objects.filter(
+            inventory_id=OuterRef('inventory_id'), taken_at__gt=at
+        ).order_by('taken_at', 'id').values('last_transaction_id')[:1]
+        for inventory_id, change in tail_changes(from_checkpoint, created_at__gt=at, id__lte=Subquery(after_last)):
+            result[inventory_id] -= change
+
+    if from_live:
+        for inventory_id, change in tail_changes(from_live, created_at__gt=at):
+            result[inventory_id] -= change
+
+    return {inventory_id: Decimal(quantity).quantize(Decimal('0.01')) for inventory_id, quantity in result.items()}
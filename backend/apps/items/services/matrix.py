@@ -0,0 +1,62 @@
+"""
+Item x store stock availability matrix.
+
+Quantities come from one grouped query (SUM(quantity) per item and store,
+across companies) and are pivoted into a columnar shape:
+
+    {'axis': 'items', 'rows': [...], 'columns': [...],
+     'quantities': [[...], ...], 'totals': [...]}
+
+``quantities[r][c]`` is the stock of row r at column c, or None when there is
+no inventory row at all (as opposed to 0 on hand). With ``axis='stores'``
+rows are stores and columns items.
+"""
+from django.db.models import Sum
+
+AXES = ('items', 'stores')
+
+
+def availability_matrix(inventories, items, stores, axis='items'):
+    """
+    Pivot the stock of ``inventories`` over the given items and stores.
+
+    Args:
+        inventories: StoreInventory queryset already scoped to the user
+        items: Item rows (id, name, sku) in row/column order
+        stores: Store rows (id, name) in row/column order
+        axis: 'items' for one row per item, 'stores' for one row per store
+
+    Returns:
+        dict: axis, rows, columns, quantities (row-major) and per-row totals
+
+    Raises:
+        ValueError: If ``axis`` is unknown
+    """
+    if axis not in AXES:
+        raise ValueError(f"axis must be one of {', '.join(AXES)}")
+
+    item_index = {item['id']: i for i, item in enumerate(items)}
+    store_index = {store['id']: i for i, store in enumerate(stores)}
+
+    grid = [[None] * len(stores) for _ in items]
+    cells = inventories.filter(
+        item_id__in=item_index.keys(), store_id__in=store_index.keys()
+    ).order_by().values('item_id', 'store_id').annotate(quantity=Sum('quantity')).values_list(
+        'item_id', 'store_id', 'quantity'
+    )
+    for item_id, store_id, quantity in cells:
+        grid[item_index[item_id]][store_index[store_id]] = float(quantity)
+
+    if axis == 'stores':
+        rows, columns = stores, items
+        grid = [list(column) for column in zip(*grid)] if items else [[] for _ in stores]
+    else:
+        rows, columns = items, stores
+
+    return {
+        'axis': axis,
+        'rows': rows,
+        'columns': columns,
+        'quantities': grid,
+        'totals': [sum(quantity for quantity in row if quantity is not None) for row in grid],
+    }
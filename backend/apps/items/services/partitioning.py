@@ -0,0 +1,225 @@
+"""
+Monthly range partitioning of the inventory_transactions ledger (PostgreSQL).
+
+Partitioning is opt-in: ``convert_to_partitioned`` rebuilds the table as
+``PARTITION BY RANGE (created_at)`` with one partition per calendar month (UTC)
+plus a DEFAULT partition, copies the rows and keeps the old table as
+``inventory_transactions_unpartitioned`` until it is dropped. The model is
+unchanged; on the partitioned table the primary key is (id, created_at) since
+PostgreSQL requires the partition key in it, and ids still come from one
+sequence.
+
+``ensure_partitions`` creates the partitions of the coming months ahead of
+time (run it from cron); rows that already landed in the DEFAULT partition for
+such a month are moved into the new partition. It holds a SHARE ROW EXCLUSIVE
+lock on the ledger meanwhile, so no insert can reach the DEFAULT partition
+between the move and the ATTACH.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.items.models import InventoryTransaction
+
+logger = logging.getLogger(__name__)
+
+TABLE = InventoryTransaction._meta.db_table
+BACKUP_TABLE = f'{TABLE}_unpartitioned'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_ledger_id_seq'
+DEFAULT_MONTHS_AHEAD = 3
+
+
+class PartitioningError(Exception):
+    """Raised when the ledger cannot be (re)partitioned in the current database"""
+    pass
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError('Ledger partitioning requires PostgreSQL')
+
+
+def is_partitioned():
+    """Whether inventory_transactions is a partitioned table"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE]
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def existing_partitions():
+    """Names of the partitions attached to the ledger table"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [TABLE]
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def _create_partition(cursor, month):
+    """Create one monthly partition, moving matching rows out of the DEFAULT partition"""
+    name = partition_name(month)
+    start, end = month, _add_months(month, 1)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM "{DEFAULT_PARTITION}" WHERE created_at >= %s AND created_at < %s RETURNING *
+        )
+        INSERT INTO "{name}" SELECT * FROM moved
+        """,
+        [start, end]
+    )
+    moved = cursor.rowcount
+    cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+    if moved:
+        logger.info(f"Moved {moved} ledger rows from {DEFAULT_PARTITION} into {name}")
+    return name
+
+
+def ensure_partitions(months_ahead=DEFAULT_MONTHS_AHEAD, now=None):
+    """
+    Create the monthly partitions from the current month to ``months_ahead`` months ahead.
+
+    Ledger inserts (stock writers) wait for the lock while partitions are
+    created; that is a few statements per month unless rows have to be moved.
+
+    Returns:
+        list: Names of the partitions created
+
+    Raises:
+        PartitioningError: If the ledger is not partitioned
+    """
+    _require_postgres()
+    if not is_partitioned():
+        raise PartitioningError(f'{TABLE} is not partitioned; run partition_inventory_ledger first')
+
+    current = _month_start(now or timezone.now())
+    created = []
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Blocks ledger inserts (and concurrent runs) until the new partitions are attached
+            cursor.execute(f'LOCK TABLE "{TABLE}" IN SHARE ROW EXCLUSIVE MODE')
+            existing = existing_partitions()
+            for offset in range(months_ahead + 1):
+                month = _add_months(current, offset)
+                if partition_name(month) not in existing:
+                    created.append(_create_partition(cursor, month))
+
+    logger.info(f"Created {len(created)} ledger partitions")
+    return created
+
+
+def convert_to_partitioned(months_ahead=DEFAULT_MONTHS_AHEAD):
+    """
+    Rebuild inventory_transactions as a monthly range-partitioned table.
+
+    Runs in one transaction holding an exclusive lock on the ledger, so stock
+    writers wait for it to finish. The old table is kept (without indexes and
+    foreign key) as inventory_transactions_unpartitioned.
+
+    Returns:
+        dict: rows copied and partitions created
+
+    Raises:
+        PartitioningError: If not on PostgreSQL, already partitioned, or other
+            tables reference ledger rows by foreign key
+    """
+    _require_postgres()
+    if is_partitioned():
+        raise PartitioningError(f'{TABLE} is already partitioned')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute("SELECT to_regclass(%s)", [BACKUP_TABLE])
+        if cursor.fetchone()[0] is not None:
+            raise PartitioningError(f'{BACKUP_TABLE} already exists; drop it first')
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(%s)", [TABLE]
+        )
+        references = [name for name, in cursor.fetchall()]
+        if references:
+            raise PartitioningError(f"Foreign keys reference {TABLE}: {', '.join(references)}")
+
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in InventoryTransaction._meta.concrete_fields
+        )
+        cursor.execute(f'SELECT min(created_at), max(id) FROM "{TABLE}"')
+        oldest, max_id = cursor.fetchone()
+
+        # Free the old table's constraint and index names for the new table
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype <> 'p'", [TABLE]
+        )
+        for name, in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE "{TABLE}" DROP CONSTRAINT "{name}"')
+        cursor.execute(
+            """
+            SELECT indexname FROM pg_indexes WHERE tablename = %s
+            AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))
+            """,
+            [TABLE, TABLE]
+        )
+        for name, in cursor.fetchall():
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{BACKUP_TABLE}_pkey"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{BACKUP_TABLE}"')
+
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{BACKUP_TABLE}") PARTITION BY RANGE (created_at)')
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(%s)', [SEQUENCE])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_inventory_id_fk" FOREIGN KEY (inventory_id) '
+            f'REFERENCES "store_inventories" (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(f'CREATE INDEX "{TABLE}_inventory_id_idx" ON "{TABLE}" (inventory_id, created_at)')
+        cursor.execute(f'CREATE INDEX "{TABLE}_created_at_idx" ON "{TABLE}" (created_at)')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        current = _month_start(timezone.now())
+        month = _month_start(oldest) if oldest else current
+        partitions = 0
+        while month <= _add_months(current, months_ahead):
+            _create_partition(cursor, month)
+            month = _add_months(month, 1)
+            partitions += 1
+
+        cursor.execute(f'INSERT INTO "{TABLE}" ({columns}) SELECT {columns} FROM "{BACKUP_TABLE}"')
+        copied = cursor.rowcount
+        cursor.execute("SELECT setval(%s, %s, %s)", [SEQUENCE, max_id or 1, max_id is not None])
+
+    logger.info(f"Partitioned {TABLE}: {copied} rows into {partitions} monthly partitions")
+    return {'rows': copied, 'partitions': partitions}
+
+
+def drop_backup_table():
+    """Drop inventory_transactions_unpartitioned once the partitioned ledger is verified"""
+    _require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{BACKUP_TABLE}"')
@@ -0,0 +1,217 @@
+"""
+Sales-velocity reorder suggestions.
+
+For every StoreInventory row of a store, 'sale' ledger rows are summed per
+calendar day in the database over the longest rolling window, and the daily
+series are folded into NumPy arrays:
+
+- velocity per window (7/30/90 days by default) = units sold / window days
+- daily velocity = weighted blend of the windows (recent windows weigh more)
+- safety stock = service factor x std(daily sales) x sqrt(lead time)
+- reorder point = daily velocity x lead time + safety stock
+- reorder quantity = order-up-to level (lead time + review period of demand,
+  capped at max_stock_level when one is set) minus the current quantity
+- days of cover = quantity / daily velocity
+
+Results are cached per store, so dashboards read precomputed numbers; the
+refresh_reorder_suggestions management command refreshes them in a batch.
+"""
+import logging
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import Abs, TruncDate
+from django.utils import timezone
+
+from apps.items.models import StoreInventory, InventoryTransaction
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (7, 30, 90)
+WINDOW_WEIGHTS = (0.5, 0.3, 0.2)
+DEFAULT_BATCH_SIZE = 2000
+CACHE_KEY = 'reorder:store:{}'
+CENT = Decimal('0.01')
+
+
+def _settings():
+    return {
+        'lead_time_days': getattr(settings, 'REORDER_LEAD_TIME_DAYS', 7),
+        'review_days': getattr(settings, 'REORDER_REVIEW_DAYS', 14),
+        'service_factor': getattr(settings, 'REORDER_SERVICE_FACTOR', 1.65),
+    }
+
+
+def _decimal(value):
+    return Decimal(repr(float(value))).quantize(CENT)
+
+
+def _daily_sales(inventory_ids, at):
+    """(len(inventory_ids), max(WINDOWS)) array of units sold per day; column 0 is the day of ``at``"""
+    days = max(WINDOWS)
+    today = timezone.localdate(at)
+    since = at - timedelta(days=days + 1)
+
+    rows = list(InventoryTransaction.objects.filter(
+        inventory_id__in=inventory_ids,
+        transaction_type='sale',
+        created_at__gt=since,
+        created_at__lte=at,
+    ).annotate(
+        day=TruncDate('created_at'),
+    ).values('inventory_id', 'day').annotate(
+        sold=Sum(Abs('quantity')),
+    ).order_by().values_list('inventory_id', 'day', 'sold'))
+
+    daily = np.zeros((len(inventory_ids), days))
+    if not rows:
+        return daily
+
+    ids = np.asarray(inventory_ids, dtype=np.int64)
+    row_ids, row_days, sold = zip(*rows)
+    position = np.searchsorted(ids, np.asarray(row_ids, dtype=np.int64))
+    offset = (np.datetime64(today, 'D') - np.asarray(row_days, dtype='datetime64[D]')).astype(np.int64)
+    keep = (offset >= 0) & (offset < days)
+
+    daily += np.bincount(
+        position[keep] * days + offset[keep],
+        weights=np.asarray(sold, dtype=np.float64)[keep],
+        minlength=len(inventory_ids) * days,
+    ).reshape(len(inventory_ids), days)
+    return daily
+
+
+def compute_reorder_suggestions(inventories, at=None, lead_time_days=None, review_days=None, service_factor=None):
+    """
+    Reorder suggestions for a batch of StoreInventory rows.
+
+    Args:
+        inventories: StoreInventory instances (``item`` and ``company`` should be select_related)
+        at: Aware datetime the windows end at (default: now)
+        lead_time_days: Supplier lead time (default: settings.REORDER_LEAD_TIME_DAYS)
+        review_days: Days between orders (default: settings.REORDER_REVIEW_DAYS)
+        service_factor: Safety stock multiplier on demand deviation (default: settings.REORDER_SERVICE_FACTOR)
+
+    Returns:
+        list: One suggestion dict per inventory row, in id order
+    """
+    defaults = _settings()
+    at = at or timezone.now()
+    lead_time = lead_time_days if lead_time_days is not None else defaults['lead_time_days']
+    review = review_days if review_days is not None else defaults['review_days']
+    factor = service_factor if service_factor is not None else defaults['service_factor']
+
+    inventories = sorted(inventories, key=lambda inventory: inventory.id)
+    if not inventories:
+        return []
+
+    daily = _daily_sales([inventory.id for inventory in inventories], at)
+    quantity = np.array([float(inventory.quantity) for inventory in inventories])
+    max_level = np.array([float(inventory.max_stock_level) for inventory in inventories])
+
+    velocities = np.stack([daily[:, :days].sum(axis=1) / days for days in WINDOWS], axis=1)
+    velocity = velocities @ np.asarray(WINDOW_WEIGHTS)
+    safety_stock = factor * daily.std(axis=1) * math.sqrt(lead_time)
+
+    reorder_point = velocity * lead_time + safety_stock
+    order_up_to = velocity * (lead_time + review) + safety_stock
+    order_up_to = np.where(max_level > 0, np.maximum(np.minimum(order_up_to, max_level), reorder_point), order_up_to)
+
+    needs_reorder = (velocity > 0) & (quantity <= reorder_point)
+    reorder_quantity = np.where(needs_reorder, np.ceil(np.maximum(order_up_to - quantity, 0.0)), 0.0)
+    days_of_cover = np.divide(quantity, velocity, out=np.full(len(inventories), np.nan), where=velocity > 0)
+
+    suggestions = []
+    for i, inventory in enumerate(inventories):
+        suggestions.append({
+            'inventory_id': inventory.id,
+            'item_id': inventory.item_id,
+            'item_name': inventory.item.name,
+            'item_sku': inventory.item.sku,
+            'company': inventory.company_id,
+            'company_name': inventory.company.name,
+            'quantity': inventory.quantity,
+            'min_stock_level': inventory.min_stock_level,
+            'max_stock_level': inventory.max_stock_level,
+            **{f'velocity_{days}d': _decimal(velocities[i, w]) for w, days in enumerate(WINDOWS)},
+            'daily_velocity': _decimal(velocity[i]),
+            'reorder_point': _decimal(reorder_point[i]),
+            'reorder_quantity': _decimal(reorder_quantity[i]),
+            'days_of_cover': None if np.isnan(days_of_cover[i]) else _decimal(days_of_cover[i]),
+            'needs_reorder': bool(needs_reorder[i]),
+        })
+    return suggestions
+
+
+def compute_store_suggestions(store_id, at=None, batch_size=DEFAULT_BATCH_SIZE, **params):
+    """
+    Compute and cache the reorder suggestions of one store.
+
+    Rows are ordered by urgency: rows that need a reorder first, then by days
+    of cover (rows without sales last).
+
+    Returns:
+        dict: store_id, computed_at, the parameters used and the suggestion rows
+    """
+    at = at or timezone.now()
+    queryset = StoreInventory.objects.filter(store_id=store_id).select_related('item', 'company').order_by('id')
+
+    rows = []
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        rows.extend(compute_reorder_suggestions(batch, at=at, **params))
+
+    rows.sort(key=lambda row: (
+        not row['needs_reorder'],
+        row['days_of_cover'] is None,
+        row['days_of_cover'] or 0,
+    ))
+
+    payload = {
+        'store_id': store_id,
+        'computed_at': at,
+        **_settings(),
+        **{key: value for key, value in params.items() if value is not None},
+        'rows': rows,
+    }
+    cache.set(CACHE_KEY.format(store_id), payload, getattr(settings, 'REORDER_CACHE_TTL', 86400))
+    return payload
+
+
+def get_reorder_suggestions(store_id, refresh=False):
+    """Cached reorder suggestions of a store, computing them on a cache miss"""
+    if not refresh:
+        payload = cache.get(CACHE_KEY.format(store_id))
+        if payload is not None:
+            return payload
+    return compute_store_suggestions(store_id)
+
+
+def refresh_reorder_suggestions(store_ids=None, **params):
+    """
+    Recompute the cached suggestions of the given stores (default: every store with inventory).
+
+    Returns:
+        int: Number of stores refreshed
+    """
+    if store_ids is None:
+        store_ids = StoreInventory.objects.order_by().values_list('store_id', flat=True).distinct()
+
+    refreshed = 0
+    for store_id in sorted(store_ids):
+        payload = compute_store_suggestions(store_id, **params)
+        refreshed += 1
+        logger.info(
+            f"Reorder suggestions for store {store_id}: "
+            f"{sum(row['needs_reorder'] for row in payload['rows'])} of {len(payload['rows'])} rows need a reorder"
+        )
+    return refreshed
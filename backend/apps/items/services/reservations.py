@@ -0,0 +1,209 @@
+"""
+Stock holds: time-limited reservations of StoreInventory stock for open carts
+and draft invoices.
+
+Each row keeps the sum of its holds in ``reserved_quantity``, so the
+available-to-promise figure (``quantity - reserved_quantity``) is read from the
+row itself. Placing a hold is one conditional update
+
+    reserved_quantity = reserved_quantity + q WHERE quantity >= reserved_quantity + q
+
+plus the hold insert, and releasing one deletes it and subtracts its quantity,
+so both cost O(1) per line no matter how many holds a row carries.
+
+Expired holds keep counting against availability until they are released,
+either by the release_expired_holds command (run every minute from cron) or
+lazily when a new hold on the same row would otherwise fail.
+
+Lock order: inventory rows first, in ascending id order, then hold rows, the
+same order invoice creation uses when it consumes a cart's holds.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.items.models import StockHold, StoreInventory
+from .stock import InsufficientStockError, _to_decimal, lock_inventory_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SWEEP_BATCH_SIZE = 1000
+
+
+class HoldValidationError(Exception):
+    """Raised for an invalid hold request (quantity, TTL or reference)"""
+    pass
+
+
+def hold_ttl(ttl_seconds=None):
+    """Hold lifetime as a timedelta, defaulting to and capped by the STOCK_HOLD_* settings"""
+    default = getattr(settings, 'STOCK_HOLD_TTL_SECONDS', 900)
+    maximum = getattr(settings, 'STOCK_HOLD_MAX_TTL_SECONDS', 86400)
+    ttl_seconds = default if ttl_seconds in (None, '') else int(ttl_seconds)
+    if ttl_seconds <= 0:
+        raise HoldValidationError('ttl_seconds must be positive')
+    return timedelta(seconds=min(ttl_seconds, maximum))
+
+
+def new_reference():
+    return uuid.uuid4().hex
+
+
+def _reserve(inventory_id, quantity, now):
+    """Add ``quantity`` to the row's reserved total if it is still available to promise"""
+    return StoreInventory.objects.filter(
+        pk=inventory_id, quantity__gte=F('reserved_quantity') + quantity
+    ).update(reserved_quantity=F('reserved_quantity') + quantity, last_updated=now)
+
+
+def _release_rows(holds):
+    """
+    Delete the given holds and take their quantities off the inventory rows' reserved totals.
+
+    Returns:
+        tuple: (holds released, dict inventory_id -> quantity released)
+    """
+    with transaction.atomic():
+        inventory_ids = set(holds.values_list('inventory_id', flat=True))
+        if not inventory_ids:
+            return 0, {}
+        lock_inventory_rows(StoreInventory.objects.filter(pk__in=inventory_ids).only('id'))
+
+        holds = holds.filter(inventory_id__in=inventory_ids).order_by('id').select_for_update(
+            of=('self',) if connection.features.has_select_for_update_of else ()
+        )
+        rows = list(holds.values_list('id', 'inventory_id', 'quantity'))
+        if not rows:
+            return 0, {}
+
+        StockHold.objects.filter(id__in=[hold_id for hold_id, _, _ in rows]).delete()
+
+        released = defaultdict(Decimal)
+        for _, inventory_id, quantity in rows:
+            released[inventory_id] += quantity
+
+        now = timezone.now()
+        for inventory_id in sorted(released):
+            StoreInventory.objects.filter(pk=inventory_id).update(
+                reserved_quantity=F('reserved_quantity') - released[inventory_id], last_updated=now
+            )
+
+    return len(rows), dict(released)
+
+
+def place_holds(lines, reference=None, user=None, ttl_seconds=None):
+    """
+    Reserve stock on several inventory rows for one cart, all or nothing.
+
+    Every hold of the cart (``reference``) on the same store gets the new
+    expiry, so any cart activity keeps the whole cart alive.
+
+    Args:
+        lines: Iterable of (StoreInventory, quantity)
+        reference: Cart / draft id shared by its holds (generated when omitted)
+        user: User placing the holds
+        ttl_seconds: Hold lifetime (default STOCK_HOLD_TTL_SECONDS)
+
+    Returns:
+        tuple: (reference, expires_at, list of created StockHold)
+
+    Raises:
+        InsufficientStockError: If a line exceeds the row's available-to-promise quantity
+        HoldValidationError: For a non-positive quantity or TTL or an overlong reference
+    """
+    expires_at = timezone.now() + hold_ttl(ttl_seconds)
+    reference = reference or new_reference()
+    if len(reference) > StockHold._meta.get_field('reference').max_length:
+        raise HoldValidationError('reference is too long')
+
+    lines = [(inventory, _to_decimal(quantity)) for inventory, quantity in lines]
+    if any(quantity <= 0 for _, quantity in lines):
+        raise HoldValidationError('Hold quantities must be positive')
+
+    holds = []
+    with transaction.atomic():
+        # Ascending row order, like every other multi-row stock writer
+        for inventory, quantity in sorted(lines, key=lambda line: line[0].pk):
+            now = timezone.now()
+            if not _reserve(inventory.pk, quantity, now):
+                _release_rows(StockHold.objects.filter(inventory_id=inventory.pk, expires_at__lte=now))
+                if not _reserve(inventory.pk, quantity, now):
+                    stock, reserved = StoreInventory.objects.filter(pk=inventory.pk).values_list(
+                        'quantity', 'reserved_quantity'
+                    ).get()
+                    raise InsufficientStockError(inventory, quantity, stock - reserved)
+
+            holds.append(StockHold(
+                inventory=inventory, reference=reference, quantity=quantity,
+                created_by=user, expires_at=expires_at,
+            ))
+
+        holds = StockHold.objects.bulk_create(holds)
+        store_ids = {inventory.store_id for inventory, _ in lines}
+        StockHold.objects.filter(reference=reference, inventory__store_id__in=store_ids).update(expires_at=expires_at)
+
+    return reference, expires_at, holds
+
+
+def release_holds(reference, store_id=None):
+    """
+    Release every hold of a cart, e.g. when it is abandoned or turned into an invoice.
+
+    Returns:
+        dict: inventory_id -> quantity released
+    """
+    holds = StockHold.objects.filter(reference=reference)
+    if store_id is not None:
+        holds = holds.filter(inventory__store_id=store_id)
+    _, released = _release_rows(holds)
+    return released
+
+
+def extend_holds(reference, store_id=None, ttl_seconds=None):
+    """
+    Push back the expiry of a cart's holds.
+
+    Returns:
+        tuple: (holds extended, new expires_at)
+    """
+    expires_at = timezone.now() + hold_ttl(ttl_seconds)
+    holds = StockHold.objects.filter(reference=reference)
+    if store_id is not None:
+        holds = holds.filter(inventory__store_id=store_id)
+    return holds.update(expires_at=expires_at), expires_at
+
+
+def release_expired_holds(batch_size=DEFAULT_SWEEP_BATCH_SIZE, now=None, inventory_ids=None):
+    """
+    Release holds past their expiry, ``batch_size`` holds per transaction.
+
+    ``inventory_ids`` limits the sweep to those rows (used to free stock lazily
+    when a sale runs into expired holds).
+
+    Returns:
+        int: Number of holds released
+    """
+    now = now or timezone.now()
+    expired = StockHold.objects.filter(expires_at__lte=now)
+    if inventory_ids is not None:
+        expired = expired.filter(inventory_id__in=inventory_ids)
+
+    total = 0
+    while True:
+        batch_ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+        # Expiry is re-checked under the lock, in case a hold was extended meanwhile
+        released, _ = _release_rows(expired.filter(id__in=batch_ids))
+        total += released
+        if len(batch_ids) < batch_size:
+            break
+
+    if total:
+        logger.info(f"Released {total} expired stock holds")
+    return total
@@ -0,0 +1,126 @@
+"""
+Indexed item catalog search.
+
+Items are matched on name, SKU and HSN code with token-prefix matching
+("wid" finds "Blue Widget") and ranked by relevance:
+
+- PostgreSQL: GIN index on to_tsvector('simple', name || sku || hsn_code),
+  queried with a prefix tsquery and ranked with ts_rank
+- SQLite: FTS5 external-content table ``items_search`` kept in sync by
+  triggers, queried with MATCH and ranked with bm25
+- Anything else (or SQLite built without FTS5): icontains fallback
+
+The index objects are created by migration 0008_item_search_index.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+
+from apps.items.models import Item
+
+logger = logging.getLogger(__name__)
+
+# Fields covered by the search index (keep in sync with migration 0008_item_search_index)
+SEARCH_FIELDS = ('name', 'sku', 'hsn_code')
+SEARCH_CONFIG = 'simple'
+SQLITE_SEARCH_TABLE = 'items_search'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_sqlite_fts_available = None
+
+
+class _FtsRank(Func):
+    """bm25 relevance of one item row for an FTS5 MATCH expression (higher is better)"""
+    template = f"(SELECT -bm25({SQLITE_SEARCH_TABLE}) FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH %(expressions)s)"
+    arg_joiner = ' AND rowid = '
+    output_field = FloatField()
+
+    def __init__(self, match):
+        super().__init__(Value(match), F('id'))
+
+
+def _tokenize(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _search_backend():
+    global _sqlite_fts_available
+
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        if _sqlite_fts_available is None:
+            _sqlite_fts_available = SQLITE_SEARCH_TABLE in connection.introspection.table_names()
+            if not _sqlite_fts_available:
+                logger.warning("FTS5 item search table missing, falling back to icontains search")
+        if _sqlite_fts_available:
+            return 'sqlite'
+    return None
+
+
+def _fallback_filter(query):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': query})
+    return condition
+
+
+def search_items(queryset, query):
+    """
+    Filter an Item queryset to items matching ``query``, annotated with ``search_rank``.
+
+    Higher ``search_rank`` means a better match; callers decide whether to order by it.
+    """
+    query = (query or '').strip()
+    tokens = _tokenize(query)
+    backend = _search_backend()
+
+    if not tokens or backend is None:
+        return queryset.filter(_fallback_filter(query)).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    if backend == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        # Same expression as the GIN index, so the planner can use it
+        vector = SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+        tsquery = SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens), search_type='raw', config=SEARCH_CONFIG
+        )
+        return queryset.alias(search_vector=vector).filter(search_vector=tsquery).annotate(
+            search_rank=SearchRank(vector, tsquery)
+        )
+
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH %s", [match])
+    ).annotate(
+        search_rank=_FtsRank(match)
+    )
+
+
+def search_inventory(queryset, query):
+    """
+    Filter a StoreInventory queryset by item search or company name.
+
+    Matching items are resolved through the item search index as a semi-join, and
+    each row is annotated with its item's ``search_rank``.
+    """
+    from apps.companies.models import Company
+
+    query = (query or '').strip()
+    matching_items = search_items(Item.objects.all(), query)
+
+    condition = (
+        Q(item_id__in=matching_items.values('id')) |
+        Q(company_id__in=Company.objects.filter(name__icontains=query).values('id'))
+    )
+
+    item_rank = matching_items.filter(pk=OuterRef('item_id')).values('search_rank')[:1]
+    return queryset.filter(condition).annotate(
+        search_rank=Subquery(item_rank, output_field=FloatField())
+    )
@@ -0,0 +1,417 @@
+"""
+Atomic stock mutation service.
+
+Every writer of StoreInventory.quantity goes through this module. Quantity
+changes are applied as conditional SQL updates (quantity = quantity + delta
+WHERE quantity - reserved_quantity >= -delta) together with the matching
+InventoryTransaction ledger row, so concurrent writers never lose updates,
+never oversell and never take stock that is held for a cart (see
+reservations).
+
+On PostgreSQL the update and the ledger insert are issued as a single
+statement (data-modifying CTE). Other backends run the same conditional
+update followed by the insert inside one atomic block.
+"""
+import logging
+import random
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional, Tuple
+
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from apps.items.models import StoreInventory, InventoryTransaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFLICT_ATTEMPTS = 5
+CONFLICT_BACKOFF_SECONDS = 0.05
+# serialization_failure, deadlock_detected, lock_not_available
+LOCK_CONFLICT_SQLSTATES = {'40001', '40P01', '55P03'}
+
+
+class InsufficientStockError(Exception):
+    """Raised when a decrement would take an inventory row below its held (reserved) quantity"""
+
+    def __init__(self, inventory, requested, available):
+        self.inventory = inventory
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f"Insufficient inventory. Available: {available}, Requested: {requested}"
+        )
+
+
+class StockConflictError(Exception):
+    """Raised when a compare-and-swap stock update keeps losing to concurrent writers"""
+    pass
+
+
+def _to_decimal(value) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def parse_unit_cost(value) -> Optional[Decimal]:
+    """
+    Validate a purchase cost per unit from user input.
+
+    Returns:
+        Decimal or None: The cost rounded to paise, or None when it is blank
+
+    Raises:
+        ValueError: If the cost is not a number or is negative
+    """
+    if value in (None, ''):
+        return None
+    try:
+        unit_cost = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'Invalid unit_cost value: {value}')
+    if not unit_cost.is_finite() or unit_cost < 0:
+        raise ValueError(f'unit_cost must be zero or greater (got {unit_cost})')
+    return unit_cost.quantize(Decimal('0.01'))
+
+
+def latest_unit_costs(inventory_ids) -> Dict[int, Decimal]:
+    """
+    Cost of the newest costed receipt of each inventory row.
+
+    Stock moved out of a row carries this cost to its destination, so the
+    receiving row can be valued. Rows without any costed receipt are left out.
+    """
+    newest_cost = InventoryTransaction.objects.filter(
+        inventory_id=OuterRef('pk'), unit_cost__isnull=False
+    ).order_by('-id').values('unit_cost')[:1]
+    return {
+        inventory_id: unit_cost
+        for inventory_id, unit_cost in StoreInventory.objects.filter(id__in=inventory_ids).annotate(
+            last_cost=Subquery(newest_cost)
+        ).values_list('id', 'last_cost')
+        if unit_cost is not None
+    }
+
+
+def _update_postgres(inventory_id, delta, now, transaction_type, ledger_quantity, notes,
+                     min_quantity=None, expected_quantity=None, unit_cost=None):
+    """Conditional update + ledger insert in one round trip using a CTE"""
+    inventory_table = connection.ops.quote_name(StoreInventory._meta.db_table)
+    ledger_table = connection.ops.quote_name(InventoryTransaction._meta.db_table)
+
+    conditions = ''
+    update_params = [delta, now, inventory_id]
+    if min_quantity is not None:
+        conditions += ' AND quantity - reserved_quantity >= %s'
+        update_params.append(min_quantity)
+    if expected_quantity is not None:
+        conditions += ' AND quantity = %s'
+        update_params.append(expected_quantity)
+
+    sql = f"""
+        WITH updated AS (
+            UPDATE {inventory_table}
+            SET quantity = quantity + %s, last_updated = %s
+            WHERE id = %s{conditions}
+            RETURNING id, quantity
+        ), ledger AS (
+            INSERT INTO {ledger_table} (inventory_id, transaction_type, quantity, unit_cost, notes, created_at)
+            SELECT id, %s, %s, %s, %s, %s FROM updated
+            RETURNING id
+        )
+        SELECT updated.quantity, ledger.id FROM updated CROSS JOIN ledger
+    """
+    params = update_params + [transaction_type, ledger_quantity, unit_cost, notes, now]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    new_quantity, transaction_id = row
+    ledger_entry = InventoryTransaction(
+        id=transaction_id,
+        inventory_id=inventory_id,
+        transaction_type=transaction_type,
+        quantity=ledger_quantity,
+        unit_cost=unit_cost,
+        notes=notes,
+        created_at=now,
+    )
+    return new_quantity, ledger_entry
+
+
+def _update_generic(inventory_id, delta, now, transaction_type, ledger_quantity, notes,
+                    min_quantity=None, expected_quantity=None, unit_cost=None):
+    """Conditional update followed by the ledger insert inside one atomic block"""
+    with transaction.atomic():
+        queryset = StoreInventory.objects.filter(pk=inventory_id)
+        if min_quantity is not None:
+            queryset = queryset.filter(quantity__gte=F('reserved_quantity') + min_quantity)
+        if expected_quantity is not None:
+            queryset = queryset.filter(quantity=expected_quantity)
+
+        if not queryset.update(quantity=F('quantity') + delta, last_updated=now):
+            return None
+
+        ledger_entry = InventoryTransaction.objects.create(
+            inventory_id=inventory_id,
+            transaction_type=transaction_type,
+            quantity=ledger_quantity,
+            unit_cost=unit_cost,
+            notes=notes,
+        )
+        new_quantity = StoreInventory.objects.filter(pk=inventory_id).values_list('quantity', flat=True).get()
+
+    return new_quantity, ledger_entry
+
+
+def _conditional_update(inventory, delta, transaction_type, ledger_quantity, notes,
+                        min_quantity=None, expected_quantity=None, unit_cost=None):
+    now = timezone.now()
+    update = _update_postgres if connection.vendor == 'postgresql' else _update_generic
+    result = update(
+        inventory.pk, delta, now, transaction_type, ledger_quantity, notes,
+        min_quantity=min_quantity, expected_quantity=expected_quantity, unit_cost=unit_cost
+    )
+    if result is None:
+        return None
+
+    new_quantity, ledger_entry = result
+    inventory.quantity = new_quantity
+    inventory.last_updated = now
+    ledger_entry.inventory = inventory
+    return ledger_entry
+
+
+def lock_inventory_rows(queryset):
+    """
+    Lock the queryset's StoreInventory rows in ascending id order and return them.
+
+    Every multi-row stock writer locks in this order, so concurrent writers
+    queue on their first common row instead of deadlocking. Only the inventory
+    rows are locked, not rows joined in by ``select_related``. Must run inside
+    a transaction.
+    """
+    return list(queryset.order_by('id').select_for_update(
+        of=('self',) if connection.features.has_select_for_update_of else ()
+    ))
+
+
+def is_lock_conflict(error):
+    """Whether a database error is a deadlock / serialization / lock timeout worth retrying"""
+    if not isinstance(error, OperationalError):
+        return False
+    cause = error.__cause__
+    if getattr(cause, 'pgcode', None) in LOCK_CONFLICT_SQLSTATES:
+        return True
+    # SQLite reports a busy database instead of blocking
+    return 'database is locked' in str(error)
+
+
+def retry_on_conflict(func, max_attempts=DEFAULT_CONFLICT_ATTEMPTS, base_delay=CONFLICT_BACKOFF_SECONDS,
+                      retry_if=is_lock_conflict):
+    """
+    Call ``func`` (which opens its own transaction) and retry it on lock conflicts.
+
+    Retries back off exponentially from ``base_delay`` with jitter. Nothing is
+    retried inside an outer transaction, since only the outermost block can be
+    rolled back and run again.
+
+    Raises:
+        DatabaseError: The last conflict once ``max_attempts`` calls failed, or any other error
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return func()
+        except DatabaseError as e:
+            if attempt == max_attempts or connection.in_atomic_block or not retry_if(e):
+                raise
+            delay = base_delay * 2 ** (attempt - 1)
+            logger.info(f"Retrying after conflict (attempt {attempt}/{max_attempts}): {e}")
+            time.sleep(random.uniform(delay / 2, delay * 3 / 2))
+
+
+def _inventory_rows(keys, lock=False):
+    """Fetch the StoreInventory rows for (store_id, item_id, company_id) keys in one query"""
+    store_ids = {key[0] for key in keys}
+    item_ids = {key[1] for key in keys}
+    company_ids = {key[2] for key in keys}
+
+    queryset = StoreInventory.objects.filter(
+        store_id__in=store_ids, item_id__in=item_ids, company_id__in=company_ids
+    ).order_by('id')
+    if lock:
+        queryset = queryset.select_for_update()
+
+    rows = {}
+    for inventory in queryset:
+        key = (inventory.store_id, inventory.item_id, inventory.company_id)
+        if key in keys:
+            rows[key] = inventory
+    return rows
+
+
+def _ensure_inventory_rows(keys):
+    """Bulk-create zero-quantity StoreInventory rows for missing (store_id, item_id, company_id) keys"""
+    if not keys:
+        return
+    # Insert in key order so concurrent creators take unique-index locks in the same order
+    StoreInventory.objects.bulk_create(
+        [
+            StoreInventory(store_id=store_id, item_id=item_id, company_id=company_id, quantity=Decimal('0.00'))
+            for store_id, item_id, company_id in sorted(keys)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _available(inventory_id):
+    """Available-to-promise quantity of a row: on hand minus what carts hold"""
+    quantity, reserved = StoreInventory.objects.filter(pk=inventory_id).values_list(
+        'quantity', 'reserved_quantity'
+    ).get()
+    return quantity - reserved
+
+
+def _release_expired(inventory_id):
+    """Release the row's expired holds; returns whether any stock was freed"""
+    from .reservations import release_expired_holds
+    return release_expired_holds(inventory_ids=[inventory_id]) > 0
+
+
+def apply_stock_delta(inventory: StoreInventory, delta, transaction_type: str,
+                      notes: Optional[str] = None, ledger_quantity=None,
+                      allow_negative: bool = False, unit_cost=None) -> InventoryTransaction:
+    """
+    Atomically add ``delta`` (negative to deduct) to an inventory row and record it in the ledger.
+
+    Deductions may only take stock that is not held for a cart: the guard is
+    ``quantity - reserved_quantity >= requested``. Expired holds in the way are
+    released and the deduction tried once more.
+
+    Args:
+        inventory: StoreInventory row to change. Its ``quantity`` is refreshed from the database.
+        delta: Signed quantity change
+        transaction_type: InventoryTransaction.transaction_type for the ledger row
+        notes: Ledger notes
+        ledger_quantity: Quantity to record on the ledger row (defaults to ``delta``)
+        allow_negative: Skip the "available >= requested" guard on deductions
+        unit_cost: Purchase cost per unit to record on receipts (for valuation)
+
+    Returns:
+        InventoryTransaction: The ledger row written together with the update
+
+    Raises:
+        InsufficientStockError: If a deduction exceeds the available-to-promise quantity
+    """
+    delta = _to_decimal(delta)
+    ledger_quantity = delta if ledger_quantity is None else _to_decimal(ledger_quantity)
+    min_quantity = -delta if delta < 0 and not allow_negative else None
+
+    unit_cost = None if unit_cost is None else _to_decimal(unit_cost)
+
+    def update():
+        return _conditional_update(
+            inventory, delta, transaction_type, ledger_quantity, notes,
+            min_quantity=min_quantity, unit_cost=unit_cost
+        )
+
+    ledger_entry = update()
+    if ledger_entry is None and _release_expired(inventory.pk):
+        ledger_entry = update()
+    if ledger_entry is None:
+        inventory.quantity = StoreInventory.objects.filter(pk=inventory.pk).values_list('quantity', flat=True).first()
+        raise InsufficientStockError(inventory, -delta, _available(inventory.pk))
+
+    return ledger_entry
+
+
+def set_stock_level(inventory: StoreInventory, new_quantity, notes: Optional[str] = None,
+                    max_attempts: int = 5, unit_cost=None) -> Tuple[Decimal, Optional[InventoryTransaction]]:
+    """
+    Set an inventory row to an absolute quantity using compare-and-swap.
+
+    The ledger records the change as 'add' or 'remove' with the absolute difference,
+    and ``notes`` is suffixed with the old and new quantities. A row is never
+    set below the quantity its (unexpired) holds reserve. ``unit_cost`` is
+    recorded when the level goes up.
+
+    Returns:
+        tuple: (old_quantity, InventoryTransaction or None if the quantity was unchanged)
+
+    Raises:
+        InsufficientStockError: If ``new_quantity`` is below the row's reserved quantity
+        StockConflictError: If concurrent writers keep changing the row for ``max_attempts`` tries
+    """
+    new_quantity = _to_decimal(new_quantity)
+    unit_cost = None if unit_cost is None else _to_decimal(unit_cost)
+    released_expired = False
+
+    for attempt in range(max_attempts):
+        old_quantity, reserved = StoreInventory.objects.filter(pk=inventory.pk).values_list(
+            'quantity', 'reserved_quantity'
+        ).get()
+        change = new_quantity - old_quantity
+        if change == 0:
+            inventory.quantity = old_quantity
+            return old_quantity, None
+
+        if new_quantity < reserved:
+            if not released_expired:
+                released_expired = True
+                if _release_expired(inventory.pk):
+                    continue
+            inventory.quantity = old_quantity
+            raise InsufficientStockError(inventory, -change, old_quantity - reserved)
+
+        # Decreases also re-check the holds, which may have grown since the read
+        ledger_entry = _conditional_update(
+            inventory,
+            change,
+            'add' if change > 0 else 'remove',
+            abs(change),
+            f"{notes} (Old: {old_quantity}, New: {new_quantity})",
+            min_quantity=-change if change < 0 else None,
+            expected_quantity=old_quantity,
+            unit_cost=unit_cost if change > 0 else None,
+        )
+        if ledger_entry is not None:
+            return old_quantity, ledger_entry
+
+        logger.debug(f"Stock level CAS conflict on inventory {inventory.pk} (attempt {attempt + 1})")
+
+    raise StockConflictError(f"Inventory {inventory.pk} changed concurrently, please retry")
+
+
+def transfer_stock(source: StoreInventory, destination: StoreInventory, quantity,
+                   outgoing_notes: Optional[str] = None,
+                   incoming_notes: Optional[str] = None) -> Tuple[InventoryTransaction, InventoryTransaction]:
+    """
+    Move stock between two inventory rows as one unit of work.
+
+    The source is decremented first with the conditional guard, so an
+    insufficient source (net of its holds) aborts the transfer before the
+    destination changes. The incoming ledger row carries the source's latest
+    receipt cost.
+
+    Returns:
+        tuple: (outgoing InventoryTransaction, incoming InventoryTransaction)
+
+    Raises:
+        InsufficientStockError: If the source does not hold ``quantity``
+    """
+    quantity = _to_decimal(quantity)
+
+    with transaction.atomic():
+        outgoing = apply_stock_delta(source, -quantity, 'transfer', notes=outgoing_notes)
+        incoming = apply_stock_delta(
+            destination, quantity, 'transfer', notes=incoming_notes,
+            unit_cost=latest_unit_costs([source.pk]).get(source.pk)
+        )
+
+    return outgoing, incoming
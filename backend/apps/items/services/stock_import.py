@@ -0,0 +1,215 @@
+"""
+Bulk stock import from CSV or JSONL.
+
+Each record is ``sku, store, company, quantity[, mode][, unit_cost]`` where
+``store`` and ``company`` are ids and ``mode`` is ``add`` (default) or ``set``. Files are
+parsed as a stream and applied in chunks; per chunk the importer:
+
+1. Resolves SKUs, stores, companies and item/company links in batched queries
+2. Bulk-creates missing StoreInventory rows and locks the chunk's rows in id order
+3. Applies the rows in file order in memory, writes the final quantities with
+   one bulk UPDATE and bulk-inserts one ledger row per changed input row.
+   A ``set`` below the quantity held for carts (reserved_quantity) is rejected.
+
+Each chunk commits on its own, so a bad row never aborts the whole file; it is
+reported with its line number instead.
+"""
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.items.models import Item, StoreInventory, InventoryTransaction
+from .stock import _ensure_inventory_rows, _inventory_rows, parse_unit_cost
+
+logger = logging.getLogger(__name__)
+
+IMPORT_MODES = ('add', 'set')
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def _parse_record(record):
+    """Validate one raw record; returns (sku, store_id, company_id, quantity, mode, unit_cost)"""
+    sku = str(record.get('sku') or '').strip()
+    store = record.get('store', record.get('store_id'))
+    company = record.get('company', record.get('company_id'))
+    quantity = record.get('quantity')
+    mode = str(record.get('mode') or 'add').strip().lower()
+
+    if not sku or store in (None, '') or company in (None, '') or quantity in (None, ''):
+        raise ValueError('sku, store, company and quantity are required')
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"mode must be one of {', '.join(IMPORT_MODES)} (got {mode})")
+    try:
+        store_id = int(store)
+        company_id = int(company)
+    except (TypeError, ValueError):
+        raise ValueError('store and company must be ids')
+    try:
+        quantity = Decimal(str(quantity).strip())
+    except InvalidOperation:
+        raise ValueError(f'Invalid quantity value: {quantity}')
+    if not quantity.is_finite() or quantity < 0:
+        raise ValueError(f'Quantity must be zero or greater (got {quantity})')
+    quantity = quantity.quantize(Decimal('0.01'))
+
+    unit_cost = parse_unit_cost(record.get('unit_cost'))
+
+    return sku, store_id, company_id, quantity, mode, unit_cost
+
+
+class StockImporter:
+    """
+    Applies stock records in chunks and accumulates a per-row report.
+
+    Args:
+        owner: Restrict stores and companies to those owned by this admin (None = no restriction)
+        notes: Notes for the ledger rows
+        batch_size: Records per chunk / transaction
+    """
+
+    def __init__(self, owner=None, notes='Bulk stock import', batch_size=DEFAULT_BATCH_SIZE):
+        self.owner = owner
+        self.notes = notes
+        self.batch_size = batch_size
+        self.store_ids = {}
+        self.company_ids = {}
+        self.report = {
+            'processed': 0,
+            'imported': 0,
+            'created_inventories': 0,
+            'transactions': 0,
+            'error_count': 0,
+            'errors': [],
+        }
+
+    def _error(self, line_number, sku, message):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'row': line_number, 'sku': sku, 'error': message})
+
+    def _allowed(self, cache, queryset, ids, owner_lookup):
+        """Resolve which ids the owner may write to, caching across chunks"""
+        unknown = [i for i in ids if i not in cache]
+        if unknown:
+            queryset = queryset.filter(id__in=unknown)
+            if self.owner is not None:
+                queryset = queryset.filter(**{owner_lookup: self.owner})
+            found = set(queryset.values_list('id', flat=True))
+            for i in unknown:
+                cache[i] = i in found
+        return {i for i in ids if cache[i]}
+
+    def run(self, records):
+        """Apply an iterable of (line_number, record) pairs; returns the report dict"""
+        chunk = []
+        for line_number, record in records:
+            self.report['processed'] += 1
+            if isinstance(record, str):
+                self._error(line_number, None, record)
+                continue
+            try:
+                chunk.append((line_number, *_parse_record(record)))
+            except ValueError as e:
+                self._error(line_number, record.get('sku'), str(e))
+                continue
+            if len(chunk) >= self.batch_size:
+                self._apply_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._apply_chunk(chunk)
+        self.report['errors'].sort(key=lambda error: error['row'])
+
+        logger.info(
+            f"Stock import: {self.report['imported']} of {self.report['processed']} rows imported, "
+            f"{self.report['error_count']} errors"
+        )
+        return self.report
+
+    def _apply_chunk(self, chunk):
+        from apps.companies.models import Company
+        from apps.stores.models import Store
+
+        item_ids = dict(Item.objects.filter(sku__in={row[1] for row in chunk}).values_list('sku', 'id'))
+        stores = self._allowed(self.store_ids, Store.objects.all(), {row[2] for row in chunk}, 'company__owner')
+        companies = self._allowed(self.company_ids, Company.objects.all(), {row[3] for row in chunk}, 'owner')
+        links = set(Item.companies.through.objects.filter(
+            item_id__in=item_ids.values(), company_id__in=companies
+        ).values_list('item_id', 'company_id'))
+
+        valid = []
+        for line_number, sku, store_id, company_id, quantity, mode, unit_cost in chunk:
+            item_id = item_ids.get(sku)
+            if item_id is None:
+                self._error(line_number, sku, 'Unknown SKU')
+            elif store_id not in stores:
+                self._error(line_number, sku, 'Store not found or access denied')
+            elif company_id not in companies:
+                self._error(line_number, sku, 'Company not found or access denied')
+            elif (item_id, company_id) not in links:
+                self._error(line_number, sku, 'Item is not associated with this company')
+            else:
+                valid.append((line_number, sku, (store_id, item_id, company_id), quantity, mode, unit_cost))
+        if not valid:
+            return
+
+        keys = {key for _, _, key, _, _, _ in valid}
+        with transaction.atomic():
+            existing = _inventory_rows(keys)
+            _ensure_inventory_rows(keys - existing.keys())
+            rows = _inventory_rows(keys, lock=True)
+
+            ledger_entries = []
+            applied = 0
+            for line_number, sku, key, quantity, mode, unit_cost in valid:
+                inventory = rows[key]
+                old_quantity = inventory.quantity
+                if mode == 'add':
+                    inventory.quantity = old_quantity + quantity
+                    if quantity:
+                        ledger_entries.append(InventoryTransaction(
+                            inventory=inventory, transaction_type='add', quantity=quantity,
+                            unit_cost=unit_cost, notes=self.notes
+                        ))
+                elif quantity < inventory.reserved_quantity:
+                    self._error(
+                        line_number, sku,
+                        f'Quantity {quantity} is below the {inventory.reserved_quantity} held for carts'
+                    )
+                    continue
+                else:
+                    inventory.quantity = quantity
+                    change = quantity - old_quantity
+                    if change:
+                        ledger_entries.append(InventoryTransaction(
+                            inventory=inventory,
+                            transaction_type='add' if change > 0 else 'remove',
+                            quantity=abs(change),
+                            unit_cost=unit_cost if change > 0 else None,
+                            notes=f"{self.notes} (Old: {old_quantity}, New: {quantity})",
+                        ))
+                applied += 1
+
+            # Rows are locked, so writing absolute quantities cannot lose concurrent updates
+            now = timezone.now()
+            for inventory in rows.values():
+                inventory.last_updated = now
+            StoreInventory.objects.bulk_update(rows.values(), ['quantity', 'last_updated'])
+            InventoryTransaction.objects.bulk_create(ledger_entries)
+
+        self.report['imported'] += applied
+        self.report['created_inventories'] += len(keys - existing.keys())
+        self.report['transactions'] += len(ledger_entries)
+
+
+def import_stock(records, owner=None, notes='Bulk stock import', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Import stock records; see StockImporter.
+
+    Returns:
+        dict: processed / imported / created_inventories / transactions counts,
+        error_count and up to MAX_REPORTED_ERRORS ``{'row', 'sku', 'error'}`` entries
+    """
+    return StockImporter(owner=owner, notes=notes, batch_size=batch_size).run(records)
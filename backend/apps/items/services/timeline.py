@@ -0,0 +1,119 @@
+"""
+Unified transfer timeline: transfer batches and standalone transfers in one feed.
+
+One UNION ALL query over both tables returns the (created_at, kind, id) keys of
+a page in ``-created_at, -kind, -id`` order; a keyset cursor on that tuple makes
+every page cost the same as the first. The page's batches are then loaded with
+their transfer count and quantity total aggregated in SQL, and its standalone
+transfers with their relations, in one query each.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import CharField, Count, Exists, OuterRef, Prefetch, Q, Sum, Value
+
+from apps.items.models import InventoryTransfer, TransferBatch
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+KIND_CODES = {'batch': 'b', 'transfer': 't'}
+
+
+class TimelineCursorError(Exception):
+    """Raised for a malformed timeline cursor"""
+    pass
+
+
+def encode_cursor(created_at, kind, pk):
+    return f"{(created_at - EPOCH) // MICROSECOND}:{KIND_CODES[kind]}:{pk}"
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, kind, id)"""
+    try:
+        micros, code, pk = cursor.split(':')
+        kind = {code_: kind_ for kind_, code_ in KIND_CODES.items()}[code]
+        return EPOCH + int(micros) * MICROSECOND, kind, int(pk)
+    except (AttributeError, KeyError, ValueError, OverflowError):
+        raise TimelineCursorError(f'Invalid cursor: {cursor}')
+
+
+def _after(queryset, kind, cursor):
+    """Rows of one branch that sort after the cursor in descending (created_at, kind, id) order"""
+    if cursor is None:
+        return queryset
+    created_at, cursor_kind, pk = cursor
+    if kind < cursor_kind:
+        return queryset.filter(created_at__lte=created_at)
+    if kind > cursor_kind:
+        return queryset.filter(created_at__lt=created_at)
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+
+def transfer_timeline(company_ids, store_id=None, item_id=None, date_from=None, date_to=None,
+                      cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of the transfer timeline between stores of the given companies.
+
+    Args:
+        company_ids: Companies whose stores both ends of a transfer must belong to
+        store_id: Only transfers from or to this store
+        item_id: Only standalone transfers of this item and batches containing it
+        date_from / date_to: Aware datetimes bounding created_at (inclusive)
+        cursor: Cursor returned with the previous page
+        page_size: Entries per page (max MAX_PAGE_SIZE)
+
+    Returns:
+        tuple: (list of (kind, TransferBatch or InventoryTransfer), next cursor or None)
+
+    Raises:
+        TimelineCursorError: If ``cursor`` is malformed
+    """
+    page_size = max(min(page_size, MAX_PAGE_SIZE), 1)
+    position = decode_cursor(cursor) if cursor else None
+
+    scope = Q(from_store__company__id__in=company_ids, to_store__company__id__in=company_ids)
+    if store_id:
+        scope &= Q(from_store_id=store_id) | Q(to_store_id=store_id)
+    if date_from:
+        scope &= Q(created_at__gte=date_from)
+    if date_to:
+        scope &= Q(created_at__lte=date_to)
+
+    batches = TransferBatch.objects.filter(scope)
+    standalone = InventoryTransfer.objects.filter(scope, batch__isnull=True)
+    if item_id:
+        batches = batches.filter(Exists(InventoryTransfer.objects.filter(batch=OuterRef('pk'), item_id=item_id)))
+        standalone = standalone.filter(item_id=item_id)
+
+    def keys(queryset, kind):
+        return _after(queryset, kind, position).annotate(
+            kind=Value(kind, output_field=CharField())
+        ).order_by().values_list('created_at', 'kind', 'id')
+
+    rows = list(
+        keys(batches, 'batch').union(keys(standalone, 'transfer'), all=True)
+        .order_by('-created_at', '-kind', '-id')[:page_size + 1]
+    )
+    next_cursor = encode_cursor(*rows[page_size - 1]) if len(rows) > page_size else None
+    rows = rows[:page_size]
+
+    batch_ids = [pk for _, kind, pk in rows if kind == 'batch']
+    transfer_ids = [pk for _, kind, pk in rows if kind == 'transfer']
+    related = ('item', 'company', 'from_store', 'to_store', 'initiated_by')
+
+    loaded = {}
+    if batch_ids:
+        for batch in TransferBatch.objects.filter(id__in=batch_ids).annotate(
+            transfer_count=Count('transfers'),
+            total_items=Sum('transfers__quantity'),
+        ).select_related('from_store', 'to_store', 'initiated_by').prefetch_related(
+            Prefetch('transfers', queryset=InventoryTransfer.objects.select_related(*related))
+        ):
+            loaded[('batch', batch.id)] = batch
+    if transfer_ids:
+        for transfer in InventoryTransfer.objects.filter(id__in=transfer_ids).select_related(*related):
+            loaded[('transfer', transfer.id)] = transfer
+
+    return [(kind, loaded[(kind, pk)]) for _, kind, pk in rows], next_cursor
@@ -0,0 +1,194 @@
+"""
+Set-based inventory transfer engine.
+
+Applies any number of InventoryTransfer lines in a constant number of
+statements, regardless of batch size:
+
+1. Read every source/destination row involved in one query and validate
+   that each source exists
+2. Bulk-create missing destination rows (ignore_conflicts, in key order)
+3. Lock all involved rows with one SELECT ... FOR UPDATE ordered by id, so
+   concurrent batches always acquire locks in the same order and cannot deadlock
+4. Re-validate quantities under the lock (lines for the same source are summed).
+   A source can only give what is not held for a cart (quantity - reserved_quantity).
+5. Apply every quantity change with a single CASE update, then bulk-insert
+   the transfer rows and the outgoing/incoming ledger rows. Incoming rows
+   carry the source's latest receipt cost, so transferred stock keeps a cost
+   for valuation.
+
+Either every line is applied or none is.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import List
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from apps.items.models import Item, StoreInventory, InventoryTransaction, InventoryTransfer
+from .reservations import release_expired_holds
+from .stock import _ensure_inventory_rows, _inventory_rows, latest_unit_costs
+
+logger = logging.getLogger(__name__)
+
+
+class TransferValidationError(Exception):
+    """
+    Raised when one or more transfer lines cannot be applied.
+
+    ``errors`` holds one dict per failing line with ``item_index``, ``item_id``,
+    optionally ``item_name``, and ``error``.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(errors[0]['error'] if len(errors) == 1 else f'{len(errors)} transfer lines failed validation')
+
+
+def _source_key(transfer):
+    return (transfer.from_store_id, transfer.item_id, transfer.company_id)
+
+
+def _destination_key(transfer):
+    return (transfer.to_store_id, transfer.item_id, transfer.company_id)
+
+
+def _insufficient_errors(transfers, rows):
+    """Per-line errors for sources whose unheld stock is short of the total quantity requested from them"""
+    requested = defaultdict(Decimal)
+    for transfer in transfers:
+        requested[_source_key(transfer)] += transfer.quantity
+
+    errors = []
+    for index, transfer in enumerate(transfers):
+        source = rows[_source_key(transfer)]
+        total = requested[_source_key(transfer)]
+        available = source.quantity - source.reserved_quantity
+        if available < total:
+            errors.append({
+                'item_index': index,
+                'item_id': transfer.item_id,
+                'error': f"Insufficient inventory. Available: {available}, Requested: {total}",
+            })
+    return errors
+
+
+def _with_item_names(errors):
+    names = dict(Item.objects.filter(id__in={e['item_id'] for e in errors}).values_list('id', 'name'))
+    for error in errors:
+        if error['item_id'] in names:
+            error['item_name'] = names[error['item_id']]
+    return errors
+
+
+def execute_transfers(transfers: List[InventoryTransfer], note_prefix: str = 'Transfer') -> List[InventoryTransfer]:
+    """
+    Apply inventory transfers as one all-or-nothing, set-based unit of work.
+
+    Args:
+        transfers: InventoryTransfer instances with store/item/company/quantity set.
+            Unsaved instances are bulk-inserted; saved ones are updated in place.
+        note_prefix: Ledger note prefix, e.g. "Transfer" -> "Transfer to <store>: <notes>"
+
+    Returns:
+        list: The transfers, marked completed
+
+    Raises:
+        TransferValidationError: If a source row is missing or too little of its stock is free of holds
+    """
+    from apps.stores.models import Store
+
+    if not transfers:
+        return []
+
+    for transfer in transfers:
+        transfer.quantity = Decimal(str(transfer.quantity))
+
+    source_keys = {_source_key(t) for t in transfers}
+    destination_keys = {_destination_key(t) for t in transfers}
+
+    with transaction.atomic():
+        # Unlocked read: reject missing sources before creating anything
+        rows = _inventory_rows(source_keys | destination_keys)
+        errors = [
+            {
+                'item_index': index,
+                'item_id': transfer.item_id,
+                'error': 'Item not found in source store for this company',
+            }
+            for index, transfer in enumerate(transfers)
+            if _source_key(transfer) not in rows
+        ]
+        if not errors:
+            errors = _insufficient_errors(transfers, rows)
+            # Expired holds still counted on a short source are released, then re-checked
+            short = [rows[_source_key(transfers[e['item_index']])] for e in errors]
+            if any(source.reserved_quantity > 0 for source in short) and release_expired_holds(
+                inventory_ids=[source.pk for source in short]
+            ):
+                rows = _inventory_rows(source_keys | destination_keys)
+                errors = _insufficient_errors(transfers, rows)
+        if errors:
+            raise TransferValidationError(_with_item_names(errors))
+
+        _ensure_inventory_rows(destination_keys - rows.keys())
+
+        # Lock every involved row in id order, then re-check against locked quantities
+        rows = _inventory_rows(source_keys | destination_keys, lock=True)
+        errors = _insufficient_errors(transfers, rows)
+        if errors:
+            raise TransferValidationError(_with_item_names(errors))
+
+        now = timezone.now()
+        store_names = dict(Store.objects.filter(
+            id__in={t.from_store_id for t in transfers} | {t.to_store_id for t in transfers}
+        ).values_list('id', 'name'))
+
+        source_costs = latest_unit_costs({rows[_source_key(t)].id for t in transfers})
+
+        deltas = defaultdict(Decimal)
+        ledger_entries = []
+        for transfer in transfers:
+            source = rows[_source_key(transfer)]
+            destination = rows[_destination_key(transfer)]
+            deltas[source.id] -= transfer.quantity
+            deltas[destination.id] += transfer.quantity
+            ledger_entries.append(InventoryTransaction(
+                inventory=source,
+                transaction_type='transfer',
+                quantity=-transfer.quantity,
+                notes=f'{note_prefix} to {store_names.get(transfer.to_store_id)}: {transfer.notes or ""}',
+            ))
+            ledger_entries.append(InventoryTransaction(
+                inventory=destination,
+                transaction_type='transfer',
+                quantity=transfer.quantity,
+                unit_cost=source_costs.get(source.id),
+                notes=f'{note_prefix} from {store_names.get(transfer.from_store_id)}: {transfer.notes or ""}',
+            ))
+
+        StoreInventory.objects.filter(id__in=deltas.keys()).update(
+            quantity=F('quantity') + Case(
+                *[When(id=inventory_id, then=Value(delta)) for inventory_id, delta in deltas.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+            last_updated=now,
+        )
+
+        for transfer in transfers:
+            transfer.status = 'completed'
+            transfer.completed_at = now
+
+        new_transfers = [t for t in transfers if t.pk is None]
+        if new_transfers:
+            InventoryTransfer.objects.bulk_create(new_transfers)
+        existing_ids = [t.pk for t in transfers if t.pk is not None]
+        if existing_ids:
+            InventoryTransfer.objects.filter(id__in=existing_ids).update(status='completed', completed_at=now)
+
+        InventoryTransaction.objects.bulk_create(ledger_entries)
+
+    logger.info(f"Applied {len(transfers)} transfer line(s) across {len(deltas)} inventory rows")
+    return transfers
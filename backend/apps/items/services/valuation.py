@@ -0,0 +1,178 @@
+"""
+Stock valuation (weighted-average and FIFO) over the inventory ledger.
+
+For a batch of StoreInventory rows and a valuation date:
+
+- Closing quantities come from the checkpointed point-in-time stock
+  (services.ledger.stock_as_of), so opening stock that never went through
+  the ledger is still counted
+- Receipts (ledger rows that increased stock) are streamed from the database
+  newest-first in fixed-size columnar chunks and folded into per-inventory
+  NumPy accumulators; no per-row Python loop runs over the ledger
+- Weighted average: the closing quantity's costed share x (costed receipt
+  value / costed receipt quantity)
+- FIFO: the closing quantity is made up of the newest receipt layers, so each
+  chunk takes min(remaining closing quantity, layer quantity) per layer
+
+Stock without a known cost is not priced: closing quantity that comes from
+receipts without a unit_cost (or, for the weighted average, their share of
+the pool), and closing stock not covered by any receipt (opening stock,
+direct edits), is reported as ``uncosted_quantity`` instead. Memory stays
+bounded by the chunk size and the number of inventory rows in the batch,
+whatever the ledger size.
+"""
+import logging
+from decimal import Decimal
+from itertools import islice
+
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from apps.items.models import InventoryTransaction
+from .ledger import signed_quantity, stock_as_of
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('weighted_average', 'fifo')
+DEFAULT_CHUNK_ROWS = 100000
+CENT = Decimal('0.01')
+
+
+class ValuationError(Exception):
+    """Raised for an unknown valuation method"""
+    pass
+
+
+def _receipt_chunks(inventory_ids, at, chunk_rows):
+    """
+    Yield (N, 3) float arrays of (inventory_id, quantity, unit_cost), by inventory then newest first.
+
+    A receipt without a unit_cost has NaN as its cost.
+    """
+    receipts = InventoryTransaction.objects.filter(
+        inventory_id__in=inventory_ids, created_at__lte=at
+    ).annotate(
+        change=signed_quantity(),
+    ).filter(
+        change__gt=0
+    ).annotate(
+        change_value=Cast('change', FloatField()),
+        cost=Cast('unit_cost', FloatField()),
+    ).order_by('inventory_id', '-id').values_list('inventory_id', 'change_value', 'cost')
+
+    rows = receipts.iterator(chunk_size=chunk_rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        # None (no unit_cost) becomes NaN
+        yield np.array(chunk, dtype=np.float64)
+
+
+def value_inventories(inventories, at, method='weighted_average', chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Value StoreInventory rows as of ``at``.
+
+    Args:
+        inventories: StoreInventory instances
+        at: Aware datetime to value at
+        method: 'weighted_average' or 'fifo'
+        chunk_rows: Ledger rows loaded per chunk
+
+    Returns:
+        dict: inventory id -> {'quantity', 'uncosted_quantity', 'unit_cost', 'value'}.
+        ``value`` covers the costed quantity only and ``unit_cost`` is its average
+        (None when nothing is costed).
+
+    Raises:
+        ValuationError: If ``method`` is unknown
+    """
+    if method not in METHODS:
+        raise ValuationError(f"method must be one of {', '.join(METHODS)}")
+
+    inventories = sorted(inventories, key=lambda inventory: inventory.id)
+    if not inventories:
+        return {}
+
+    ids = np.array([inventory.id for inventory in inventories], dtype=np.float64)
+    closing_by_id = stock_as_of([inventory.id for inventory in inventories], at)
+    closing = np.array([float(closing_by_id[inventory.id]) for inventory in inventories])
+    closing = np.maximum(closing, 0.0)
+
+    count = len(inventories)
+    receipt_quantity = np.zeros(count)
+    costed_quantity = np.zeros(count)
+    receipt_value = np.zeros(count)
+    fifo_value = np.zeros(count)
+    fifo_uncosted = np.zeros(count)
+
+    for chunk in _receipt_chunks(ids.astype(np.int64).tolist(), at, chunk_rows):
+        position = np.searchsorted(ids, chunk[:, 0])
+        quantity = chunk[:, 1]
+        costed = ~np.isnan(chunk[:, 2])
+        cost = np.where(costed, chunk[:, 2], 0.0)
+
+        if method == 'fifo':
+            # Quantity of newer receipts of the same inventory before each row:
+            # carried from earlier chunks plus the running sum within this chunk
+            running = np.cumsum(quantity)
+            index = np.arange(len(quantity))
+            group_start = np.r_[True, position[1:] != position[:-1]]
+            start = np.maximum.accumulate(np.where(group_start, index, 0))
+            newer = receipt_quantity[position] + running - quantity - (running[start] - quantity[start])
+            taken = np.clip(closing[position] - newer, 0.0, quantity)
+            fifo_value += np.bincount(position, weights=taken * cost, minlength=count)
+            fifo_uncosted += np.bincount(position, weights=np.where(costed, 0.0, taken), minlength=count)
+
+        receipt_quantity += np.bincount(position, weights=quantity, minlength=count)
+        costed_quantity += np.bincount(position, weights=np.where(costed, quantity, 0.0), minlength=count)
+        receipt_value += np.bincount(position, weights=quantity * cost, minlength=count)
+
+    covered = np.minimum(closing, receipt_quantity)
+    if method == 'fifo':
+        value = fifo_value
+        costed_closing = covered - fifo_uncosted
+    else:
+        # The pool's costed share of the closing stock, at the costed receipts' average
+        costed_closing = covered * np.divide(
+            costed_quantity, receipt_quantity, out=np.zeros(count), where=receipt_quantity > 0
+        )
+        average_cost = np.divide(receipt_value, costed_quantity, out=np.zeros(count), where=costed_quantity > 0)
+        value = costed_closing * average_cost
+
+    costed_closing = np.maximum(costed_closing, 0.0)
+    uncosted = closing - costed_closing
+    unit_cost = np.divide(value, costed_closing, out=np.zeros(count), where=costed_closing > 0)
+
+    def to_decimal(number):
+        return Decimal(repr(float(number))).quantize(CENT)
+
+    return {
+        inventory.id: {
+            'quantity': closing_by_id[inventory.id],
+            'uncosted_quantity': to_decimal(uncosted[i]),
+            'unit_cost': to_decimal(unit_cost[i]) if costed_closing[i] > 0 else None,
+            'value': to_decimal(value[i]),
+        }
+        for i, inventory in enumerate(inventories)
+    }
+
+
+def iter_valuation(queryset, at, method='weighted_average', batch_size=2000, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Value every row of a StoreInventory queryset in id-ordered batches.
+
+    Yields:
+        tuple: (StoreInventory, valuation dict) per row
+    """
+    queryset = queryset.select_related('item', 'store', 'company').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        valuations = value_inventories(batch, at, method=method, chunk_rows=chunk_rows)
+        for inventory in batch:
+            yield inventory, valuations[inventory.id]
@@ -0,0 +1,870 @@
+"""
+Tests for the stock services and inventory APIs
+
+To run these tests:
+    python manage.py test apps.items
+"""
+from datetime import timedelta
+from decimal import Decimal
+from threading import Thread
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.companies.models import Company
+from apps.items.models import (
+    InventoryCheckpoint, InventoryTransaction, InventoryTransfer, Item, StockHold, StoreInventory, TransferBatch
+)
+from apps.items.services import (
+    InsufficientStockError,
+    StockConflictError,
+    TransferValidationError,
+    apply_stock_delta,
+    execute_transfers,
+    import_catalog,
+    import_stock,
+    place_holds,
+    release_expired_holds,
+    retry_on_conflict,
+    set_stock_level,
+    stock_as_of,
+    take_checkpoints,
+    transfer_stock,
+    value_inventories,
+)
+from apps.items.services import stock as stock_service
+from apps.items.services.valuation import DEFAULT_CHUNK_ROWS
+from apps.stores.models import Store, StoreUser
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class StockFixtures:
+    """An admin with one company, two stores, a store user on the first and stocked items"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role='admin'
+        )
+        self.company = Company.objects.create(
+            name='Acme', address='1 Road', city='Patna', state='Bihar', pincode='800001',
+            phone='1234567890', email='acme@example.com', gstin='10AAAAA0000A1Z5', pan='AAAAA0000A',
+            owner=self.admin
+        )
+        self.store = self._store('Main')
+        self.other_store = self._store('Branch')
+        self.store_user = User.objects.create_user(
+            email='counter@example.com', username='counter', password='pass', role='store_user',
+            created_by=self.admin
+        )
+        StoreUser.objects.create(user=self.store_user, store=self.store)
+
+        self.items = []
+        for index in range(3):
+            item = Item.objects.create(
+                name=f'Widget {index}', sku=f'SKU{index}', hsn_code='1234', price=Decimal('10'),
+                tax_rate=Decimal('18')
+            )
+            item.companies.add(self.company)
+            self.items.append(item)
+        self.inventory = self._inventory(self.items[0], quantity='9')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _store(self, name):
+        return Store.objects.create(
+            name=name, address='1 Road', city='Patna', state='Bihar', pincode='800001', phone='1234567890',
+            company=self.company
+        )
+
+    def _inventory(self, item, store=None, quantity='0'):
+        return StoreInventory.objects.create(
+            item=item, store=store or self.store, company=self.company, quantity=Decimal(quantity),
+            min_stock_level=Decimal('3')
+        )
+
+    def _refresh(self, inventory):
+        inventory.refresh_from_db()
+        return inventory
+
+    def _transfer(self, quantity, item=None):
+        return InventoryTransfer(
+            from_store=self.store, to_store=self.other_store, item=item or self.items[0], company=self.company,
+            quantity=Decimal(quantity), initiated_by=self.admin
+        )
+
+
+class StockTestCase(StockFixtures, TestCase):
+    pass
+
+
+class StockServiceTests(StockTestCase):
+    """Conditional stock updates always write their ledger row and never oversell"""
+
+    def test_delta_writes_ledger_row(self):
+        ledger_entry = apply_stock_delta(self.inventory, Decimal('-4'), 'sale', notes='Counter sale')
+        self.assertEqual(self.inventory.quantity, Decimal('5'))
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('5'))
+        stored = InventoryTransaction.objects.get(pk=ledger_entry.pk)
+        self.assertEqual((stored.transaction_type, stored.quantity, stored.notes), ('sale', Decimal('-4'), 'Counter sale'))
+
+    def test_insufficient_deduction_changes_nothing(self):
+        with self.assertRaises(InsufficientStockError) as raised:
+            apply_stock_delta(self.inventory, Decimal('-10'), 'remove')
+        self.assertEqual((raised.exception.requested, raised.exception.available), (Decimal('10'), Decimal('9')))
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_allow_negative(self):
+        apply_stock_delta(self.inventory, Decimal('-10'), 'adjustment', allow_negative=True)
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('-1'))
+
+    def test_ledger_quantity_and_unit_cost(self):
+        ledger_entry = apply_stock_delta(
+            self.inventory, Decimal('-3'), 'remove', ledger_quantity=Decimal('3'), unit_cost='2.50'
+        )
+        stored = InventoryTransaction.objects.get(pk=ledger_entry.pk)
+        self.assertEqual((stored.quantity, stored.unit_cost), (Decimal('3'), Decimal('2.50')))
+
+    def test_set_records_difference(self):
+        old_quantity, ledger_entry = set_stock_level(self.inventory, Decimal('4'), notes='Count')
+        self.assertEqual(old_quantity, Decimal('9'))
+        stored = InventoryTransaction.objects.get(pk=ledger_entry.pk)
+        self.assertEqual((stored.transaction_type, stored.quantity), ('remove', Decimal('5')))
+        self.assertEqual(stored.notes, 'Count (Old: 9.00, New: 4)')
+
+        old_quantity, ledger_entry = set_stock_level(self.inventory, Decimal('12'), notes='Count')
+        self.assertEqual(InventoryTransaction.objects.get(pk=ledger_entry.pk).transaction_type, 'add')
+
+    def test_unchanged_set_writes_nothing(self):
+        self.assertEqual(set_stock_level(self.inventory, Decimal('9')), (Decimal('9'), None))
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_set_retries_after_concurrent_write(self):
+        real_update = stock_service._conditional_update
+        calls = []
+
+        def racing_update(*args, **kwargs):
+            if not calls:
+                # Another writer gets in between the read and the compare-and-swap
+                StoreInventory.objects.filter(pk=self.inventory.pk).update(quantity=Decimal('10'))
+            calls.append(kwargs)
+            return real_update(*args, **kwargs)
+
+        with mock.patch.object(stock_service, '_conditional_update', side_effect=racing_update):
+            old_quantity, _ = set_stock_level(self.inventory, Decimal('4'))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(old_quantity, Decimal('10'))
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('4'))
+
+    def test_set_gives_up_on_constant_conflicts(self):
+        with mock.patch.object(stock_service, '_conditional_update', return_value=None):
+            with self.assertRaises(StockConflictError):
+                set_stock_level(self.inventory, Decimal('4'), max_attempts=3)
+
+    def test_transfer_is_all_or_nothing(self):
+        destination = self._inventory(self.items[0], store=self.other_store)
+        with self.assertRaises(InsufficientStockError):
+            transfer_stock(self.inventory, destination, Decimal('10'))
+        self.assertEqual(self._refresh(destination).quantity, 0)
+
+        transfer_stock(self.inventory, destination, Decimal('4'))
+        self.assertEqual((self._refresh(self.inventory).quantity, self._refresh(destination).quantity),
+                         (Decimal('5'), Decimal('4')))
+        self.assertEqual(InventoryTransaction.objects.filter(transaction_type='transfer').count(), 2)
+
+
+class RetryOnConflictTests(TransactionTestCase):
+    """Lock conflicts are retried with backoff, outside transactions only"""
+
+    def _flaky(self, failures, error):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise error
+            return 'done'
+        return func, calls
+
+    def test_retries_lock_conflicts(self):
+        func, calls = self._flaky(2, OperationalError('database is locked'))
+        self.assertEqual(retry_on_conflict(func, base_delay=0), 'done')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_max_attempts(self):
+        func, calls = self._flaky(5, OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            retry_on_conflict(func, max_attempts=3, base_delay=0)
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        func, calls = self._flaky(1, IntegrityError('duplicate key'))
+        with self.assertRaises(IntegrityError):
+            retry_on_conflict(func, base_delay=0)
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_inside_a_transaction(self):
+        func, calls = self._flaky(1, OperationalError('database is locked'))
+        with self.assertRaises(OperationalError), transaction.atomic():
+            retry_on_conflict(func, base_delay=0)
+        self.assertEqual(len(calls), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs concurrent database connections')
+class ConcurrentStockTests(StockFixtures, TransactionTestCase):
+    """Racing deductions on one row sell exactly the stock there is"""
+
+    def _race(self, workers, target, refused=InsufficientStockError):
+        results = []
+
+        def run():
+            try:
+                target()
+                results.append(True)
+            except refused:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=run) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_deductions_never_oversell(self):
+        results = self._race(20, lambda: apply_stock_delta(
+            StoreInventory.objects.get(pk=self.inventory.pk), Decimal('-1'), 'sale'
+        ))
+        self.assertEqual(results.count(True), 9)
+        self.assertEqual(self._refresh(self.inventory).quantity, 0)
+        self.assertEqual(InventoryTransaction.objects.filter(inventory=self.inventory).count(), 9)
+
+    def test_concurrent_transfers_never_oversell(self):
+        results = self._race(10, lambda: execute_transfers([self._transfer('2')]), TransferValidationError)
+        self.assertEqual(results.count(True), 4)
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('1'))
+        destination = StoreInventory.objects.get(store=self.other_store, item=self.items[0])
+        self.assertEqual(destination.quantity, Decimal('8'))
+
+
+@override_settings(INVOICE_PDF_BACKGROUND_RENDER=False)
+class BatchTransferTests(StockTestCase):
+    """Transfer batches are validated as a whole and applied all-or-nothing"""
+
+    def test_lines_for_one_source_are_summed(self):
+        with self.assertRaises(TransferValidationError) as raised:
+            execute_transfers([self._transfer('5'), self._transfer('5')])
+        self.assertEqual([error['item_index'] for error in raised.exception.errors], [0, 1])
+        self.assertIn('Available: 9', raised.exception.errors[0]['error'])
+        self.assertIn('Requested: 10', raised.exception.errors[0]['error'])
+
+        execute_transfers([self._transfer('4'), self._transfer('4')])
+        destination = StoreInventory.objects.get(store=self.other_store, item=self.items[0])
+        self.assertEqual((self._refresh(self.inventory).quantity, destination.quantity), (Decimal('1'), Decimal('8')))
+
+    def test_one_failing_line_applies_nothing(self):
+        with self.assertRaises(TransferValidationError) as raised:
+            execute_transfers([self._transfer('2'), self._transfer('1', item=self.items[1])])
+        error, = raised.exception.errors
+        self.assertEqual((error['item_index'], error['item_name']), (1, 'Widget 1'))
+        self.assertEqual(error['error'], 'Item not found in source store for this company')
+
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+        self.assertFalse(StoreInventory.objects.filter(store=self.other_store).exists())
+        self.assertFalse(InventoryTransfer.objects.exists())
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_creates_destination_and_ledger_rows(self):
+        transfer, = execute_transfers([self._transfer('3')])
+        self.assertEqual(transfer.status, 'completed')
+        self.assertIsNotNone(transfer.pk)
+
+        destination = StoreInventory.objects.get(store=self.other_store, item=self.items[0])
+        self.assertEqual(destination.quantity, Decimal('3'))
+        ledger = dict(InventoryTransaction.objects.values_list('inventory_id', 'quantity'))
+        self.assertEqual(ledger, {self.inventory.pk: Decimal('-3'), destination.pk: Decimal('3')})
+        self.assertTrue(InventoryTransaction.objects.filter(notes__startswith='Transfer to Branch').exists())
+
+    def test_saved_transfers_are_completed_in_place(self):
+        transfer = self._transfer('2')
+        transfer.save()
+        execute_transfers([transfer])
+        transfer.refresh_from_db()
+        self.assertEqual(transfer.status, 'completed')
+        self.assertEqual(InventoryTransfer.objects.count(), 1)
+
+    def test_batch_api(self):
+        payload = {
+            'from_store_id': self.store.pk, 'to_store_id': self.other_store.pk,
+            'items': [{'item_id': self.items[0].pk, 'company_id': self.company.pk, 'quantity': '10'}],
+        }
+        response = self.client.post('/api/items/transfers/batch/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Transfer validation failed')
+        self.assertFalse(TransferBatch.objects.exists())
+
+        payload['items'][0]['quantity'] = '6'
+        response = self.client.post('/api/items/transfers/batch/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        batch = TransferBatch.objects.get(batch_id=response.data['batch_id'])
+        self.assertEqual((batch.status, batch.transfers.count()), ('completed', 1))
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('3'))
+
+
+class StockAsOfTests(StockTestCase):
+    """Point-in-time stock is the nearest checkpoint plus (or minus) the ledger tail"""
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.day = timedelta(days=1)
+
+    def _ledger(self, delta, transaction_type, days_ago, **kwargs):
+        ledger_entry = apply_stock_delta(self.inventory, Decimal(delta), transaction_type, **kwargs)
+        InventoryTransaction.objects.filter(pk=ledger_entry.pk).update(created_at=self.now - days_ago * self.day)
+
+    def _checkpoint(self, days_ago):
+        take_checkpoints()
+        InventoryCheckpoint.objects.filter(taken_at__gt=self.now - self.day).update(
+            taken_at=self.now - days_ago * self.day
+        )
+
+    def _as_of(self, days_ago):
+        return stock_as_of([self.inventory.pk], self.now - days_ago * self.day)[self.inventory.pk]
+
+    def test_replays_backward_from_live_row(self):
+        self._ledger('5', 'add', days_ago=3)
+        # Older writers recorded sales with a positive quantity
+        self._ledger('-4', 'sale', days_ago=2, ledger_quantity=Decimal('4'))
+        self._ledger('-2', 'remove', days_ago=1)
+
+        self.assertEqual(
+            [self._as_of(days_ago) for days_ago in (4, 2.5, 1.5, 0.5)],
+            [Decimal('9'), Decimal('14'), Decimal('10'), Decimal('8')]
+        )
+
+    def test_replays_from_nearest_checkpoint(self):
+        self._ledger('5', 'add', days_ago=3)
+        self._checkpoint(days_ago=2.5)
+        self._ledger('-4', 'sale', days_ago=2)
+        self._ledger('-2', 'remove', days_ago=1)
+        # A direct edit without a ledger row only shows in the live quantity
+        StoreInventory.objects.filter(pk=self.inventory.pk).update(quantity=F('quantity') + 100)
+
+        self.assertEqual(self._as_of(0.5), Decimal('8'))
+        self.assertEqual(self._as_of(4), Decimal('9'))
+        self.assertEqual(self._as_of(2.5), Decimal('14'))
+
+    def test_checkpoints_only_rows_with_new_activity(self):
+        self.assertEqual(take_checkpoints(), 1)
+        self.assertEqual(take_checkpoints(), 0)
+
+        apply_stock_delta(self.inventory, Decimal('1'), 'add')
+        self.assertEqual(take_checkpoints(min_transactions=2), 0)
+        apply_stock_delta(self.inventory, Decimal('1'), 'add')
+        self.assertEqual(take_checkpoints(min_transactions=2), 1)
+
+        checkpoint = InventoryCheckpoint.objects.latest('id')
+        self.assertEqual(checkpoint.quantity, Decimal('11'))
+        self.assertEqual(checkpoint.last_transaction_id, InventoryTransaction.objects.latest('id').id)
+
+    def test_as_of_api(self):
+        self._ledger('5', 'add', days_ago=3)
+        url = f'/api/items/inventory/store/{self.store.pk}/as-of/'
+        response = self.client.get(url, {'at': (self.now - 4 * self.day).date().isoformat()})
+        self.assertEqual(response.status_code, 200)
+        row, = response.data['results']
+        self.assertEqual((row['quantity'], row['current_quantity']), (Decimal('9'), Decimal('14')))
+
+        self.assertEqual(self.client.get(url, {'at': 'yesterday'}).status_code, 400)
+
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        url = f'/api/items/inventory/store/{self.other_store.pk}/as-of/'
+        self.assertEqual(client.get(url, {'at': self.now.isoformat()}).status_code, 403)
+
+
+class StockValuationTests(StockTestCase):
+    """Receipts are valued at their recorded cost; stock without one is reported, not priced"""
+
+    def setUp(self):
+        super().setUp()
+        self.layered = self._inventory(self.items[1])
+        self.mixed = self._inventory(self.items[2])
+        # Interleaved, so every chunk size splits the inventories' receipts differently
+        receipts = [
+            (self.layered, '5', '2'), (self.mixed, '3', '5'), (self.layered, '4', '3'),
+            (self.inventory, '1', '2'), (self.mixed, '2', None), (self.layered, '6', '4'), (self.mixed, '1', '7'),
+        ]
+        for inventory, quantity, unit_cost in receipts:
+            apply_stock_delta(inventory, Decimal(quantity), 'add', unit_cost=unit_cost)
+        apply_stock_delta(self.layered, Decimal('-1'), 'remove')
+        apply_stock_delta(self.mixed, Decimal('-2'), 'sale')
+
+    def _value(self, method, chunk_rows=DEFAULT_CHUNK_ROWS):
+        inventories = [self.inventory, self.layered, self.mixed]
+        valuations = value_inventories(inventories, timezone.now(), method=method, chunk_rows=chunk_rows)
+        return [
+            tuple(valuations[inventory.pk][key] for key in ('quantity', 'uncosted_quantity', 'unit_cost', 'value'))
+            for inventory in inventories
+        ]
+
+    def test_fifo_takes_newest_layers_across_chunks(self):
+        expected = [
+            # 9 opening units have no cost; the 1 received is costed
+            (Decimal('10'), Decimal('9'), Decimal('2'), Decimal('2')),
+            # 6 @ 4 + 4 @ 3 + 4 of 5 @ 2
+            (Decimal('14'), Decimal('0'), Decimal('3.14'), Decimal('44')),
+            # 1 @ 7 + 2 uncosted + 1 of 3 @ 5
+            (Decimal('4'), Decimal('2'), Decimal('6'), Decimal('12')),
+        ]
+        for chunk_rows in (1, 2, 3, 4, DEFAULT_CHUNK_ROWS):
+            with self.subTest(chunk_rows=chunk_rows):
+                self.assertEqual(self._value('fifo', chunk_rows), expected)
+
+    def test_weighted_average_values_costed_share(self):
+        expected = [
+            (Decimal('10'), Decimal('9'), Decimal('2'), Decimal('2')),
+            # 14 of 15 received, at 46 / 15
+            (Decimal('14'), Decimal('0'), Decimal('3.07'), Decimal('42.93')),
+            # 4 of 6 received were costed (at 22 / 4), so 4 x 4/6 of the closing stock is costed
+            (Decimal('4'), Decimal('1.33'), Decimal('5.5'), Decimal('14.67')),
+        ]
+        for chunk_rows in (1, 3, DEFAULT_CHUNK_ROWS):
+            with self.subTest(chunk_rows=chunk_rows):
+                self.assertEqual(self._value('weighted_average', chunk_rows), expected)
+
+    def test_stock_without_any_cost(self):
+        apply_stock_delta(self.inventory, Decimal('-10'), 'remove')
+        valuation = value_inventories([self._inventory(self.items[0], store=self.other_store, quantity='5')],
+                                      timezone.now())
+        self.assertEqual(list(valuation.values())[0], {
+            'quantity': Decimal('5'), 'uncosted_quantity': Decimal('5'), 'unit_cost': None, 'value': Decimal('0'),
+        })
+
+    def test_transfers_carry_source_cost(self):
+        execute_transfers([self._transfer('3', item=self.items[1])])
+        incoming = InventoryTransaction.objects.filter(
+            inventory__store=self.other_store, quantity__gt=0
+        ).get()
+        self.assertEqual(incoming.unit_cost, Decimal('4'))
+
+        destination = StoreInventory.objects.get(store=self.other_store, item=self.items[1])
+        source = self._inventory(self.items[2], store=self.other_store)
+        _, incoming = transfer_stock(destination, source, Decimal('1'))
+        self.assertEqual(incoming.unit_cost, Decimal('4'))
+        self.assertEqual(value_inventories([destination], timezone.now(), method='fifo')[destination.pk]['value'],
+                         Decimal('8'))
+
+    def test_admin_stock_endpoints_record_cost(self):
+        payload = {
+            'item_id': self.items[0].pk, 'store_id': self.store.pk, 'company_id': self.company.pk, 'quantity': '2',
+        }
+        response = self.client.post('/api/items/admin/add-stock/', {**payload, 'unit_cost': '-1'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/items/admin/add-stock/', {**payload, 'unit_cost': '2.5'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(InventoryTransaction.objects.get(pk=response.data['transaction_id']).unit_cost, Decimal('2.50'))
+
+        response = self.client.post(
+            '/api/items/admin/update-stock/', {**payload, 'quantity': '20', 'unit_cost': '3'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(InventoryTransaction.objects.get(pk=response.data['transaction_id']).unit_cost, Decimal('3'))
+
+    def test_valuation_api_reports_uncosted_quantity(self):
+        response = self.client.get('/api/items/inventory/valuation/', {'method': 'fifo'})
+        self.assertEqual(response.status_code, 200)
+        rows = {row['inventory_id']: row for row in response.data['results']}
+        self.assertEqual(rows[self.mixed.pk]['uncosted_quantity'], Decimal('2'))
+        self.assertEqual(response.data['page_value'], Decimal('58'))
+
+
+class StockHoldTests(StockTestCase):
+    """Stock held for carts cannot be taken by any other deduction"""
+
+    def setUp(self):
+        super().setUp()
+        self.reference, _, _ = place_holds([(self.inventory, 8)], reference='cart-1')
+        self._refresh(self.inventory)
+
+    def test_hold_reserves_available_quantity(self):
+        self.assertEqual(self.inventory.quantity, Decimal('9'))
+        self.assertEqual(self.inventory.reserved_quantity, Decimal('8'))
+        self.assertEqual(self.inventory.available_quantity, Decimal('1'))
+
+    def test_holds_are_all_or_nothing(self):
+        second = self._inventory(self.items[1], quantity='5')
+        with self.assertRaises(InsufficientStockError):
+            place_holds([(second, 2), (self.inventory, 2)])
+        self.assertEqual(self._refresh(second).reserved_quantity, 0)
+        self.assertEqual(StockHold.objects.count(), 1)
+
+    def test_transfer_cannot_take_held_stock(self):
+        with self.assertRaises(TransferValidationError) as raised:
+            execute_transfers([self._transfer('9')])
+        self.assertIn('Available: 1', raised.exception.errors[0]['error'])
+        self._refresh(self.inventory)
+        self.assertEqual(self.inventory.quantity, Decimal('9'))
+        self.assertFalse(StoreInventory.objects.filter(store=self.other_store, quantity__gt=0).exists())
+
+    def test_transfer_of_unheld_stock(self):
+        execute_transfers([self._transfer('1')])
+        self.assertEqual(self._refresh(self.inventory).available_quantity, 0)
+
+    def test_remove_cannot_take_held_stock(self):
+        with self.assertRaises(InsufficientStockError) as raised:
+            apply_stock_delta(self.inventory, Decimal('-2'), 'remove')
+        self.assertEqual(raised.exception.available, Decimal('1'))
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+        self.assertFalse(InventoryTransaction.objects.filter(transaction_type='remove').exists())
+
+    def test_remove_through_api_reports_held_stock(self):
+        response = self.client.post('/api/items/transactions/', {
+            'inventory': self.inventory.pk, 'transaction_type': 'remove', 'quantity': '2'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+
+    def test_set_cannot_go_below_held_stock(self):
+        with self.assertRaises(InsufficientStockError):
+            set_stock_level(self.inventory, Decimal('7'), notes='Count')
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+
+        old_quantity, _ = set_stock_level(self.inventory, Decimal('8'), notes='Count')
+        self.assertEqual(old_quantity, Decimal('9'))
+        self.assertEqual(self._refresh(self.inventory).available_quantity, 0)
+
+    def test_import_set_cannot_go_below_held_stock(self):
+        report = import_stock([
+            (2, {'sku': 'SKU0', 'store': self.store.pk, 'company': self.company.pk, 'quantity': '5', 'mode': 'set'})
+        ], owner=self.admin)
+        self.assertEqual(report['imported'], 0)
+        self.assertEqual(report['error_count'], 1)
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+
+    def test_expired_holds_are_released_for_deductions(self):
+        StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        apply_stock_delta(self.inventory, Decimal('-9'), 'remove')
+        self._refresh(self.inventory)
+        self.assertEqual((self.inventory.quantity, self.inventory.reserved_quantity), (0, 0))
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_sweep_releases_expired_holds(self):
+        StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(release_expired_holds(batch_size=1), 1)
+        self.assertEqual(self._refresh(self.inventory).reserved_quantity, 0)
+
+    def _invoice(self, quantity, **extra):
+        return self.client.post('/api/invoices/', {
+            'store': self.store.pk, 'company': self.company.pk,
+            'items': [{'item': self.items[0].pk, 'quantity': quantity, 'unit_price': 10, 'tax_rate': 18}],
+            **extra
+        }, format='json')
+
+    def test_invoice_cannot_sell_held_stock(self):
+        response = self._invoice(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._refresh(self.inventory).quantity, Decimal('9'))
+
+    def test_invoice_consumes_its_own_holds(self):
+        response = self._invoice(9, hold_reference=self.reference)
+        self.assertEqual(response.status_code, 201, response.data)
+        self._refresh(self.inventory)
+        self.assertEqual((self.inventory.quantity, self.inventory.reserved_quantity), (0, 0))
+        self.assertFalse(StockHold.objects.filter(reference=self.reference).exists())
+
+    def test_holds_api(self):
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        url = f'/api/items/inventory/store/{self.store.pk}/holds/'
+
+        response = client.post(url, {'items': [{'item': self.items[0].pk, 'quantity': '2'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['available_quantity'], Decimal('1'))
+
+        response = client.post(url, {'items': [{'item': self.items[0].pk, 'quantity': '1'}], 'reference': 'cart-1'},
+                               format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['holds'][0]['available_quantity'], Decimal('0'))
+
+        detail = f'{url}cart-1/'
+        self.assertEqual(len(client.get(detail).data['holds']), 2)
+        response = client.patch(detail, {'ttl_seconds': 3600}, format='json')
+        self.assertEqual(response.data['extended'], 2)
+        self.assertGreater(response.data['expires_at'], timezone.now() + timedelta(minutes=59))
+
+        response = client.delete(detail)
+        self.assertEqual(response.data['released'], {self.inventory.pk: Decimal('9')})
+        self.assertEqual(self._refresh(self.inventory).reserved_quantity, 0)
+        self.assertEqual(client.get(detail).status_code, 404)
+
+    def test_holds_api_validates_lines(self):
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        url = f'/api/items/inventory/store/{self.store.pk}/holds/'
+
+        for items in ([1, 2], 'abc', [{'item': 'x', 'quantity': '1'}], [{'quantity': '1'}]):
+            response = client.post(url, {'items': items}, format='json')
+            self.assertEqual(response.status_code, 400, items)
+
+        # Ids sent as strings match like numbers
+        line = {'item': str(self.items[0].pk), 'company': str(self.company.pk), 'quantity': '1'}
+        response = client.post(url, {'items': [line]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['holds'][0]['inventory'], self.inventory.pk)
+
+    def test_holds_api_checks_store_access(self):
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        response = client.post(
+            f'/api/items/inventory/store/{self.other_store.pk}/holds/',
+            {'items': [{'item': self.items[0].pk, 'quantity': '1'}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class CatalogImportTests(StockTestCase):
+    """Catalog imports upsert items in the admin's own catalog only"""
+
+    def setUp(self):
+        super().setUp()
+        self.other_admin = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role='admin'
+        )
+        self.other_company = Company.objects.create(
+            name='Other', address='1 Road', city='Patna', state='Bihar', pincode='800001',
+            phone='1234567890', email='other@example.com', gstin='10BBBBB0000B1Z5', pan='BBBBB0000B',
+            owner=self.other_admin
+        )
+
+    def _import(self, *records, owner=None, **kwargs):
+        return import_catalog(
+            enumerate(records, start=2), owner=owner or self.admin, default_companies=[self.company.pk], **kwargs
+        )
+
+    def test_creates_and_updates(self):
+        report = self._import(
+            {'sku': 'SKU0', 'name': 'Renamed', 'price': '12.5'},
+            {'sku': 'NEW1', 'name': 'New', 'price': '3', 'unit': 'kg'},
+            {'sku': 'NEW2', 'name': 'Bad', 'price': '-1'},
+            batch_size=1
+        )
+        self.assertEqual((report['created'], report['updated'], report['links_created']), (1, 1, 1))
+        self.assertEqual([error['row'] for error in report['errors']], [4])
+        self.assertEqual(Item.objects.get(sku='SKU0').name, 'Renamed')
+        new = Item.objects.get(sku='NEW1')
+        self.assertEqual((new.price, new.unit), (Decimal('3.00'), 'kg'))
+        self.assertEqual(list(new.companies.all()), [self.company])
+
+    def test_other_catalogs_are_not_touched(self):
+        report = self._import({'sku': 'NEW1', 'name': 'New', 'price': '1'}, owner=self.other_admin)
+        self.assertEqual(report['errors'][0]['error'], 'Company not found or access denied')
+        report = self._import({'sku': 'SKU0', 'name': 'Taken', 'price': '1', 'companies': [self.other_company.pk]},
+                              owner=self.other_admin)
+        self.assertEqual(report['errors'][0]['error'], 'SKU belongs to another catalog')
+        self.assertEqual(Item.objects.get(sku='SKU0').name, 'Widget 0')
+
+    def test_sku_created_meanwhile_is_not_overwritten(self):
+        create = Item.objects.bulk_create
+
+        def racing_create(objs, **kwargs):
+            # Another admin's import commits the same new SKU between the lookup and the insert
+            if kwargs.get('ignore_conflicts'):
+                other = Item.objects.create(sku='NEW1', name='Theirs', price=Decimal('9'))
+                other.companies.add(self.other_company)
+            return create(objs, **kwargs)
+
+        with mock.patch.object(Item.objects, 'bulk_create', side_effect=racing_create):
+            report = self._import(
+                {'sku': 'NEW1', 'name': 'Mine', 'price': '1'},
+                {'sku': 'NEW2', 'name': 'Also mine', 'price': '1'}
+            )
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'][0]['sku'], 'NEW1')
+        theirs = Item.objects.get(sku='NEW1')
+        self.assertEqual(theirs.name, 'Theirs')
+        self.assertEqual(list(theirs.companies.all()), [self.other_company])
+        self.assertEqual(list(Item.objects.get(sku='NEW2').companies.all()), [self.company])
+
+
+class LowStockTests(StockTestCase):
+    """/inventory/low-stock/ stays a plain list unless pagination or counts are asked for"""
+
+    url = '/api/items/inventory/low-stock/'
+
+    def setUp(self):
+        super().setUp()
+        self._inventory(self.items[1], quantity='1')
+        self._inventory(self.items[2], store=self.other_store, quantity='2')
+
+    def test_default_response_is_a_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 2)
+
+    def test_cursor_pagination_is_opt_in(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        # Keyset pages are never counted
+        self.assertIsNone(response.data['count'])
+        self.assertIsNotNone(response.data['next'])
+        self.assertNotIn('store_counts', response.data)
+
+        following = self.client.get(response.data['next'])
+        self.assertEqual(len(following.data['results']), 1)
+        self.assertIsNone(following.data['next'])
+
+    def test_numbered_pages_are_counted(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_store_counts_are_opt_in(self):
+        response = self.client.get(self.url, {'store_counts': 'true'})
+        counts = {entry['store_id']: entry['low_stock_count'] for entry in response.data['store_counts']}
+        self.assertEqual(counts, {self.store.pk: 1, self.other_store.pk: 1})
+
+    def test_store_user_sees_own_stores_only(self):
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        response = client.get(self.url)
+        self.assertEqual([row['store'] for row in response.data], [self.store.pk])
+
+
+class ConditionalListTests(StockTestCase):
+    """Polled list endpoints answer 304 only while their ETag still matches"""
+
+    url = '/api/items/inventory/low-stock/'
+
+    def setUp(self):
+        super().setUp()
+        self.low = self._inventory(self.items[1], quantity='1')
+        self._inventory(self.items[2], quantity='2')
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_delete_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.low.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_no_last_modified_on_lists(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+
+        # A delete leaves the newest timestamp unchanged; If-Modified-Since must not hide it
+        self.low.delete()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+
+class InventorySearchTests(StockTestCase):
+    """Inventory searches match item name / SKU prefixes and the company name"""
+
+    def setUp(self):
+        super().setUp()
+        self.store_client = APIClient()
+        self.store_client.force_authenticate(self.store_user)
+
+    def _item_ids(self, response):
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return {row['item'] for row in rows}
+
+    def test_item_prefix_search(self):
+        response = self.store_client.get('/api/items/', {'search': 'widg'})
+        self.assertEqual(self._item_ids(response), {self.items[0].pk})
+        response = self.store_client.get('/api/items/', {'search': 'nomatch'})
+        self.assertEqual(self._item_ids(response), set())
+
+    def test_store_user_search_matches_company_name(self):
+        response = self.store_client.get('/api/items/', {'search': 'acm'})
+        self.assertEqual(self._item_ids(response), {self.items[0].pk})
+
+    def test_store_inventory_search_matches_company_name(self):
+        response = self.client.get(f'/api/items/inventory/store/{self.store.pk}/', {'search': 'acme'})
+        self.assertEqual(self._item_ids(response), {self.items[0].pk})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReorderSuggestionTests(StockTestCase):
+    """Reorder suggestions are only computed for stores the user may see"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = f'/api/items/inventory/store/{self.store.pk}/reorder-suggestions/'
+
+    def test_owner_can_refresh(self):
+        response = self.client.get(self.url, {'refresh': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['item_id'] for row in response.data['results']}, {self.items[0].pk})
+
+    def test_other_admin_cannot_refresh_or_fill_cache(self):
+        stranger = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role='admin'
+        )
+        client = APIClient()
+        client.force_authenticate(stranger)
+        self.assertEqual(client.get(self.url, {'refresh': 'true'}).status_code, 403)
+        self.assertEqual(client.get(self.url).status_code, 403)
+        self.assertIsNone(cache.get(f'reorder:store:{self.store.pk}'))
+
+    def test_store_user_limited_to_assigned_store(self):
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        self.assertEqual(client.get(self.url).status_code, 200)
+        other_url = f'/api/items/inventory/store/{self.other_store.pk}/reorder-suggestions/'
+        self.assertEqual(client.get(other_url).status_code, 403)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Ledger partitioning requires PostgreSQL')
+class LedgerPartitioningTests(StockTestCase):
+    """Rows that reached the DEFAULT partition move into the month's partition when it is created"""
+
+    def test_ensure_partitions_moves_default_rows(self):
+        from apps.items.services import convert_to_partitioned, ensure_partitions
+        from apps.items.services.partitioning import DEFAULT_PARTITION, TABLE, partition_name
+
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            # Fire the fixtures' deferred FK checks; ALTER TABLE refuses pending trigger events
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        convert_to_partitioned(months_ahead=0)
+        ledger_entry = apply_stock_delta(self.inventory, Decimal('1'), 'add')
+        future = (now.replace(day=1) + timedelta(days=100)).replace(day=15)
+        InventoryTransaction.objects.filter(pk=ledger_entry.pk).update(created_at=future)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{DEFAULT_PARTITION}"')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        created = ensure_partitions(months_ahead=4, now=now)
+        self.assertIn(partition_name(future), created)
+        self.assertEqual(ensure_partitions(months_ahead=4, now=now), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{DEFAULT_PARTITION}"')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute(f'SELECT tableoid::regclass::text FROM "{TABLE}" WHERE id = %s', [ledger_entry.pk])
+            self.assertEqual(cursor.fetchone()[0], partition_name(future))
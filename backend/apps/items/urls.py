@@ -7,12 +7,20 @@ urlpatterns = [
     path('inventory/', views.StoreInventoryListCreateView.as_view(), name='inventory-list-create'),
     path('inventory/<int:pk>/', views.StoreInventoryDetailView.as_view(), name='inventory-detail'),
     path('inventory/store/<int:store_id>/', views.store_inventory_view, name='store-inventory'),
+    path('inventory/store/<int:store_id>/as-of/', views.store_stock_as_of_view, name='store-stock-as-of'),
+    path('inventory/store/<int:store_id>/reorder-suggestions/', views.reorder_suggestions_view, name='reorder-suggestions'),
+    path('inventory/store/<int:store_id>/holds/', views.stock_holds_view, name='stock-holds'),
+    path('inventory/store/<int:store_id>/holds/<str:reference>/', views.stock_hold_detail_view, name='stock-hold-detail'),
+    path('inventory/matrix/', views.stock_matrix_view, name='stock-matrix'),
     path('inventory/low-stock/', views.low_stock_items_view, name='low-stock-items'),
+    path('inventory/valuation/', views.stock_valuation_view, name='stock-valuation'),
     path('transactions/', views.InventoryTransactionListCreateView.as_view(), name='transaction-list-create'),
     
     # Admin stock management endpoints
     path('admin/add-stock/', views.admin_add_stock_view, name='admin-add-stock'),
     path('admin/update-stock/', views.admin_update_stock_view, name='admin-update-stock'),
+    path('admin/import-stock/', views.admin_bulk_stock_import_view, name='admin-import-stock'),
+    path('admin/import-catalog/', views.admin_bulk_catalog_import_view, name='admin-import-catalog'),
     path('admin/store/<int:store_id>/stock/', views.admin_store_stock_view, name='admin-store-stock'),
     
     # Inventory transfer endpoints
@@ -1,15 +1,27 @@
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db import models
 from apps.accounts.permissions import IsAdminUser, IsStoreUser, CanAccessStore
-from .models import Item, StoreInventory, InventoryTransaction, InventoryTransfer, TransferBatch
+from inventory_system.conditional import list_validators, not_modified_response, with_validators
+from inventory_system.pagination import OptionalCursorPagination
+from .models import Item, StoreInventory, InventoryTransaction, InventoryTransfer, TransferBatch, StockHold
 from .serializers import (
-    ItemSerializer, StoreInventorySerializer, InventoryTransactionSerializer, 
+    ItemSerializer, StoreInventorySerializer, InventoryTransactionSerializer,
     ItemWithInventorySerializer, InventoryTransferSerializer, CreateInventoryTransferSerializer
 )
+from .services import (
+    ImportFileError, InsufficientStockError, StockConflictError, TransferValidationError,
+    apply_stock_delta, detect_format, execute_transfers, import_catalog, import_stock,
+    iter_uploaded_records, parse_unit_cost, set_stock_level, search_inventory, search_items, stock_as_of,
+    ValuationError, value_inventories, get_reorder_suggestions, TimelineCursorError, transfer_timeline,
+    availability_matrix, HoldValidationError, extend_holds, place_holds, release_holds
+)
+from .services.timeline import DEFAULT_PAGE_SIZE as TIMELINE_PAGE_SIZE
 
 
 class ItemListCreateView(generics.ListCreateAPIView):
@@ -21,6 +33,12 @@ class ItemListCreateView(generics.ListCreateAPIView):
         user = request.user
         
         if user.role == 'admin':
+            # Unchanged catalog: answer 304 before running the list query
+            validators = list_validators(request, Item.objects.filter(companies__owner=user), 'updated_at')
+            not_modified = not_modified_response(request, validators)
+            if not_modified:
+                return not_modified
+
             # Admin users get regular item list
             queryset = Item.objects.filter(companies__owner=user).prefetch_related('companies').distinct()
             
@@ -30,16 +48,21 @@ class ItemListCreateView(generics.ListCreateAPIView):
             page = self.paginate_queryset(queryset)
             if page is not None:
                 serializer = ItemSerializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
+                return with_validators(self.get_paginated_response(serializer.data), validators)
             
             serializer = ItemSerializer(queryset, many=True)
-            return Response(serializer.data)
+            return with_validators(Response(serializer.data), validators)
         else:
             # Store users get inventory data
             user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
             queryset = StoreInventory.objects.filter(
                 store__id__in=user_stores
             ).select_related('item', 'store', 'company')
+
+            validators = list_validators(request, queryset, 'last_updated', 'item__updated_at')
+            not_modified = not_modified_response(request, validators)
+            if not_modified:
+                return not_modified
             
             # Apply filters for StoreInventory model
             queryset = self.filter_queryset_for_inventory(queryset)
@@ -47,26 +70,24 @@ class ItemListCreateView(generics.ListCreateAPIView):
             page = self.paginate_queryset(queryset)
             if page is not None:
                 serializer = StoreInventorySerializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
+                return with_validators(self.get_paginated_response(serializer.data), validators)
             
             serializer = StoreInventorySerializer(queryset, many=True)
-            return Response(serializer.data)
+            return with_validators(Response(serializer.data), validators)
     
     def filter_queryset_for_items(self, queryset):
         """Apply filters for Item queryset"""
         # Apply search
-        search_param = self.request.query_params.get('search')
+        search_param = self.request.query_params.get('search', '').strip()
         if search_param:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search_param) |
-                models.Q(sku__icontains=search_param) |
-                models.Q(hsn_code__icontains=search_param)
-            )
+            queryset = search_items(queryset, search_param)
         
-        # Apply ordering
-        ordering_param = self.request.query_params.get('ordering', '-created_at')
+        # Apply ordering (best matches first when searching without an explicit ordering)
+        ordering_param = self.request.query_params.get('ordering')
         if ordering_param in ['name', '-name', 'price', '-price', 'created_at', '-created_at']:
             queryset = queryset.order_by(ordering_param)
+        elif search_param:
+            queryset = queryset.order_by('-search_rank', '-created_at')
         else:
             queryset = queryset.order_by('-created_at')
         
@@ -75,17 +96,16 @@ class ItemListCreateView(generics.ListCreateAPIView):
     def filter_queryset_for_inventory(self, queryset):
         """Apply filters for StoreInventory queryset"""
         # Apply search
-        search_param = self.request.query_params.get('search')
+        search_param = self.request.query_params.get('search', '').strip()
         if search_param:
-            queryset = queryset.filter(
-                models.Q(item__name__icontains=search_param) |
-                models.Q(item__sku__icontains=search_param)
-            )
+            queryset = search_inventory(queryset, search_param)
         
-        # Apply ordering
-        ordering_param = self.request.query_params.get('ordering', '-last_updated')
+        # Apply ordering (best matches first when searching without an explicit ordering)
+        ordering_param = self.request.query_params.get('ordering')
         if ordering_param in ['item__name', '-item__name', 'quantity', '-quantity', 'last_updated', '-last_updated']:
             queryset = queryset.order_by(ordering_param)
+        elif search_param:
+            queryset = queryset.order_by('-search_rank', '-last_updated')
         else:
             queryset = queryset.order_by('-last_updated')
         
@@ -140,6 +160,7 @@ class ItemDetailView(generics.RetrieveUpdateDestroyAPIView):
 class StoreInventoryListCreateView(generics.ListCreateAPIView):
     serializer_class = StoreInventorySerializer
     permission_classes = [IsStoreUser]
+    pagination_class = OptionalCursorPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['store', 'item__companies']
     search_fields = ['item__name', 'item__sku']
@@ -181,6 +202,7 @@ class StoreInventoryDetailView(generics.RetrieveUpdateDestroyAPIView):
 class InventoryTransactionListCreateView(generics.ListCreateAPIView):
     serializer_class = InventoryTransactionSerializer
     permission_classes = [IsStoreUser]
+    pagination_class = OptionalCursorPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['transaction_type', 'inventory__store']
     search_fields = ['inventory__item__name', 'notes']
@@ -191,49 +213,192 @@ class InventoryTransactionListCreateView(generics.ListCreateAPIView):
         user = self.request.user
         if user.role == 'admin':
             user_companies = user.companies.values_list('id', flat=True)
-            return InventoryTransaction.objects.filter(
+            queryset = InventoryTransaction.objects.filter(
                 inventory__item__companies__id__in=user_companies
             ).select_related('inventory__item', 'inventory__store', 'inventory__company')
         else:
             user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
-            return InventoryTransaction.objects.filter(
+            queryset = InventoryTransaction.objects.filter(
                 inventory__store__id__in=user_stores
             ).select_related('inventory__item', 'inventory__store', 'inventory__company')
+        return self.filter_created_at(queryset)
+
+    def filter_created_at(self, queryset):
+        """
+        Optional ``created_after`` / ``created_before`` bounds (ISO date or datetime).
+
+        On the monthly-partitioned ledger a created_at range lets PostgreSQL skip
+        the partitions outside it; cursor pages (created_at < cursor) prune the
+        same way.
+        """
+        try:
+            created_after = self.request.query_params.get('created_after')
+            if created_after:
+                queryset = queryset.filter(created_at__gte=_parse_as_of(created_after, end_of_day=False))
+            created_before = self.request.query_params.get('created_before')
+            if created_before:
+                queryset = queryset.filter(created_at__lte=_parse_as_of(created_before))
+        except ValueError:
+            raise ValidationError({'created_at': 'created_after and created_before must be ISO dates or datetimes'})
+        return queryset
     
     def perform_create(self, serializer):
-        transaction = serializer.save()
-        
-        inventory = transaction.inventory
-        if transaction.transaction_type in ['add', 'adjustment']:
-            if transaction.quantity > 0:
-                inventory.quantity += transaction.quantity
-            else:
-                inventory.quantity += transaction.quantity
-        elif transaction.transaction_type in ['remove', 'sale']:
-            inventory.quantity -= abs(transaction.quantity)
-        
-        inventory.save()
+        data = serializer.validated_data
+        transaction_type = data['transaction_type']
+        quantity = data['quantity']
+
+        if transaction_type in ['add', 'adjustment']:
+            delta = quantity
+        elif transaction_type in ['remove', 'sale']:
+            delta = -abs(quantity)
+        else:
+            delta = 0
+
+        # Quantity change and ledger row are written together by the stock service
+        try:
+            serializer.instance = apply_stock_delta(
+                data['inventory'],
+                delta,
+                transaction_type,
+                notes=data.get('notes'),
+                ledger_quantity=quantity,
+                unit_cost=data.get('unit_cost')
+            )
+        except InsufficientStockError as e:
+            raise ValidationError({'quantity': str(e)})
 
 
 @api_view(['GET'])
 @permission_classes([IsStoreUser])
 def low_stock_items_view(request):
+    """
+    Low-stock rows for the user's stores.
+
+    Rows with quantity <= min_stock_level live in the inventory_low_stock_idx
+    partial index, so both the rows and the counts are read from that index
+    instead of scanning every inventory row: their cost grows with the
+    low-stock rows, not the inventory. Optional ``?store=<id>`` filter.
+
+    By default every low-stock row is returned as a plain list.
+    ``?pagination=cursor`` (or a ``cursor`` param) returns keyset pages
+    ``{count: null, next, previous, results}`` instead; ``?page=N`` returns
+    numbered pages with a count. ``?store_counts=true`` adds per-store
+    ``store_counts`` to that object (and so implies it); they are a GROUP BY
+    over the index, not stored counters.
+    """
     user = request.user
-    if user.role == 'admin':
-        user_companies = user.companies.values_list('id', flat=True)
-        low_stock = StoreInventory.objects.filter(
-            item__companies__id__in=user_companies,
-            quantity__lte=models.F('min_stock_level')
-        ).select_related('item', 'store', 'company')
+    params = request.query_params
+
+    try:
+        if user.role == 'admin':
+            user_companies = user.companies.values_list('id', flat=True)
+            low_stock = StoreInventory.objects.filter(company_id__in=user_companies)
+        else:
+            user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
+            low_stock = StoreInventory.objects.filter(store_id__in=user_stores)
+
+        low_stock = low_stock.filter(quantity__lte=models.F('min_stock_level'))
+
+        store_id = params.get('store')
+        if store_id:
+            low_stock = low_stock.filter(store_id=int(store_id))
+
+        validators = list_validators(request, low_stock, 'last_updated', 'item__updated_at')
+        not_modified = not_modified_response(request, validators)
+        if not_modified:
+            return not_modified
+
+        rows = low_stock.select_related('item', 'store', 'company')
+        with_counts = params.get('store_counts', '').lower() in ('1', 'true', 'yes')
+        paginated = params.get('pagination') == 'cursor' or 'cursor' in params or 'page' in params
+
+        if not paginated and not with_counts:
+            return with_validators(Response(StoreInventorySerializer(rows, many=True).data), validators)
+
+        keyset = params.get('pagination') == 'cursor' or 'cursor' in params
+        rows, pagination = _paginate_by_id_desc(request, rows, keyset=keyset)
+        data = {**pagination, 'results': StoreInventorySerializer(rows, many=True).data}
+
+        if with_counts:
+            store_counts = low_stock.order_by().values('store_id', 'store__name').annotate(
+                low_stock_count=models.Count('id')
+            )
+            data['store_counts'] = [
+                {
+                    'store_id': entry['store_id'],
+                    'store_name': entry['store__name'],
+                    'low_stock_count': entry['low_stock_count'],
+                }
+                for entry in store_counts
+            ]
+
+        return with_validators(Response(data), validators)
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _paginate_by_id_desc(request, queryset, max_page_size=100, keyset=False):
+    """
+    Paginate a queryset ordered by ``-id`` inside the database.
+
+    ``?cursor=<id>`` uses keyset pagination (WHERE id < cursor) so any page costs
+    the same as the first one. ``?page=N`` keeps the page-number contract of
+    existing clients (a COUNT and an OFFSET). With ``keyset`` the first page is
+    read the keyset way too, and ``count`` is None. The ``next`` link is always
+    a cursor link.
+
+    Returns:
+        tuple: (list of rows for this page, dict with count/next/previous)
+    """
+    try:
+        page_size = min(int(request.query_params.get('page_size', max_page_size)), max_page_size)
+    except (ValueError, TypeError):
+        page_size = max_page_size
+    page_size = max(page_size, 1)
+
+    queryset = queryset.order_by('-id')
+    base_url = request.build_absolute_uri(request.path)
+    params = request.query_params.copy()
+    params['page_size'] = page_size
+    params.pop('page', None)
+
+    cursor = request.query_params.get('cursor')
+    count = None
+    previous_url = None
+
+    if cursor:
+        try:
+            cursor = int(cursor)
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+        rows = list(queryset.filter(id__lt=cursor)[:page_size + 1])
+    elif keyset:
+        rows = list(queryset[:page_size + 1])
     else:
-        user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
-        low_stock = StoreInventory.objects.filter(
-            store__id__in=user_stores,
-            quantity__lte=models.F('min_stock_level')
-        ).select_related('item', 'store', 'company')
+        try:
+            page_number = max(int(request.query_params.get('page', 1)), 1)
+        except (ValueError, TypeError):
+            page_number = 1
+        count = queryset.count()
+        num_pages = max((count + page_size - 1) // page_size, 1)
+        page_number = min(page_number, num_pages)
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+
+        if page_number > 1:
+            previous_params = params.copy()
+            previous_params.pop('cursor', None)
+            previous_params['page'] = page_number - 1
+            previous_url = f"{base_url}?{previous_params.urlencode()}"
+
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        params['cursor'] = rows[-1].id
+        next_url = f"{base_url}?{params.urlencode()}"
 
-    serializer = StoreInventorySerializer(low_stock, many=True)
-    return Response(serializer.data)
+    return rows, {'count': count, 'next': next_url, 'previous': previous_url}
 
 
 @api_view(['GET'])
@@ -244,7 +409,6 @@ def store_inventory_view(request, store_id):
     try:
         # Get the store to check its company
         from apps.stores.models import Store
-        from django.core.paginator import Paginator, EmptyPage
 
         store = Store.objects.select_related('company').get(id=store_id)
 
@@ -254,92 +418,459 @@ def store_inventory_view(request, store_id):
             store_inventory = StoreInventory.objects.filter(
                 store_id=store_id,
                 company__id__in=user_companies  # Show all admin's companies' items in this store
-            ).select_related('item', 'company').order_by('-id')
+            ).select_related('item', 'store', 'company')
         else:
             if not user.store_assignments.filter(store_id=store_id, is_active=True).exists():
                 return Response({'error': 'Access denied to this store'}, status=status.HTTP_403_FORBIDDEN)
             store_inventory = StoreInventory.objects.filter(
                 store_id=store_id
-            ).select_related('item', 'store', 'company').order_by('-id')
+            ).select_related('item', 'store', 'company')
+
+        validators = list_validators(request, store_inventory, 'last_updated', 'item__updated_at')
+        not_modified = not_modified_response(request, validators)
+        if not_modified:
+            return not_modified
 
         # Search filtering
         search_query = request.query_params.get('search', '').strip()
         if search_query:
-            from django.db.models import Q
-            store_inventory = store_inventory.filter(
-                Q(item__name__icontains=search_query) |
-                Q(item__sku__icontains=search_query) |
-                Q(company__name__icontains=search_query)
+            store_inventory = search_inventory(store_inventory, search_query)
+
+        # Paginate in the database
+        rows, pagination = _paginate_by_id_desc(request, store_inventory)
+
+        serializer = StoreInventorySerializer(rows, many=True)
+
+        return with_validators(Response({
+            **pagination,
+            'results': serializer.data
+        }), validators)
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _id_list(value, name, limit=1000):
+    """Parse a comma-separated id list query parameter"""
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValueError(f'{name} must be comma-separated ids')
+    if len(ids) > limit:
+        raise ValueError(f'At most {limit} {name} per request')
+    return ids
+
+
+@api_view(['GET'])
+@permission_classes([IsStoreUser])
+def stock_matrix_view(request):
+    """
+    Item x store availability matrix across the user's stores in one request.
+
+    Query params: ``items`` (comma-separated ids, kept in that order) or else
+    every item in scope by id, paged with ``after`` (the ``next_after`` of the
+    previous page) and ``limit`` (default 200, max 1000); optional ``stores``
+    (comma-separated ids), ``company``, ``search`` and ``axis`` (items|stores).
+    Quantities are summed across companies; ``None`` means no inventory row.
+    """
+    from apps.stores.models import Store
+
+    user = request.user
+    params = request.query_params
+
+    try:
+        if user.role == 'admin':
+            user_companies = user.companies.values_list('id', flat=True)
+            inventories = StoreInventory.objects.filter(company_id__in=user_companies)
+            stores = Store.objects.filter(company__owner=user, is_active=True)
+            items = Item.objects.filter(
+                id__in=Item.companies.through.objects.filter(company_id__in=user_companies).values('item_id')
             )
+        else:
+            user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
+            inventories = StoreInventory.objects.filter(store_id__in=user_stores)
+            stores = Store.objects.filter(id__in=user_stores, is_active=True)
+            items = Item.objects.filter(id__in=inventories.values('item_id'))
+
+        if params.get('company'):
+            company_id = int(params['company'])
+            inventories = inventories.filter(company_id=company_id)
+            items = items.filter(companies__id=company_id)
+        if params.get('stores'):
+            stores = stores.filter(id__in=_id_list(params['stores'], 'stores'))
+        if params.get('search', '').strip():
+            items = search_items(items, params['search'])
+
+        next_after = None
+        if params.get('items'):
+            requested = _id_list(params['items'], 'items')
+            found = {item['id']: item for item in items.filter(id__in=requested).values('id', 'name', 'sku')}
+            item_rows = [found[item_id] for item_id in dict.fromkeys(requested) if item_id in found]
+        else:
+            limit = max(min(int(params.get('limit', 200)), 1000), 1)
+            if params.get('after'):
+                items = items.filter(id__gt=int(params['after']))
+            item_rows = list(items.order_by('id').values('id', 'name', 'sku')[:limit + 1])
+            if len(item_rows) > limit:
+                item_rows = item_rows[:limit]
+                next_after = item_rows[-1]['id']
+        store_rows = list(stores.order_by('name', 'id').values('id', 'name'))
+
+        scope = inventories.filter(
+            item_id__in=[item['id'] for item in item_rows], store_id__in=[store['id'] for store in store_rows]
+        )
+        validators = list_validators(request, scope, 'last_updated', 'item__updated_at', 'store__updated_at')
+        not_modified = not_modified_response(request, validators)
+        if not_modified:
+            return not_modified
 
-        # Deduplicate BEFORE pagination (more efficient)
-        seen_keys = set()
-        unique_inventory_qs = []
-        for inv in store_inventory:
-            key = f"{inv.item_id}_{inv.company_id}"
-            if key not in seen_keys:
-                seen_keys.add(key)
-                unique_inventory_qs.append(inv.id)
+        matrix = availability_matrix(inventories, item_rows, store_rows, axis=params.get('axis', 'items'))
+        return with_validators(Response({**matrix, 'next_after': next_after}), validators)
 
-        # Get deduplicated queryset
-        store_inventory = StoreInventory.objects.filter(
-            id__in=unique_inventory_qs
-        ).select_related('item', 'store', 'company').order_by('-id')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Pagination
-        page_number = request.query_params.get('page', 1)
-        page_size = request.query_params.get('page_size', 100)
 
-        try:
-            page_size = min(int(page_size), 100)  # Max 100 items per page
-        except (ValueError, TypeError):
-            page_size = 100
+def _parse_as_of(value, end_of_day=True):
+    """Parse an ISO datetime or date (end, or start, of that day in local time) into an aware datetime"""
+    from datetime import datetime, time
+    from django.utils import timezone
+    from django.utils.dateparse import parse_date, parse_datetime
 
-        paginator = Paginator(store_inventory, page_size)
+    try:
+        at = parse_datetime(value)
+        if at is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            at = datetime.combine(day, time.max if end_of_day else time.min)
+    except (TypeError, ValueError):
+        raise ValueError('at must be an ISO date or datetime')
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at)
+    return at
 
-        try:
-            page_obj = paginator.page(page_number)
-        except EmptyPage:
-            page_obj = paginator.page(paginator.num_pages)
 
-        serializer = StoreInventorySerializer(page_obj.object_list, many=True)
+@api_view(['GET'])
+@permission_classes([IsStoreUser])
+def store_stock_as_of_view(request, store_id):
+    """
+    Stock of a store's inventory rows as of a point in time (``?at=`` date or datetime).
 
-        # Build pagination URLs
-        request_url = request.build_absolute_uri().split('?')[0]
-        next_url = None
-        previous_url = None
+    Quantities are rebuilt from the nearest InventoryCheckpoint plus the ledger
+    tail. Optional ``?item=<id>``; paginated like store_inventory_view.
+    """
+    user = request.user
 
-        # Build query parameters
-        params = f"page_size={page_size}"
-        if search_query:
-            params += f"&search={search_query}"
+    try:
+        at = _parse_as_of(request.query_params.get('at'))
 
-        if page_obj.has_next():
-            next_url = f"{request_url}?page={page_obj.next_page_number()}&{params}"
+        if user.role == 'admin':
+            user_companies = user.companies.values_list('id', flat=True)
+            inventories = StoreInventory.objects.filter(store_id=store_id, company__id__in=user_companies)
+        else:
+            if not user.store_assignments.filter(store_id=store_id, is_active=True).exists():
+                return Response({'error': 'Access denied to this store'}, status=status.HTTP_403_FORBIDDEN)
+            inventories = StoreInventory.objects.filter(store_id=store_id)
 
-        if page_obj.has_previous():
-            previous_url = f"{request_url}?page={page_obj.previous_page_number()}&{params}"
+        item_id = request.query_params.get('item')
+        if item_id:
+            inventories = inventories.filter(item_id=int(item_id))
+
+        rows, pagination = _paginate_by_id_desc(request, inventories.select_related('item', 'company'))
+        quantities = stock_as_of([row.id for row in rows], at)
 
         return Response({
-            'count': paginator.count,
-            'next': next_url,
-            'previous': previous_url,
-            'results': serializer.data
+            **pagination,
+            'at': at,
+            'results': [
+                {
+                    'inventory_id': row.id,
+                    'item_id': row.item_id,
+                    'item_name': row.item.name,
+                    'item_sku': row.item.sku,
+                    'company': row.company_id,
+                    'company_name': row.company.name,
+                    'quantity': quantities[row.id],
+                    'current_quantity': row.quantity,
+                }
+                for row in rows
+            ]
+        })
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def stock_valuation_view(request):
+    """
+    Paginated stock valuation for the admin's inventory.
+
+    Query params: ``method`` (weighted_average|fifo, default weighted_average),
+    ``at`` (date or datetime, default now), optional ``store`` and ``company`` ids.
+    Only the rows of the requested page are valued. Stock without a recorded
+    purchase cost is left out of ``value`` and reported as ``uncosted_quantity``.
+    """
+    from decimal import Decimal
+    from django.utils import timezone
+
+    try:
+        at = _parse_as_of(request.query_params['at']) if request.query_params.get('at') else timezone.now()
+        method = request.query_params.get('method', 'weighted_average')
+
+        user_companies = request.user.companies.values_list('id', flat=True)
+        inventories = StoreInventory.objects.filter(company_id__in=user_companies)
+        if request.query_params.get('store'):
+            inventories = inventories.filter(store_id=int(request.query_params['store']))
+        if request.query_params.get('company'):
+            inventories = inventories.filter(company_id=int(request.query_params['company']))
+
+        rows, pagination = _paginate_by_id_desc(request, inventories.select_related('item', 'store', 'company'))
+        valuations = value_inventories(rows, at, method=method)
+
+        results = []
+        for row in rows:
+            valuation = valuations[row.id]
+            results.append({
+                'inventory_id': row.id,
+                'item_id': row.item_id,
+                'item_name': row.item.name,
+                'item_sku': row.item.sku,
+                'store': row.store_id,
+                'store_name': row.store.name,
+                'company': row.company_id,
+                'company_name': row.company.name,
+                'quantity': valuation['quantity'],
+                'uncosted_quantity': valuation['uncosted_quantity'],
+                'unit_cost': valuation['unit_cost'],
+                'value': valuation['value'],
+            })
+
+        return Response({
+            **pagination,
+            'method': method,
+            'at': at,
+            'page_value': sum((result['value'] for result in results), Decimal('0.00')),
+            'results': results
+        })
+
+    except (ValuationError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsStoreUser])
+def reorder_suggestions_view(request, store_id):
+    """
+    Sales-velocity reorder suggestions for a store, most urgent first.
+
+    Served from the per-store cache filled by the refresh_reorder_suggestions
+    command (computed on a cache miss). Query params: ``needs_reorder=true``
+    to only list rows at or below their reorder point, ``company`` id, and
+    ``refresh=true`` (admins) to recompute now. Paginated with ``page`` and
+    ``page_size``.
+    """
+    user = request.user
+
+    try:
+        if user.role == 'admin':
+            # Checked before anything is computed or cached for the store
+            from apps.stores.models import Store
+            if not Store.objects.filter(pk=store_id, company__owner=user).exists():
+                return Response({'error': 'Access denied to this store'}, status=status.HTTP_403_FORBIDDEN)
+            user_companies = set(user.companies.values_list('id', flat=True))
+        else:
+            if not user.store_assignments.filter(store_id=store_id, is_active=True).exists():
+                return Response({'error': 'Access denied to this store'}, status=status.HTTP_403_FORBIDDEN)
+            user_companies = None
+
+        refresh = user.role == 'admin' and request.query_params.get('refresh') == 'true'
+        suggestions = get_reorder_suggestions(store_id, refresh=refresh)
+
+        rows = suggestions['rows']
+        if user_companies is not None:
+            rows = [row for row in rows if row['company'] in user_companies]
+        if request.query_params.get('company'):
+            company_id = int(request.query_params['company'])
+            rows = [row for row in rows if row['company'] == company_id]
+        if request.query_params.get('needs_reorder') == 'true':
+            rows = [row for row in rows if row['needs_reorder']]
+
+        page_size = max(min(int(request.query_params.get('page_size', 100)), 100), 1)
+        page = max(int(request.query_params.get('page', 1)), 1)
+
+        return Response({
+            'count': len(rows),
+            'page': page,
+            'page_size': page_size,
+            'computed_at': suggestions['computed_at'],
+            'lead_time_days': suggestions['lead_time_days'],
+            'review_days': suggestions['review_days'],
+            'results': rows[(page - 1) * page_size:page * page_size]
         })
 
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _store_hold_scope(user, store_id):
+    """Inventory rows of a store the user may hold stock on, or None without access"""
+    if user.role == 'admin':
+        user_companies = user.companies.values_list('id', flat=True)
+        return StoreInventory.objects.filter(store_id=store_id, company__id__in=user_companies)
+    if not user.store_assignments.filter(store_id=store_id, is_active=True).exists():
+        return None
+    return StoreInventory.objects.filter(store_id=store_id)
+
+
+def _hold_data(hold):
+    return {
+        'id': hold.id,
+        'inventory': hold.inventory_id,
+        'item': hold.inventory.item_id,
+        'company': hold.inventory.company_id,
+        'quantity': hold.quantity,
+        'expires_at': hold.expires_at,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsStoreUser])
+def stock_holds_view(request, store_id):
+    """
+    Hold stock for a cart or draft invoice until it is invoiced or expires.
+
+    Body: ``items`` as ``[{"item": id, "company": id, "quantity": n}]``
+    (``company`` may be omitted when the item has one inventory row in the
+    store), optional ``reference`` to add to an existing cart and
+    ``ttl_seconds`` (default STOCK_HOLD_TTL_SECONDS). All lines are held or
+    none. Pass the returned ``reference`` as ``hold_reference`` when creating
+    the invoice to consume the holds.
+    """
+    from decimal import Decimal, InvalidOperation
+
+    inventories = _store_hold_scope(request.user, store_id)
+    if inventories is None:
+        return Response({'error': 'Access denied to this store'}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        lines = request.data.get('items') or []
+        if not lines:
+            return Response({'error': 'items is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(lines, list) or not all(isinstance(line, dict) for line in lines):
+            return Response(
+                {'error': 'items must be a list of {"item", "company", "quantity"} objects'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        keys = []
+        for line in lines:
+            try:
+                keys.append((int(line.get('item')), int(line['company']) if line.get('company') else None))
+            except (ValueError, TypeError):
+                return Response({'error': 'item and company must be ids'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = {}
+        for row in inventories.filter(item_id__in=[item_id for item_id, _ in keys]).select_related('item'):
+            rows.setdefault(row.item_id, []).append(row)
+
+        holds_requested = []
+        for line, (item_id, company_id) in zip(lines, keys):
+            candidates = rows.get(item_id, [])
+            if company_id:
+                candidates = [row for row in candidates if row.company_id == company_id]
+            if len(candidates) != 1:
+                return Response({
+                    'error': f"Item {item_id} is not available in this store" if not candidates
+                    else f"Item {item_id} is stocked for several companies; specify company"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                quantity = Decimal(str(line.get('quantity')))
+            except InvalidOperation:
+                return Response({'error': 'quantity must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+            holds_requested.append((candidates[0], quantity))
+
+        reference, expires_at, holds = place_holds(
+            holds_requested,
+            reference=request.data.get('reference') or None,
+            user=request.user,
+            ttl_seconds=request.data.get('ttl_seconds')
+        )
+
+    except InsufficientStockError as e:
+        return Response({
+            'type': 'insufficient_inventory',
+            'error': f"Insufficient stock for {e.inventory.item.name}",
+            'item_id': e.inventory.item_id,
+            'available_quantity': e.available,
+            'requested_quantity': e.requested,
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except (HoldValidationError, ValueError, TypeError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    available = dict(
+        StoreInventory.objects.filter(pk__in=[hold.inventory_id for hold in holds]).values_list(
+            'id', models.F('quantity') - models.F('reserved_quantity')
+        )
+    )
+    return Response({
+        'reference': reference,
+        'expires_at': expires_at,
+        'holds': [
+            {**_hold_data(hold), 'available_quantity': available[hold.inventory_id]}
+            for hold in holds
+        ]
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([IsStoreUser])
+def stock_hold_detail_view(request, store_id, reference):
+    """
+    A cart's stock holds in a store.
+
+    GET lists them, PATCH ``{"ttl_seconds": n}`` extends them and DELETE
+    releases them (abandoned cart).
+    """
+    inventories = _store_hold_scope(request.user, store_id)
+    if inventories is None:
+        return Response({'error': 'Access denied to this store'}, status=status.HTTP_403_FORBIDDEN)
+
+    if not StockHold.objects.filter(reference=reference, inventory__in=inventories).exists():
+        return Response({'error': 'No holds found for this reference'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        if request.method == 'DELETE':
+            released = release_holds(reference, store_id=store_id)
+            return Response({'reference': reference, 'released': released})
+
+        if request.method == 'PATCH':
+            extended, expires_at = extend_holds(
+                reference, store_id=store_id, ttl_seconds=request.data.get('ttl_seconds')
+            )
+            return Response({'reference': reference, 'extended': extended, 'expires_at': expires_at})
+
+        holds = StockHold.objects.filter(
+            reference=reference, inventory__store_id=store_id
+        ).select_related('inventory').order_by('id')
+        return Response({'reference': reference, 'holds': [_hold_data(hold) for hold in holds]})
+
+    except (HoldValidationError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def admin_add_stock_view(request):
-    """Allow admin to add stock to any store in their company"""
+    """Allow admin to add stock to any store in their company, optionally at a purchase ``unit_cost``"""
     try:
         item_id = request.data.get('item_id')
         store_id = request.data.get('store_id')
         company_id = request.data.get('company_id')
         quantity = request.data.get('quantity')
+        unit_cost = request.data.get('unit_cost')
         notes = request.data.get('notes', 'Admin stock addition')
 
         if not all([item_id, store_id, company_id, quantity]):
@@ -348,9 +879,11 @@ def admin_add_stock_view(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Verify admin owns the store's company
         from apps.stores.models import Store
         from apps.companies.models import Company
+        unit_cost = parse_unit_cost(unit_cost)
+
+        # Verify admin owns the store's company
         store = Store.objects.get(id=store_id, company__owner=request.user)
         company = Company.objects.get(id=company_id, owner=request.user)
 
@@ -367,18 +900,15 @@ def admin_add_stock_view(request):
             defaults={'quantity': 0, 'min_stock_level': 0, 'max_stock_level': 0}
         )
 
-        # Create transaction record
-        transaction = InventoryTransaction.objects.create(
-            inventory=inventory,
-            transaction_type='add',
-            quantity=abs(float(quantity)),
-            notes=notes
-        )
-
-        # Update inventory quantity
+        # Atomically increment stock and record the transaction
         from decimal import Decimal
-        inventory.quantity += Decimal(str(abs(float(quantity))))
-        inventory.save()
+        transaction = apply_stock_delta(
+            inventory,
+            Decimal(str(abs(float(quantity)))),
+            'add',
+            notes=notes,
+            unit_cost=unit_cost
+        )
 
         return Response({
             'message': 'Stock added successfully',
@@ -404,12 +934,13 @@ def admin_add_stock_view(request):
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def admin_update_stock_view(request):
-    """Allow admin to set stock quantity for any store in their company"""
+    """Allow admin to set stock quantity for any store in their company (``unit_cost`` applies to increases)"""
     try:
         item_id = request.data.get('item_id')
         store_id = request.data.get('store_id')
         company_id = request.data.get('company_id')
         new_quantity = request.data.get('quantity')
+        unit_cost = request.data.get('unit_cost')
         notes = request.data.get('notes', 'Admin stock adjustment')
 
         if not all([item_id, store_id, company_id]) or new_quantity is None:
@@ -418,9 +949,11 @@ def admin_update_stock_view(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Verify admin owns the store's company
         from apps.stores.models import Store
         from apps.companies.models import Company
+        unit_cost = parse_unit_cost(unit_cost)
+
+        # Verify admin owns the store's company
         store = Store.objects.get(id=store_id, company__owner=request.user)
         company = Company.objects.get(id=company_id, owner=request.user)
 
@@ -437,39 +970,23 @@ def admin_update_stock_view(request):
             defaults={'quantity': 0, 'min_stock_level': 0, 'max_stock_level': 0}
         )
         
+        # Compare-and-swap to the new level; the transaction records the difference
         from decimal import Decimal
-        old_quantity = inventory.quantity
         new_quantity = Decimal(str(float(new_quantity)))
+        old_quantity, transaction = set_stock_level(inventory, new_quantity, notes=notes, unit_cost=unit_cost)
         quantity_change = new_quantity - old_quantity
-        
-        # Create transaction record
-        transaction_type = 'adjustment'
-        if quantity_change > 0:
-            transaction_type = 'add'
-        elif quantity_change < 0:
-            transaction_type = 'remove'
-        
-        if quantity_change != 0:
-            transaction = InventoryTransaction.objects.create(
-                inventory=inventory,
-                transaction_type=transaction_type,
-                quantity=abs(quantity_change),
-                notes=f"{notes} (Old: {old_quantity}, New: {new_quantity})"
-            )
-        
-        # Update inventory quantity
-        inventory.quantity = new_quantity
-        inventory.save()
-        
+
         return Response({
             'message': 'Stock updated successfully',
             'inventory_id': inventory.id,
             'old_quantity': old_quantity,
             'new_quantity': new_quantity,
             'quantity_change': quantity_change,
-            'transaction_id': transaction.id if quantity_change != 0 else None
+            'transaction_id': transaction.id if transaction else None
         })
-        
+
+    except StockConflictError as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
     except Store.DoesNotExist:
         return Response(
             {'error': 'Store not found or access denied'}, 
@@ -484,6 +1001,72 @@ def admin_update_stock_view(request):
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser, FormParser])
+def admin_bulk_stock_import_view(request):
+    """
+    Bulk-load stock from an uploaded CSV or JSONL file.
+
+    Multipart fields: ``file`` (required), ``format`` (csv|jsonl, default from the
+    file extension), ``notes``. Each record is sku, store, company, quantity and an
+    optional mode (add|set) and unit_cost. Returns counts and a per-row error report.
+    """
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        fmt = detect_format(upload.name, request.data.get('format'))
+        report = import_stock(
+            iter_uploaded_records(upload, fmt),
+            owner=request.user,
+            notes=request.data.get('notes') or 'Bulk stock import'
+        )
+    except ImportFileError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except UnicodeDecodeError:
+        return Response({'error': 'File must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(report)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser, FormParser])
+def admin_bulk_catalog_import_view(request):
+    """
+    Bulk-upsert items from an uploaded CSV or JSONL catalog.
+
+    Multipart fields: ``file`` (required), ``format`` (csv|jsonl, default from the
+    file extension), ``company`` (default company id for rows without companies).
+    Items are matched by SKU; returns counts and a per-row error report.
+    """
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        default_company = request.data.get('company')
+        default_companies = [int(default_company)] if default_company else []
+    except (TypeError, ValueError):
+        return Response({'error': 'company must be a company id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        fmt = detect_format(upload.name, request.data.get('format'))
+        report = import_catalog(
+            iter_uploaded_records(upload, fmt),
+            owner=request.user,
+            default_companies=default_companies
+        )
+    except ImportFileError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except UnicodeDecodeError:
+        return Response({'error': 'File must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(report)
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_store_stock_view(request, store_id):
@@ -491,8 +1074,6 @@ def admin_store_stock_view(request, store_id):
     try:
         # Verify admin owns the store's company
         from apps.stores.models import Store
-        from django.core.paginator import Paginator, EmptyPage
-        from django.db.models import Q
 
         store = Store.objects.get(id=store_id, company__owner=request.user)
 
@@ -504,15 +1085,13 @@ def admin_store_stock_view(request, store_id):
 
         # Apply search filter if provided
         if search_query:
-            inventories = inventories.filter(
-                Q(item__name__icontains=search_query) |
-                Q(item__sku__icontains=search_query) |
-                Q(company__name__icontains=search_query)
-            )
+            inventories = search_inventory(inventories, search_query)
 
-        # Serialize existing inventory
+        rows, pagination = _paginate_by_id_desc(request, inventories)
+
+        # Serialize only the current page
         inventory_data = []
-        for inventory in inventories:
+        for inventory in rows:
             inventory_data.append({
                 'id': inventory.id,
                 'item_id': inventory.item.id,
@@ -530,57 +1109,13 @@ def admin_store_stock_view(request, store_id):
                 'has_inventory': True
             })
 
-        # Deduplicate by (item_id, company_id) to prevent duplicate entries
-        unique_inventory = {}
-        for inv_data in inventory_data:
-            key = (inv_data['item_id'], inv_data['company'])
-            # Keep the entry with higher quantity or the first one found
-            if key not in unique_inventory or inv_data['quantity'] > unique_inventory[key]['quantity']:
-                unique_inventory[key] = inv_data
-
-        inventory_list = list(unique_inventory.values())
-
-        # Pagination
-        page_number = request.query_params.get('page', 1)
-        page_size = request.query_params.get('page_size', 100)
-
-        try:
-            page_size = min(int(page_size), 100)  # Max 100 items per page
-        except (ValueError, TypeError):
-            page_size = 100
-
-        paginator = Paginator(inventory_list, page_size)
-
-        try:
-            page_obj = paginator.page(page_number)
-        except EmptyPage:
-            page_obj = paginator.page(paginator.num_pages)
-
-        # Build pagination URLs
-        request_url = request.build_absolute_uri().split('?')[0]
-        next_url = None
-        previous_url = None
-
-        # Build query parameters
-        params = f"page_size={page_size}"
-        if search_query:
-            params += f"&search={search_query}"
-
-        if page_obj.has_next():
-            next_url = f"{request_url}?page={page_obj.next_page_number()}&{params}"
-
-        if page_obj.has_previous():
-            previous_url = f"{request_url}?page={page_obj.previous_page_number()}&{params}"
-
         return Response({
             'store_id': store.id,
             'store_name': store.name,
-            'count': paginator.count,
-            'next': next_url,
-            'previous': previous_url,
-            'inventory': page_obj.object_list
+            **pagination,
+            'inventory': inventory_data
         })
-        
+
     except Store.DoesNotExist:
         return Response(
             {'error': 'Store not found or access denied'}, 
@@ -619,55 +1154,13 @@ class InventoryTransferListCreateView(generics.ListCreateAPIView):
     
     def _process_transfer(self, transfer):
         """Process the inventory transfer"""
-        from decimal import Decimal
-        from django.utils import timezone
-        from django.db import transaction
-
         try:
-            with transaction.atomic():
-                # Get source inventory (must include company)
-                source_inventory = StoreInventory.objects.get(
-                    item=transfer.item,
-                    store=transfer.from_store,
-                    company=transfer.company
-                )
-
-                # Get or create destination inventory (must include company)
-                dest_inventory, created = StoreInventory.objects.get_or_create(
-                    item=transfer.item,
-                    store=transfer.to_store,
-                    company=transfer.company,
-                    defaults={'quantity': Decimal('0.00')}
-                )
-
-                # Update quantities
-                source_inventory.quantity -= Decimal(str(transfer.quantity))
-                dest_inventory.quantity += Decimal(str(transfer.quantity))
-
-                # Save inventories
-                source_inventory.save()
-                dest_inventory.save()
-
-                # Create transaction records
-                InventoryTransaction.objects.create(
-                    inventory=source_inventory,
-                    transaction_type='transfer',
-                    quantity=-float(transfer.quantity),
-                    notes=f'Transfer to {transfer.to_store.name}: {transfer.notes or ""}'
-                )
-
-                InventoryTransaction.objects.create(
-                    inventory=dest_inventory,
-                    transaction_type='transfer',
-                    quantity=float(transfer.quantity),
-                    notes=f'Transfer from {transfer.from_store.name}: {transfer.notes or ""}'
-                )
-
-                # Mark transfer as completed
-                transfer.status = 'completed'
-                transfer.completed_at = timezone.now()
-                transfer.save()
-
+            execute_transfers([transfer])
+        except TransferValidationError as e:
+            # Missing source or insufficient stock - cancel and report as a client error
+            transfer.status = 'cancelled'
+            transfer.save()
+            raise ValidationError(str(e))
         except Exception as e:
             # Mark transfer as cancelled if it fails
             transfer.status = 'cancelled'
@@ -691,45 +1184,57 @@ class InventoryTransferDetailView(generics.RetrieveAPIView):
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def inventory_transfer_history(request):
-    """Get transfer history for admin's stores - returns batches and standalone transfers"""
+    """
+    Transfer history for admin's stores - batches and standalone transfers, newest first.
+
+    Query params: ``store``, ``item``, ``date_from``, ``date_to`` (ISO date or
+    datetime) and ``page_size`` (default 50, max 200). By default the first page
+    is returned as a plain list; ``?pagination=cursor`` (or a ``cursor`` from a
+    previous page) returns ``{next, results}`` so the whole history can be paged.
+    """
     from .serializers import TransferBatchSerializer
     user = request.user
     user_companies = user.companies.values_list('id', flat=True)
 
-    # Get batches (grouped transfers)
-    batches = TransferBatch.objects.filter(
-        from_store__company__id__in=user_companies,
-        to_store__company__id__in=user_companies
-    ).prefetch_related('transfers', 'transfers__item', 'transfers__company').order_by('-created_at')[:50]
-
-    # Get standalone transfers (not part of any batch)
-    standalone_transfers = InventoryTransfer.objects.filter(
-        from_store__company__id__in=user_companies,
-        to_store__company__id__in=user_companies,
-        batch__isnull=True
-    ).order_by('-created_at')[:50]
+    try:
+        params = request.query_params
+        entries, next_cursor = transfer_timeline(
+            user_companies,
+            store_id=int(params['store']) if params.get('store') else None,
+            item_id=int(params['item']) if params.get('item') else None,
+            date_from=_parse_as_of(params['date_from'], end_of_day=False) if params.get('date_from') else None,
+            date_to=_parse_as_of(params['date_to']) if params.get('date_to') else None,
+            cursor=params.get('cursor'),
+            page_size=int(params.get('page_size', TIMELINE_PAGE_SIZE)),
+        )
+    except (TimelineCursorError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    batch_serializer = TransferBatchSerializer(batches, many=True)
-    transfer_serializer = InventoryTransferSerializer(standalone_transfers, many=True)
+    results = [
+        {
+            'type': kind,
+            'data': (TransferBatchSerializer if kind == 'batch' else InventoryTransferSerializer)(entry).data
+        }
+        for kind, entry in entries
+    ]
 
-    # Combine and sort by created_at
-    combined = []
-    for batch in batch_serializer.data:
-        combined.append({'type': 'batch', 'data': batch})
-    for transfer in transfer_serializer.data:
-        combined.append({'type': 'transfer', 'data': transfer})
+    if params.get('pagination') != 'cursor' and 'cursor' not in params:
+        return Response(results)
 
-    # Sort by created_at descending
-    combined.sort(key=lambda x: x['data']['created_at'], reverse=True)
+    next_url = None
+    if next_cursor:
+        next_params = params.copy()
+        next_params['cursor'] = next_cursor
+        next_url = f"{request.build_absolute_uri(request.path)}?{next_params.urlencode()}"
 
-    return Response(combined[:50])
+    return Response({'next': next_url, 'results': results})
 
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def create_batch_transfer(request):
     """Create a batch transfer of multiple items"""
-    from decimal import Decimal
+    from decimal import Decimal, InvalidOperation
     from django.utils import timezone
     from django.db import transaction
 
@@ -745,8 +1250,9 @@ def create_batch_transfer(request):
     if not items_data:
         return Response({'error': 'items list cannot be empty'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # PRE-VALIDATION: Validate ALL items BEFORE creating any transfers
+    # PRE-VALIDATION: Validate ALL line fields BEFORE touching inventory
     validation_errors = []
+    transfers = []
 
     for idx, item_data in enumerate(items_data):
         item_id = item_data.get('item_id')
@@ -772,7 +1278,7 @@ def create_batch_transfer(request):
                     "error": f"Quantity must be greater than 0 (got {quantity})"
                 })
                 continue
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError, InvalidOperation) as e:
             validation_errors.append({
                 "item_index": idx,
                 "item_id": item_id,
@@ -780,144 +1286,57 @@ def create_batch_transfer(request):
             })
             continue
 
-        # Check source inventory exists and has enough stock
-        try:
-            source_inv = StoreInventory.objects.select_related('item').get(
-                item_id=item_id,
-                store_id=from_store_id,
-                company_id=company_id
-            )
-
-            if source_inv.quantity < qty_decimal:
-                validation_errors.append({
-                    "item_index": idx,
-                    "item_id": item_id,
-                    "item_name": source_inv.item.name,
-                    "error": f"Insufficient inventory. Available: {source_inv.quantity}, Requested: {quantity}"
-                })
-
-        except StoreInventory.DoesNotExist:
-            validation_errors.append({
-                "item_index": idx,
-                "item_id": item_id,
-                "error": "Item not found in source store for this company"
-            })
+        transfers.append(InventoryTransfer(
+            item_id=item_id,
+            company_id=company_id,
+            from_store_id=from_store_id,
+            to_store_id=to_store_id,
+            quantity=qty_decimal,
+            notes=notes,
+            initiated_by=request.user
+        ))
 
     # If ANY validation errors, return them and don't create transfers
     if validation_errors:
-        return Response({
-            'error': 'Transfer validation failed',
-            'message': f'{len(validation_errors)} of {len(items_data)} items failed validation',
-            'details': validation_errors,
-            'failed_items': len(validation_errors),
-            'total_items': len(items_data)
-        }, status=status.HTTP_400_BAD_REQUEST)
+        return _batch_validation_failed(validation_errors, len(items_data))
 
-    # All validation passed - proceed with creating transfers
+    # Stock checks, row locking and all writes happen set-based in the transfer engine
     try:
         with transaction.atomic():
-            # Create batch record
             batch = TransferBatch.objects.create(
                 from_store_id=from_store_id,
                 to_store_id=to_store_id,
                 notes=notes,
                 initiated_by=request.user
             )
+            for transfer in transfers:
+                transfer.batch = batch
 
-            successful_transfers = []
-
-            # Create individual transfers
-            for item_data in items_data:
-                item_id = item_data.get('item_id')
-                company_id = item_data.get('company_id')
-                quantity = item_data.get('quantity')
-
-                if not all([item_id, company_id, quantity]):
-                    continue
-
-                # Create transfer record
-                transfer = InventoryTransfer.objects.create(
-                    batch=batch,
-                    item_id=item_id,
-                    company_id=company_id,
-                    from_store_id=from_store_id,
-                    to_store_id=to_store_id,
-                    quantity=Decimal(str(quantity)),
-                    notes=notes,
-                    initiated_by=request.user
-                )
-
-                # Process transfer immediately
-                try:
-                    # Get source inventory
-                    source_inventory = StoreInventory.objects.get(
-                        item_id=item_id,
-                        store_id=from_store_id,
-                        company_id=company_id
-                    )
-
-                    # Get or create destination inventory
-                    dest_inventory, created = StoreInventory.objects.get_or_create(
-                        item_id=item_id,
-                        store_id=to_store_id,
-                        company_id=company_id,
-                        defaults={'quantity': Decimal('0.00')}
-                    )
-
-                    # SAFETY CHECK: Verify source has enough inventory (final safeguard)
-                    qty_decimal = Decimal(str(quantity))
-                    if source_inventory.quantity < qty_decimal:
-                        raise ValueError(
-                            f"Insufficient inventory for {source_inventory.item.name}. "
-                            f"Available: {source_inventory.quantity}, Requested: {quantity}"
-                        )
-
-                    # Update quantities (now safe - verified above)
-                    source_inventory.quantity -= qty_decimal
-                    dest_inventory.quantity += qty_decimal
-
-                    # Save inventories
-                    source_inventory.save()
-                    dest_inventory.save()
-
-                    # Create transaction records
-                    InventoryTransaction.objects.create(
-                        inventory=source_inventory,
-                        transaction_type='transfer',
-                        quantity=-float(quantity),
-                        notes=f'Batch transfer to {dest_inventory.store.name}: {notes}'
-                    )
-
-                    InventoryTransaction.objects.create(
-                        inventory=dest_inventory,
-                        transaction_type='transfer',
-                        quantity=float(quantity),
-                        notes=f'Batch transfer from {source_inventory.store.name}: {notes}'
-                    )
-
-                    # Mark transfer as completed
-                    transfer.status = 'completed'
-                    transfer.completed_at = timezone.now()
-                    transfer.save()
-
-                    successful_transfers.append(transfer.id)
-
-                except Exception as e:
-                    # Mark this individual transfer as cancelled
-                    transfer.status = 'cancelled'
-                    transfer.save()
+            execute_transfers(transfers, note_prefix='Batch transfer')
 
             # Mark batch as completed
             batch.status = 'completed'
             batch.completed_at = timezone.now()
-            batch.save()
+            batch.save(update_fields=['status', 'completed_at'])
 
-            return Response({
-                'message': f'{len(successful_transfers)} items transferred successfully',
-                'batch_id': str(batch.batch_id),
-                'transfer_count': len(successful_transfers),
-                'total_items': len(items_data)
-            }, status=status.HTTP_201_CREATED)
+        return Response({
+            'message': f'{len(transfers)} items transferred successfully',
+            'batch_id': str(batch.batch_id),
+            'transfer_count': len(transfers),
+            'total_items': len(items_data)
+        }, status=status.HTTP_201_CREATED)
 
+    except TransferValidationError as e:
+        return _batch_validation_failed(e.errors, len(items_data))
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _batch_validation_failed(validation_errors, total_items):
+    return Response({
+        'error': 'Transfer validation failed',
+        'message': f'{len(validation_errors)} of {total_items} items failed validation',
+        'details': validation_errors,
+        'failed_items': len(validation_errors),
+        'total_items': total_items
+    }, status=status.HTTP_400_BAD_REQUEST)
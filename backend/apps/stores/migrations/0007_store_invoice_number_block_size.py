@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0006_remove_storeuser_storeuser_user_active_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='invoice_number_block_size',
+            field=models.PositiveIntegerField(default=1, help_text='Invoice numbers reserved per counter update; above 1 numbers may have gaps but busy stores stop queueing on the counter'),
+        ),
+    ]
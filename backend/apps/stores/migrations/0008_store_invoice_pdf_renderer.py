@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0007_store_invoice_number_block_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='invoice_pdf_renderer',
+            field=models.CharField(choices=[('platypus', 'Standard'), ('canvas', 'Fast (traditional layout only)')], default='platypus', help_text='How traditional layout invoice PDFs are drawn; classic layout invoices always use the standard renderer', max_length=20),
+        ),
+    ]
@@ -23,6 +23,21 @@ class Store(models.Model):
         default='traditional',
         help_text='Invoice PDF layout for all users in this store'
     )
+    RENDERER_CHOICES = [
+        ('platypus', 'Standard'),
+        ('canvas', 'Fast (traditional layout only)'),
+    ]
+    invoice_pdf_renderer = models.CharField(
+        max_length=20,
+        choices=RENDERER_CHOICES,
+        default='platypus',
+        help_text='How traditional layout invoice PDFs are drawn; classic layout invoices always use the standard renderer'
+    )
+    invoice_number_block_size = models.PositiveIntegerField(
+        default=1,
+        help_text='Invoice numbers reserved per counter update; above 1 numbers may have gaps '
+                  'but busy stores stop queueing on the counter'
+    )
 
     company = models.ForeignKey(
         Company,
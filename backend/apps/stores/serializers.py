@@ -14,7 +14,8 @@ class StoreSerializer(serializers.ModelSerializer):
         model = Store
         fields = (
             'id', 'name', 'description', 'address', 'city', 'state', 'pincode',
-            'phone', 'email', 'invoice_layout_preference', 'company', 'company_name',
+            'phone', 'email', 'invoice_layout_preference', 'invoice_pdf_renderer', 'invoice_number_block_size',
+            'company', 'company_name',
             'manager', 'manager_name', 'is_active', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from apps.accounts.permissions import IsAdminUser, IsStoreUser, CanAccessStore, CanAccessCompany
+from inventory_system.conditional import list_validators, not_modified_response, with_validators
 from .models import Store, StoreUser
 from .serializers import StoreSerializer, StoreUserSerializer, StoreWithUsersSerializer
 
@@ -92,6 +93,11 @@ def my_stores_view(request):
     else:
         user_stores = user.store_assignments.filter(is_active=True).values_list('store', flat=True)
         stores = Store.objects.filter(id__in=user_stores, is_active=True)
+
+    validators = list_validators(request, stores, 'updated_at')
+    not_modified = not_modified_response(request, validators)
+    if not_modified:
+        return not_modified
     
     serializer = StoreSerializer(stores, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    return with_validators(Response(serializer.data), validators)
\ No newline at end of file
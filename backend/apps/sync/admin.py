@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('resource', 'object_id', 'company_id', 'store_id', 'deleted_at')
+    list_filter = ('resource', 'deleted_at')
+    search_fields = ('object_id',)
+    readonly_fields = ('resource', 'object_id', 'company_id', 'store_id', 'deleted_at')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.sync.services import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than the retention period (run daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Retention in days (default: SYNC_TOMBSTONE_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['days'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} sync tombstone(s)')
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('item', 'Item'), ('store_inventory', 'Store Inventory'), ('customer', 'Customer'), ('invoice', 'Invoice')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('company_id', models.BigIntegerField(blank=True, null=True)),
+                ('store_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'sync_tombstones',
+                'indexes': [models.Index(fields=['resource', 'deleted_at'], name='tombstone_resource_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted row, so delta sync clients can drop it locally.
+
+    Scope ids are plain integers (not foreign keys) so a tombstone outlives the
+    store or company whose deletion cascaded to the row.
+    """
+    RESOURCE_CHOICES = (
+        ('item', 'Item'),
+        ('store_inventory', 'Store Inventory'),
+        ('customer', 'Customer'),
+        ('invoice', 'Invoice'),
+    )
+
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField()
+    company_id = models.BigIntegerField(blank=True, null=True)
+    store_id = models.BigIntegerField(blank=True, null=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} deleted at {self.deleted_at}"
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        indexes = [
+            models.Index(fields=['resource', 'deleted_at'], name='tombstone_resource_time_idx'),
+        ]
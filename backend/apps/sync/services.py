@@ -0,0 +1,262 @@
+"""
+Delta sync for offline-capable clients.
+
+Each resource keeps its own opaque cursor
+``<row time>:<row id>:<tombstone time>:<tombstone id>:<scope>`` (times in
+microseconds since the epoch). A sync returns, per resource, the rows changed
+after the row position in (timestamp, id) order and the tombstones recorded
+after the tombstone position, each capped at ``limit``.
+
+Tombstones are written when a row is deleted and when it moves out of a scope
+(its store or company changes, or an item loses a company link; see signals).
+They carry the old scope, so every client that may have held the row hears
+about it; ids still visible to the requesting user are left out of ``deletes``.
+
+``<scope>`` fingerprints the user's stores (store users) or companies (admins).
+When an assignment or ownership changes, whole stores enter or leave the
+user's view with no per-row record, so a cursor issued for another scope gets
+``reset`` and a full resync, like one older than the tombstone retention.
+
+When a stream is caught up its position is set to the request time minus
+SYNC_CURSOR_OVERLAP_SECONDS, so rows written by transactions that committed
+after the query started are picked up by the next sync (clients upsert, so the
+overlap only costs a few repeated rows). Cursors older than the tombstone
+retention get ``reset`` and a full resync, since deletions may have been pruned.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.invoices.models import Customer, Invoice
+from apps.invoices.serializers import CustomerSerializer, InvoiceListSerializer
+from apps.items.models import Item, StoreInventory
+from apps.items.serializers import ItemSerializer, StoreInventorySerializer
+from apps.stores.models import Store
+from .models import Tombstone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class SyncCursorError(Exception):
+    """Raised for a cursor that was not issued by this endpoint"""
+    pass
+
+
+def _to_micros(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_micros(value):
+    return EPOCH + value * MICROSECOND
+
+
+def encode_cursor(row_position, tombstone_position, scope_fingerprint):
+    (row_time, row_id), (tombstone_time, tombstone_id) = row_position, tombstone_position
+    return f"{_to_micros(row_time)}:{row_id}:{_to_micros(tombstone_time)}:{tombstone_id}:{scope_fingerprint}"
+
+
+def decode_cursor(cursor):
+    """
+    Returns ((row time, row id), (tombstone time, tombstone id), scope fingerprint).
+
+    Cursors issued before scope fingerprints existed decode with a fingerprint of None.
+    """
+    try:
+        parts = cursor.split(':')
+        if len(parts) not in (4, 5):
+            raise ValueError(cursor)
+        row_time, row_id, tombstone_time, tombstone_id = (int(part) for part in parts[:4])
+        fingerprint = parts[4] if len(parts) == 5 else None
+        return (_from_micros(row_time), row_id), (_from_micros(tombstone_time), tombstone_id), fingerprint
+    except (AttributeError, ValueError, OverflowError):
+        raise SyncCursorError(f'Invalid sync cursor: {cursor}')
+
+
+class UserScope:
+    """The stores and companies a user's sync may see"""
+
+    def __init__(self, user):
+        self.is_admin = user.role == 'admin'
+        self.user = user
+        if self.is_admin:
+            self.company_ids = list(user.companies.values_list('id', flat=True))
+            self.store_ids = None
+        else:
+            self.store_ids = list(user.store_assignments.filter(is_active=True).values_list('store_id', flat=True))
+            store_companies = Store.objects.filter(id__in=self.store_ids).values_list('company_id', flat=True)
+            inventory_companies = StoreInventory.objects.filter(
+                store_id__in=self.store_ids
+            ).order_by().values_list('company_id', flat=True).distinct()
+            self.company_ids = list(set(store_companies) | set(inventory_companies))
+
+    @property
+    def fingerprint(self):
+        """Short hash of the stores (store users) or companies (admins) this scope was built from"""
+        ids = self.company_ids if self.is_admin else self.store_ids
+        key = f"{'admin' if self.is_admin else 'store'}:{','.join(str(i) for i in sorted(ids))}"
+        return hashlib.md5(key.encode()).hexdigest()[:12]
+
+
+def _items(scope):
+    if scope.is_admin:
+        item_ids = Item.companies.through.objects.filter(company_id__in=scope.company_ids).values('item_id')
+    else:
+        item_ids = StoreInventory.objects.filter(store_id__in=scope.store_ids).values('item_id')
+    # Inactive items are still synced so clients see the deactivation
+    return Item.objects.filter(id__in=item_ids).prefetch_related('companies')
+
+
+def _store_inventory(scope):
+    queryset = StoreInventory.objects.select_related('item', 'store', 'company')
+    if scope.is_admin:
+        return queryset.filter(company_id__in=scope.company_ids)
+    return queryset.filter(store_id__in=scope.store_ids)
+
+
+def _customers(scope):
+    return Customer.objects.filter(company_id__in=scope.company_ids).select_related('company')
+
+
+def _invoices(scope):
+    queryset = Invoice.objects.select_related('customer', 'company', 'store')
+    if scope.is_admin:
+        return queryset.filter(company_id__in=scope.company_ids)
+    return queryset.filter(store_id__in=scope.store_ids)
+
+
+def _company_tombstones(scope):
+    return Q(company_id__in=scope.company_ids)
+
+
+def _store_tombstones(scope):
+    if scope.is_admin:
+        return Q(company_id__in=scope.company_ids)
+    return Q(store_id__in=scope.store_ids)
+
+
+# resource -> (change timestamp field, scoped queryset, serializer, tombstone filter)
+RESOURCES = {
+    'item': ('updated_at', _items, ItemSerializer, _company_tombstones),
+    'store_inventory': ('last_updated', _store_inventory, StoreInventorySerializer, _store_tombstones),
+    'customer': ('updated_at', _customers, CustomerSerializer, _company_tombstones),
+    'invoice': ('updated_at', _invoices, InvoiceListSerializer, _store_tombstones),
+}
+
+
+def sync_resource(resource, scope, cursor, now, limit=DEFAULT_LIMIT, context=None):
+    """
+    Changes of one resource since ``cursor`` (None for a full sync).
+
+    Returns:
+        dict: upserts (serialized rows), deletes (ids), cursor, has_more, reset
+    """
+    timestamp_field, queryset_for, serializer_class, tombstone_filter = RESOURCES[resource]
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+    caught_up = (now - timedelta(seconds=getattr(settings, 'SYNC_CURSOR_OVERLAP_SECONDS', 30)), 0)
+
+    reset = False
+    row_position = tombstone_position = None
+    if cursor:
+        row_position, tombstone_position, fingerprint = decode_cursor(cursor)
+        if min(row_position[0], tombstone_position[0]) < now - retention or fingerprint != scope.fingerprint:
+            reset = True
+            row_position = tombstone_position = None
+
+    rows = queryset_for(scope)
+    if row_position:
+        row_time, row_id = row_position
+        rows = rows.filter(
+            Q(**{f'{timestamp_field}__gt': row_time}) |
+            Q(**{timestamp_field: row_time, 'id__gt': row_id})
+        )
+    rows = list(rows.order_by(timestamp_field, 'id')[:limit + 1])
+    more_rows = len(rows) > limit
+    rows = rows[:limit]
+
+    deletes = []
+    more_tombstones = False
+    if tombstone_position:
+        tombstone_time, tombstone_id = tombstone_position
+        tombstones = list(Tombstone.objects.filter(
+            tombstone_filter(scope),
+            Q(deleted_at__gt=tombstone_time) | Q(deleted_at=tombstone_time, id__gt=tombstone_id),
+            resource=resource,
+        ).order_by('deleted_at', 'id').values_list('deleted_at', 'id', 'object_id')[:limit + 1])
+        more_tombstones = len(tombstones) > limit
+        tombstones = tombstones[:limit]
+        deletes = {object_id for _, _, object_id in tombstones}
+        if deletes:
+            # A row that moved within the user's scope, or moved back into it, is not deleted for them
+            deletes -= set(queryset_for(scope).filter(id__in=deletes).values_list('id', flat=True))
+        deletes = sorted(deletes)
+        if more_tombstones:
+            tombstone_position = tombstones[-1][:2]
+
+    if more_rows:
+        row_position = (getattr(rows[-1], timestamp_field), rows[-1].id)
+    else:
+        row_position = caught_up
+    if not more_tombstones:
+        tombstone_position = caught_up
+
+    return {
+        'upserts': serializer_class(rows, many=True, context=context or {}).data,
+        'deletes': deletes,
+        'cursor': encode_cursor(row_position, tombstone_position, scope.fingerprint),
+        'has_more': more_rows or more_tombstones,
+        'reset': reset,
+    }
+
+
+def sync(user, cursors, resources=None, limit=DEFAULT_LIMIT, context=None):
+    """
+    Delta sync of several resources for a user.
+
+    Args:
+        user: Requesting user; rows are scoped to their companies / stores
+        cursors: dict resource -> cursor from the previous sync (missing = full sync)
+        resources: Resource names to sync (default: all)
+        limit: Maximum rows and tombstones per resource in this response
+        context: Serializer context
+
+    Raises:
+        SyncCursorError: For an unknown resource or malformed cursor
+    """
+    resources = list(resources or RESOURCES)
+    unknown = [resource for resource in resources if resource not in RESOURCES]
+    if unknown:
+        raise SyncCursorError(f"Unknown resource(s): {', '.join(unknown)}")
+
+    now = timezone.now()
+    scope = UserScope(user)
+    limit = max(min(limit, MAX_LIMIT), 1)
+
+    return {
+        'server_time': now,
+        'resources': {
+            resource: sync_resource(resource, scope, cursors.get(resource), now, limit=limit, context=context)
+            for resource in resources
+        },
+    }
+
+
+def prune_tombstones(older_than_days=None):
+    """
+    Delete tombstones past the retention period.
+
+    Returns:
+        int: Number of tombstones deleted
+    """
+    days = older_than_days or getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    logger.info(f"Pruned {deleted} sync tombstones older than {days} days")
+    return deleted
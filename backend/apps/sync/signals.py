@@ -0,0 +1,124 @@
+"""
+Write a Tombstone for every deleted Item, StoreInventory, Customer and Invoice,
+and for every such row that moves out of a sync scope.
+
+Deletions through the ORM (including cascades and QuerySet.delete()) send these
+signals per row. Items are scoped by company, so their company links are read
+in pre_delete, before the through-table rows are removed.
+
+A row leaves a scope when a save changes its store or company (the values it
+was loaded with are kept by post_init), or when an item loses a company link.
+The tombstone carries the old scope, so clients that can no longer see the row
+drop it; sync leaves out ids the requesting user can still see. Scope changes
+made with QuerySet.update() bypass these signals.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.invoices.models import Customer, Invoice
+from apps.items.models import Item, StoreInventory
+from .models import Tombstone
+
+# model -> (resource, scoping fields)
+SCOPED_MODELS = {
+    StoreInventory: ('store_inventory', ('store_id', 'company_id')),
+    Invoice: ('invoice', ('store_id', 'company_id')),
+    Customer: ('customer', ('company_id',)),
+}
+
+
+def _scope(instance, fields):
+    # Read from __dict__ so deferred fields (e.g. .only('id')) are not loaded
+    return {field: instance.__dict__.get(field) for field in fields}
+
+
+def _item_tombstone(item_id, company_id, store_id=None):
+    """Item tombstone for clients that saw the item through a company link or a store's inventory"""
+    return Tombstone(resource='item', object_id=item_id, company_id=company_id, store_id=store_id)
+
+
+@receiver(post_init, sender=StoreInventory)
+@receiver(post_init, sender=Invoice)
+@receiver(post_init, sender=Customer)
+def remember_sync_scope(sender, instance, **kwargs):
+    instance._sync_scope = _scope(instance, SCOPED_MODELS[sender][1])
+
+
+@receiver(post_save, sender=StoreInventory)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Customer)
+def scope_changed(sender, instance, created, **kwargs):
+    resource, fields = SCOPED_MODELS[sender]
+    old_scope = getattr(instance, '_sync_scope', None)
+    new_scope = _scope(instance, fields)
+    instance._sync_scope = new_scope
+    if created or not old_scope or any(old_scope[field] is None for field in fields) or old_scope == new_scope:
+        return
+
+    tombstones = [Tombstone(resource=resource, object_id=instance.pk, **old_scope)]
+    if sender is StoreInventory and old_scope['store_id'] != new_scope['store_id']:
+        # Store users see items through their stores' inventory
+        tombstones.append(_item_tombstone(instance.item_id, old_scope['company_id'], old_scope['store_id']))
+    Tombstone.objects.bulk_create(tombstones)
+
+
+@receiver(m2m_changed, sender=Item.companies.through)
+def item_companies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # pk_set is not given for clear(); read the links before they go
+        if reverse:
+            instance._sync_cleared_ids = list(instance.items.values_list('id', flat=True))
+        else:
+            instance._sync_cleared_ids = list(instance.companies.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_sync_cleared_ids', None)
+    elif action != 'post_remove':
+        return
+    if not pk_set:
+        return
+
+    if reverse:
+        # company.items.remove(...): instance is the company, pk_set the items
+        pairs = [(item_id, instance.pk) for item_id in pk_set]
+    else:
+        pairs = [(instance.pk, company_id) for company_id in pk_set]
+    Tombstone.objects.bulk_create([_item_tombstone(item_id, company_id) for item_id, company_id in pairs])
+
+
+@receiver(pre_delete, sender=Item)
+def remember_item_companies(sender, instance, **kwargs):
+    instance._sync_company_ids = list(instance.companies.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    Tombstone.objects.bulk_create([
+        Tombstone(resource='item', object_id=instance.pk, company_id=company_id)
+        for company_id in getattr(instance, '_sync_company_ids', None) or [None]
+    ])
+
+
+@receiver(post_delete, sender=StoreInventory)
+def store_inventory_deleted(sender, instance, **kwargs):
+    Tombstone.objects.bulk_create([
+        Tombstone(
+            resource='store_inventory', object_id=instance.pk,
+            company_id=instance.company_id, store_id=instance.store_id
+        ),
+        # The item may have been visible to the store's users through this row only
+        _item_tombstone(instance.item_id, instance.company_id, instance.store_id),
+    ])
+
+
+@receiver(post_delete, sender=Customer)
+def customer_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(resource='customer', object_id=instance.pk, company_id=instance.company_id)
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        resource='invoice', object_id=instance.pk,
+        company_id=instance.company_id, store_id=instance.store_id
+    )
@@ -0,0 +1,129 @@
+"""
+Tests for delta sync and tombstones
+
+To run these tests:
+    python manage.py test apps.sync
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.companies.models import Company
+from apps.items.models import Item, StoreInventory
+from apps.stores.models import Store, StoreUser
+from .models import Tombstone
+from .services import sync
+
+
+class SyncTests(TestCase):
+    """Deletes reach every client that held a row, including rows that only left its scope"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role='admin'
+        )
+        self.company = Company.objects.create(
+            name='Acme', address='1 Road', city='Patna', state='Bihar', pincode='800001',
+            phone='1234567890', email='acme@example.com', gstin='10AAAAA0000A1Z5', pan='AAAAA0000A',
+            owner=self.admin
+        )
+        self.store, self.other_store = (
+            Store.objects.create(
+                name=name, address='1 Road', city='Patna', state='Bihar', pincode='800001',
+                phone='1234567890', company=self.company
+            )
+            for name in ('Main', 'Branch')
+        )
+        self.store_user = User.objects.create_user(
+            email='counter@example.com', username='counter', password='pass', role='store_user',
+            created_by=self.admin
+        )
+        self.assignment = StoreUser.objects.create(user=self.store_user, store=self.store)
+
+        self.item = Item.objects.create(
+            name='Widget', sku='SKU1', hsn_code='1234', price=Decimal('10'), tax_rate=Decimal('18')
+        )
+        self.item.companies.add(self.company)
+        self.inventory = StoreInventory.objects.create(
+            item=self.item, store=self.store, company=self.company, quantity=Decimal('5')
+        )
+
+    def _sync(self, user, cursors=None, resources=('store_inventory',)):
+        return sync(user, cursors or {}, resources=resources)['resources']
+
+    def _cursors(self, result):
+        return {resource: data['cursor'] for resource, data in result.items()}
+
+    def test_full_then_delta(self):
+        first = self._sync(self.store_user)
+        self.assertEqual([row['id'] for row in first['store_inventory']['upserts']], [self.inventory.pk])
+
+        second = self._sync(self.store_user, self._cursors(first))['store_inventory']
+        self.assertFalse(second['reset'])
+        self.assertEqual(second['deletes'], [])
+
+    def test_delete_is_synced(self):
+        cursors = self._cursors(self._sync(self.store_user))
+        inventory_id = self.inventory.pk
+        self.inventory.delete()
+        result = self._sync(self.store_user, cursors)['store_inventory']
+        self.assertEqual(result['deletes'], [inventory_id])
+
+    def test_row_moved_out_of_store_user_scope(self):
+        user_cursors = self._cursors(self._sync(self.store_user, resources=('store_inventory', 'item')))
+        admin_cursors = self._cursors(self._sync(self.admin))
+
+        self.inventory.store = self.other_store
+        self.inventory.save()
+
+        result = self._sync(self.store_user, user_cursors, resources=('store_inventory', 'item'))
+        self.assertEqual(result['store_inventory']['deletes'], [self.inventory.pk])
+        self.assertEqual(result['item']['deletes'], [self.item.pk])
+        self.assertEqual(result['store_inventory']['upserts'], [])
+
+        # Still in the admin's scope: an upsert with the new store, not a delete
+        result = self._sync(self.admin, admin_cursors)['store_inventory']
+        self.assertEqual(result['deletes'], [])
+        self.assertEqual([row['store'] for row in result['upserts']], [self.other_store.pk])
+
+    def test_item_unlinked_from_company(self):
+        cursors = self._cursors(self._sync(self.admin, resources=('item',)))
+        self.item.companies.remove(self.company)
+        result = self._sync(self.admin, cursors, resources=('item',))['item']
+        self.assertEqual(result['deletes'], [self.item.pk])
+
+    def test_item_links_cleared(self):
+        self.company.items.clear()
+        self.assertTrue(Tombstone.objects.filter(resource='item', object_id=self.item.pk).exists())
+
+    def test_unchanged_save_writes_no_tombstone(self):
+        self.inventory.quantity = Decimal('6')
+        self.inventory.save()
+        StoreInventory.objects.get(pk=self.inventory.pk).save()
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_scope_change_resets_cursor(self):
+        cursors = self._cursors(self._sync(self.store_user))
+        self.assignment.is_active = False
+        self.assignment.save()
+        StoreUser.objects.create(user=self.store_user, store=self.other_store)
+
+        result = self._sync(self.store_user, cursors)['store_inventory']
+        self.assertTrue(result['reset'])
+        self.assertEqual(result['upserts'], [])
+
+    def test_cursor_without_scope_resets(self):
+        cursor = self._sync(self.store_user)['store_inventory']['cursor']
+        legacy = cursor.rsplit(':', 1)[0]
+        self.assertTrue(self._sync(self.store_user, {'store_inventory': legacy})['store_inventory']['reset'])
+
+    def test_sync_view(self):
+        client = APIClient()
+        client.force_authenticate(self.store_user)
+        response = client.get('/api/sync/', {'resources': 'store_inventory', 'store_inventory_cursor': 'bad'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/sync/', {'resources': 'store_inventory,invoice'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['resources']), {'store_inventory', 'invoice'})
@@ -0,0 +1,35 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from apps.accounts.permissions import IsStoreUser
+from .services import DEFAULT_LIMIT, RESOURCES, SyncCursorError, sync
+
+
+@api_view(['GET'])
+@permission_classes([IsStoreUser])
+def sync_view(request):
+    """
+    Delta sync of items, store inventory, customers and invoices.
+
+    Query params: ``resources`` (comma-separated, default all of item,
+    store_inventory, customer, invoice), ``<resource>_cursor`` with the cursor
+    returned by the previous sync (omit for a full sync) and ``limit`` (rows and
+    tombstones per resource, max 2000). Each resource returns ``upserts``,
+    ``deletes`` (ids), its next ``cursor``, ``has_more`` (call again with the new
+    cursor) and ``reset`` (cursor too old, or the user's stores / companies
+    changed since it was issued: drop local rows, this is a full sync).
+    """
+    try:
+        resources = [
+            resource.strip() for resource in request.query_params.get('resources', '').split(',') if resource.strip()
+        ]
+        cursors = {
+            resource: request.query_params[f'{resource}_cursor']
+            for resource in RESOURCES if request.query_params.get(f'{resource}_cursor')
+        }
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+
+        return Response(sync(request.user, cursors, resources=resources, limit=limit, context={'request': request}))
+
+    except (SyncCursorError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,10 @@
+"""
+Gunicorn hooks for the web server (gunicorn reads ./gunicorn.conf.py on start).
+"""
+
+
+def post_worker_init(worker):
+    """Compile the invoice PDF layouts once the worker has loaded Django, before its first request"""
+    from apps.invoices.pdf_templates import warm_pdf_templates
+
+    warm_pdf_templates()
@@ -0,0 +1,57 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+def list_validators(request, queryset, *timestamp_fields):
+    """
+    ETag validator for a list endpoint's scope.
+
+    One aggregate query reads the row count and the newest value of each
+    timestamp field (e.g. ``last_updated``, ``item__updated_at``) over the
+    unpaginated scope. Any insert, update or delete in the scope changes the
+    count or a timestamp, and the full request path and user are hashed in,
+    so each page / search / filter has its own ETag.
+
+    No Last-Modified is derived: the newest timestamp does not move when a
+    row is deleted or leaves the filter, so If-Modified-Since alone would
+    answer 304 to a changed list.
+
+    Returns:
+        dict: ``etag`` (quoted)
+    """
+    values = queryset.order_by().aggregate(
+        row_count=Count('pk'),
+        **{f'latest_{index}': Max(field) for index, field in enumerate(timestamp_fields)}
+    )
+    timestamps = [values[f'latest_{index}'] for index in range(len(timestamp_fields))]
+
+    key = '|'.join([
+        request.get_full_path(),
+        str(request.user.pk),
+        str(values['row_count']),
+        *(timestamp.isoformat() if timestamp else '-' for timestamp in timestamps),
+    ])
+    return {'etag': quote_etag(hashlib.md5(key.encode()).hexdigest())}
+
+
+def with_validators(response, validators):
+    """Attach the ETag and make clients revalidate on every poll"""
+    response['ETag'] = validators['etag']
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def not_modified_response(request, validators):
+    """
+    304 response when the client's If-None-Match still matches, else None.
+
+    Call before running the list query or serializer.
+    """
+    response = get_conditional_response(request, etag=validators['etag'])
+    if response is None:
+        return None
+    return with_validators(response, validators)
@@ -0,0 +1,75 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the view's ordering with a primary key tie-breaker.
+
+    Uses the view's OrderingFilter / ``ordering`` (e.g. ``-created_at``) and appends
+    ``-id`` so the sort is total. Pages are fetched with ``WHERE created_at < x``
+    instead of OFFSET, and no COUNT(*) is run.
+    """
+    ordering = ('-created_at',)
+
+    def get_ordering(self, request, queryset, view):
+        if getattr(view, 'ordering', None):
+            self.ordering = view.ordering
+        elif queryset.model._meta.ordering:
+            self.ordering = queryset.model._meta.ordering
+
+        ordering = tuple(super().get_ordering(request, queryset, view))
+
+        if any('__' in field for field in ordering):
+            raise ValidationError({
+                'ordering': 'Cursor pagination does not support ordering by related fields'
+            })
+
+        # Tie-break on primary key in the direction of the leading field
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id',) if ordering[0].startswith('-') else ('id',)
+
+        return ordering
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination with opt-in cursor (keyset) pagination.
+
+    Clients keep the ``?page=N`` contract by default. Requesting
+    ``?pagination=cursor`` (or following a ``cursor`` link) switches the endpoint
+    to KeysetCursorPagination, whose response is ``{next, previous, results}``
+    without ``count``, so deep pages cost the same as the first one.
+    """
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetCursorPagination
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def get_cursor_paginator(self):
+        paginator = self.cursor_pagination_class()
+        paginator.page_size = self.page_size
+        paginator.page_size_query_param = self.page_size_query_param
+        paginator.max_page_size = self.max_page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.get_cursor_paginator()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
@@ -37,6 +37,7 @@ LOCAL_APPS = [
     'apps.stores',
     'apps.items',
     'apps.invoices',
+    'apps.sync',
     'pincodes',
 ]
 
@@ -231,6 +232,32 @@ PINCODE_API_MAX_RETRIES = config('PINCODE_API_MAX_RETRIES', default=2, cast=int)
 PINCODE_CACHE_TTL = config('PINCODE_CACHE_TTL', default=86400, cast=int)  # 24 hours
 PINCODE_FALLBACK_TO_DB = config('PINCODE_FALLBACK_TO_DB', default=True, cast=bool)
 
+# Reorder suggestion configuration
+REORDER_LEAD_TIME_DAYS = config('REORDER_LEAD_TIME_DAYS', default=7, cast=int)
+REORDER_REVIEW_DAYS = config('REORDER_REVIEW_DAYS', default=14, cast=int)
+REORDER_SERVICE_FACTOR = config('REORDER_SERVICE_FACTOR', default=1.65, cast=float)  # ~95% service level
+REORDER_CACHE_TTL = config('REORDER_CACHE_TTL', default=86400, cast=int)  # 24 hours
+
+# Delta sync configuration
+SYNC_CURSOR_OVERLAP_SECONDS = config('SYNC_CURSOR_OVERLAP_SECONDS', default=30, cast=int)
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=90, cast=int)
+
+# Stock hold (cart / draft invoice reservation) configuration
+STOCK_HOLD_TTL_SECONDS = config('STOCK_HOLD_TTL_SECONDS', default=900, cast=int)  # 15 minutes
+STOCK_HOLD_MAX_TTL_SECONDS = config('STOCK_HOLD_MAX_TTL_SECONDS', default=86400, cast=int)  # 24 hours
+
+# Rendered invoice PDF cache: re-render in the background after each invoice save,
+# in a pool of render processes per web worker
+INVOICE_PDF_BACKGROUND_RENDER = config('INVOICE_PDF_BACKGROUND_RENDER', default=True, cast=bool)
+INVOICE_PDF_RENDER_WORKERS = config('INVOICE_PDF_RENDER_WORKERS', default=2, cast=int)
+# Resolution company logos and signatures are downscaled to for invoice PDFs
+INVOICE_PDF_IMAGE_DPI = config('INVOICE_PDF_IMAGE_DPI', default=300, cast=int)
+# Rendered PDFs larger than this (bytes) are spooled to a temp file instead of kept in memory
+INVOICE_PDF_SPOOL_MAX_SIZE = config('INVOICE_PDF_SPOOL_MAX_SIZE', default=1024 * 1024, cast=int)
+# Bulk PDF export: the most invoices one download may hold. An uncached export must finish within
+# gunicorn's --timeout (120 s in the Procfile); raise both together
+INVOICE_PDF_EXPORT_MAX_INVOICES = config('INVOICE_PDF_EXPORT_MAX_INVOICES', default=1000, cast=int)
+
 # Logging configuration for debugging
 LOGGING = {
     'version': 1,
@@ -10,6 +10,7 @@ urlpatterns = [
     path('api/stores/', include('apps.stores.urls')),
     path('api/items/', include('apps.items.urls')),
     path('api/invoices/', include('apps.invoices.urls')),
+    path('api/sync/', include('apps.sync.urls')),
     path('api/pincodes/', include('pincodes.urls')),
 ]
 
@@ -7,6 +7,7 @@ from .models import PinCode
 from .serializers import PinCodeSerializer, PinCodeLookupSerializer
 from .services import PincodeLookupService
 from .services.external_api import PincodeNotFoundError, PincodeAPIError
+from inventory_system.pagination import OptionalCursorPagination
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,7 @@ class PinCodeListView(generics.ListAPIView):
     queryset = PinCode.objects.all()
     serializer_class = PinCodeSerializer
     permission_classes = [AllowAny]  # You can restrict this later
+    pagination_class = OptionalCursorPagination
 
 
 @api_view(['GET'])